@@ -1,13 +1,22 @@
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+from service_common.instrumentation import instrument_app
+from service_common.profiling import init_profiling
+from service_common.tracing import init_tracing
 
 from app.auth.router import router as auth_router
+from app.config import get_settings
 from app.users.router import router as user_router
 
 
 def create_app() -> FastAPI:
-    app = FastAPI()
-    auth_app = FastAPI()
+    settings = get_settings()
+    app = FastAPI(default_response_class=ORJSONResponse)
+    auth_app = FastAPI(default_response_class=ORJSONResponse)
     app.include_router(user_router)
     auth_app.include_router(auth_router)
     app.mount('/auth', auth_app)
+    instrument_app(app)
+    init_tracing(app, 'auth_service', settings)
+    init_profiling(app, settings)
     return app
@@ -6,7 +6,7 @@ from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from mypy_boto3_dynamodb.service_resource import Table
 from passlib.context import CryptContext
-from starlette.concurrency import run_in_threadpool
+from service_common.instrumentation.dynamodb import run_table_operation
 
 from app.auth.schemas import UpdatePassword
 from app.config import get_settings
@@ -68,8 +68,9 @@ async def update_user_password(
     if not pwd_context.verify(passwords.old_password, user.password):
         raise InvalidOldPasswordError
 
-    await run_in_threadpool(
-        db.update_item,
+    await run_table_operation(
+        db,
+        'update_item',
         Key={'id': user.id},
         UpdateExpression='set #password = :password',
         ExpressionAttributeValues={':password': pwd_context.hash(passwords.new_password)},
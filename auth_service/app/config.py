@@ -1,4 +1,5 @@
 from functools import lru_cache
+from typing import Literal
 
 from dotenv import load_dotenv
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -18,6 +19,17 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int
     SECRET_KEY: str
 
+    TRACING_EXPORTER: Literal['none', 'file'] = 'none'
+    TRACING_FILE: str = 'traces.jsonl'
+    TRACING_SAMPLE_RATIO: float = 1.0
+
+    PROFILING_ENABLED: bool = False
+    PROFILING_SAMPLE_RATE: float = 0.01
+    PROFILING_SECRET: str = ''
+    PROFILING_DIR: str = 'profiles'
+    PROFILING_KEEP_PER_ROUTE: int = 20
+    PROFILING_INTERVAL: float = 0.001
+
     model_config = SettingsConfigDict(case_sensitive=True, frozen=False, env_file='.env')
 
 
@@ -4,7 +4,7 @@ from boto3.dynamodb.conditions import Key
 from mypy_boto3_dynamodb.service_resource import Table
 from passlib.context import CryptContext
 from pydantic import TypeAdapter
-from starlette.concurrency import run_in_threadpool
+from service_common.instrumentation.dynamodb import run_table_operation
 
 from app.config import get_settings
 from app.custom_exceptions import UsernameAlreadyTakenError, UserNotFoundError
@@ -12,7 +12,7 @@ from app.users.schemas import UserIn, UserOut, UserUpdate, UserUpdateParams, Use
 
 
 async def get_users(users_table: Table) -> list[UserOut]:
-    users = await run_in_threadpool(users_table.scan)
+    users = await run_table_operation(users_table, 'scan')
     return TypeAdapter(list[UserOut]).validate_python(users['Items'])
 
 
@@ -22,8 +22,9 @@ async def create_user(users_table: Table, user: UserIn, pwd_context: CryptContex
     except UserNotFoundError:
         user_id = str(uuid.uuid4())
         hashed_password = _generate_password_hash(user.password, pwd_context)
-        await run_in_threadpool(
-            users_table.put_item,
+        await run_table_operation(
+            users_table,
+            'put_item',
             Item=user.model_dump(exclude={'password'}) | {'id': user_id, 'password': hashed_password},
         )
         return await get_user_by_id(users_table, user_id)
@@ -32,14 +33,14 @@ async def create_user(users_table: Table, user: UserIn, pwd_context: CryptContex
 
 
 async def get_user_by_id(users_table: Table, user_id: str) -> UserOut:
-    user_db = await run_in_threadpool(users_table.get_item, Key={'id': user_id})
+    user_db = await run_table_operation(users_table, 'get_item', Key={'id': user_id})
     if user_db.get('Item'):
         return UserOut(**user_db['Item'])
     raise UserNotFoundError
 
 
 async def delete_user_by_id(users_table: Table, user_id: str):
-    user_db = await run_in_threadpool(users_table.delete_item, Key={'id': user_id}, ReturnValues='ALL_OLD')
+    user_db = await run_table_operation(users_table, 'delete_item', Key={'id': user_id}, ReturnValues='ALL_OLD')
     if not user_db.get('Attributes'):
         raise UserNotFoundError
 
@@ -54,8 +55,9 @@ async def update_user_by_id(users_table: Table, user_id: str, user: UserUpdate)
 
     user_update_params = _build_user_update_params(user)
     await get_user_by_id(users_table, user_id)
-    await run_in_threadpool(
-        users_table.update_item,
+    await run_table_operation(
+        users_table,
+        'update_item',
         Key={'id': user_id},
         UpdateExpression=user_update_params.set_expression,
         ExpressionAttributeValues=user_update_params.attribute_values,
@@ -65,8 +67,9 @@ async def update_user_by_id(users_table: Table, user_id: str, user: UserUpdate)
 
 
 async def get_user_by_username(users_table: Table, username: str) -> UserWithPasswd:
-    user_db = await run_in_threadpool(
-        users_table.query,
+    user_db = await run_table_operation(
+        users_table,
+        'query',
         IndexName=get_settings().USER_NAME_INDEX,
         KeyConditionExpression=Key('user_name').eq(username),
     )
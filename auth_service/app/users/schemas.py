@@ -4,6 +4,10 @@ import re
 from pydantic import BaseModel, Field, field_validator
 
 
+PHONE_PATTERN = re.compile(r'^\+380[0-9]{9}$')
+PASSPORT_PATTERN = re.compile(r'^(\d{5})|([A-Z]{2}\d{4})$')
+
+
 class RoleEnum(StrEnum):
     EMPLOYEE = auto()
     CUSTOMER = auto()
@@ -55,15 +59,13 @@ class UserUpdate(UserBaseModel):
 
 
 def _validate_phone(phone: str):
-    pattern = r'^\+380[0-9]{9}$'
-    if not bool(re.match(pattern, phone)):
+    if not PHONE_PATTERN.match(phone):
         raise ValueError('Format for phone should be like +380XXXXXXXXX')
     return phone
 
 
 def _validate_passport(passport: str):
-    pattern = r'^(\d{5})|([A-Z]{2}\d{4})$'
-    if not bool(re.match(pattern, passport)):
+    if not PASSPORT_PATTERN.match(passport):
         raise ValueError('Format for passport  should be 5 digits or two big letter with 6 digits')
     return passport
 
@@ -11,6 +11,9 @@ from app import create_app
 from app.config import get_settings
 
 
+pytest_plugins = ['service_common.benchmarks']
+
+
 def pytest_configure(config: pytest.Config):
     """
     Allows plugins and conftest files to perform initial configuration.
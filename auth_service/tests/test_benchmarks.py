@@ -0,0 +1,40 @@
+from app.users.schemas import _validate_passport, _validate_phone, UserIn, UserUpdate
+
+
+BUDGETS = {
+    'validate_phone': 12e-6,
+    'validate_passport': 12e-6,
+    'user_in': 70e-6,
+    'user_update': 70e-6,
+}
+
+USER = {
+    'user_name': 'john',
+    'first_name': 'John',
+    'last_name': 'Doe',
+    'password': 'secret',
+    'phone': '+380501234567',
+    'passport': 'AB1234',
+}
+
+
+def test_validate_phone(benchmark, assert_within_budget):
+    assert benchmark(_validate_phone, '+380501234567') == '+380501234567'
+    assert_within_budget(BUDGETS['validate_phone'])
+
+
+def test_validate_passport(benchmark, assert_within_budget):
+    assert benchmark(_validate_passport, 'AB1234') == 'AB1234'
+    assert_within_budget(BUDGETS['validate_passport'])
+
+
+def test_user_in(benchmark, assert_within_budget):
+    user = benchmark(UserIn.model_validate, USER)
+    assert user.phone == '+380501234567'
+    assert_within_budget(BUDGETS['user_in'])
+
+
+def test_user_update(benchmark, assert_within_budget):
+    user = benchmark(UserUpdate.model_validate, {'phone': '+380507654321', 'passport': '12345'})
+    assert user.passport == '12345'
+    assert_within_budget(BUDGETS['user_update'])
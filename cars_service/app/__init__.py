@@ -1,23 +1,64 @@
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
-from starlette.staticfiles import StaticFiles
-from prometheus_fastapi_instrumentator import Instrumentator
+from fastapi.responses import ORJSONResponse
+from service_common.instrumentation import instrument_app
+from service_common.profiling import init_profiling
+from service_common.tracing import init_tracing
 
+from app.admin.router import router as admin_router
 from app.cars.router import router as car_router
+from app.config import get_settings
+from app.db import get_engine
+from app.images.processing import get_process_pool
+from app.images.static import ImmutableStaticFiles
+from app.rabbit_connection import close_pools, create_channel_pool, create_connection_pool
+from app.redis_client import get_redis_client
 from app.reviews.router import router as review_router
+from app.trip.history import TripHistoryWriter
 from app.trip.router import router as trip_router
-from app.config import get_settings
+from app.trip.tasks import create_trip_scheduler
+
+
+@asynccontextmanager
+async def lifespan(application: FastAPI):
+    connection_pool = create_connection_pool()
+    channel_pool = create_channel_pool(connection_pool)
+    settings = get_settings()
+    history = TripHistoryWriter(
+        get_engine(),
+        settings.TRIP_HISTORY_FLUSH_INTERVAL,
+        settings.TRIP_HISTORY_BATCH_SIZE,
+        settings.TRIP_HISTORY_MAX_BUFFERED_ROWS,
+    )
+    scheduler = create_trip_scheduler(channel_pool, history)
+    application.state.rabbit_connection_pool = connection_pool
+    application.state.rabbit_channel_pool = channel_pool
+    application.state.trip_scheduler = scheduler
+
+    history.start()
+    scheduler.start()
+    yield
+    # Scheduler waits for pending broker confirms before pools are closed
+    await scheduler.stop()
+    await history.stop()
+    await get_engine().dispose()
+    get_process_pool().shutdown()
+    await get_redis_client().close()
+    await close_pools(channel_pool, connection_pool)
 
 
 def create_app() -> FastAPI:
     settings = get_settings()
-    app = FastAPI()
+    app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
     app.include_router(car_router)
     app.include_router(review_router)
     app.include_router(trip_router)
+    app.include_router(admin_router)
 
-    instrumentator = Instrumentator().instrument(app)
-    instrumentator.expose(app)
+    instrument_app(app)
+    init_tracing(app, 'cars_service', settings)
+    init_profiling(app, settings)
 
-    app.mount('/static', StaticFiles(directory=settings.STATIC_DIR), name='static')
+    app.mount('/static', ImmutableStaticFiles(directory=settings.STATIC_DIR), name='static')
     return app
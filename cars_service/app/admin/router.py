@@ -0,0 +1,23 @@
+import hmac
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+
+from app.admin.schemas import SlowQueriesOut
+from app.config import get_settings
+from app.dao.slow_queries import slow_query_log_dependency
+
+
+def check_admin_token(x_admin_token: Annotated[str | None, Header()] = None):
+    """Admin endpoints expose bound query parameters, they are closed unless ADMIN_SECRET is set."""
+    secret = get_settings().ADMIN_SECRET
+    if not secret or not x_admin_token or not hmac.compare_digest(x_admin_token, secret):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='Invalid admin token')
+
+
+router = APIRouter(prefix='/admin', tags=['Admin'], dependencies=[Depends(check_admin_token)])
+
+
+@router.get('/slow-queries', response_model=SlowQueriesOut)
+async def get_slow_queries(slow_query_log: slow_query_log_dependency):
+    return {'stats': slow_query_log.stats(), 'slow_queries': slow_query_log.slow_queries()}
@@ -0,0 +1,30 @@
+from datetime import datetime
+from typing import Any
+
+from pydantic import BaseModel, ConfigDict
+
+
+class QueryShapeStatsOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    shape: str
+    count: int
+    slow: int
+    total: float
+    p95: float
+
+
+class SlowQueryOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    shape: str
+    route: str
+    params: dict[str, Any]
+    duration: float
+    recorded_at: datetime
+    plan: list | None = None
+
+
+class SlowQueriesOut(BaseModel):
+    stats: list[QueryShapeStatsOut]
+    slow_queries: list[SlowQueryOut]
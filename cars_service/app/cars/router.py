@@ -1,11 +1,13 @@
 from typing import Annotated
 
 from fastapi import APIRouter, HTTPException, UploadFile, File, Depends, Query
-from fastapi import Response
+from fastapi import Header, Request, Response
+from service_common.etag import ETagRoute
+from service_common.serialization import model_response
 
 from app.cars.schemas import CarIn, CarOut, CarUpdate, CarFiltering, CarUpdateStatus
 from app.common.dependency import db_dependency
-from app.custom_exceptions import NotFoundError
+from app.custom_exceptions import ImageTooLargeError, NotFoundError, UnsupportedImageTypeError
 from app.dao.car import (
     create_car,
     delete_car_by_id,
@@ -15,13 +17,15 @@ from app.dao.car import (
     update_car_by_id,
     update_cars_status,
 )
+from app.dao.reviews import get_car_reviews
+from app.reviews.schemas import ReviewPageOut
 
-router = APIRouter(prefix='/cars', tags=['Cars'])
+router = APIRouter(prefix='/cars', tags=['Cars'], route_class=ETagRoute)
 
 
 @router.get('/', response_model=list[CarOut])
-async def get_all_cars(db: db_dependency, query_param: Annotated[CarFiltering, Depends()]):
-    return await get_cars(db, query_param)
+async def get_all_cars(request: Request, db: db_dependency, query_param: Annotated[CarFiltering, Depends()]):
+    return model_response(list[CarOut], await get_cars(db, query_param, request.scope['route'].path))
 
 
 @router.post('/', response_model=CarIn, status_code=201)
@@ -29,7 +33,12 @@ async def create_new_car(file: UploadFile, db: db_dependency, car: CarIn = Depen
     if not await is_car_station_exists(car.car_station_id):
         raise HTTPException(status_code=404, detail='Car station not found')
 
-    car = await create_car(db, car, file)
+    try:
+        car = await create_car(db, car, file)
+    except ImageTooLargeError:
+        raise HTTPException(status_code=413, detail='Image is too large')
+    except UnsupportedImageTypeError:
+        raise HTTPException(status_code=415, detail='Image should be jpeg, png or webp')
     return car
 
 
@@ -44,7 +53,7 @@ async def delete(car_id: int, db: db_dependency):
 @router.get('/{car_id}', response_model=CarOut)
 async def retrieve_car(car_id: int, db: db_dependency):
     try:
-        return await retrieve_car_by_id(db, car_id)
+        return model_response(CarOut, await retrieve_car_by_id(db, car_id))
     except NotFoundError:
         raise HTTPException(status_code=404, detail='Car not found')
 
@@ -63,6 +72,20 @@ async def update_car(
         return await update_car_by_id(db, car_id, car, file)
     except NotFoundError:
         raise HTTPException(status_code=404, detail='Car not found')
+    except ImageTooLargeError:
+        raise HTTPException(status_code=413, detail='Image is too large')
+    except UnsupportedImageTypeError:
+        raise HTTPException(status_code=415, detail='Image should be jpeg, png or webp')
+
+
+@router.get('/{car_id}/reviews', response_model=ReviewPageOut)
+async def get_car_reviews_page(
+        car_id: int,
+        db: db_dependency,
+        cursor: int | None = None,
+        limit: Annotated[int | None, Query(ge=1, le=100)] = None,
+):
+    return model_response(ReviewPageOut, await get_car_reviews(db, car_id, cursor, limit))
 
 
 @router.patch('/car-status/',  response_model=list[CarUpdate])
@@ -70,8 +93,9 @@ async def update_car_status_by_mult_criteria(
         db: db_dependency,
         car: CarUpdateStatus,
         car_ids: Annotated[list[int], Query()],
+        idempotency_key: Annotated[str | None, Header(max_length=64)] = None,
 ):
     try:
-        return await update_cars_status(db, car, car_ids)
+        return await update_cars_status(db, car, car_ids, idempotency_key)
     except NotFoundError:
         raise HTTPException(status_code=404, detail='Car not found')
@@ -1,4 +1,3 @@
-import json
 from dataclasses import dataclass
 
 from datetime import date
@@ -7,7 +6,14 @@ import re
 from typing import Annotated
 
 from fastapi import Query, Form
-from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
+from pydantic import BaseModel, ConfigDict, Field, field_serializer, field_validator, model_validator
+from pydantic_core import from_json
+
+from app.images.storage import get_image_url
+
+
+CAR_NUMBER_PATTERN = re.compile(r'^[A-Z]{2}\d{4}[A-Z]{2}$')
+ENGINE_PATTERN = re.compile(r'^[1-6]{1}\.[0-9]{1}L$')
 
 
 class CarStatusEnum(StrEnum):
@@ -36,7 +42,22 @@ class CarBaseModel(BaseModel):
     @model_validator(mode='before')
     @classmethod
     def to_py_dict(cls, data: str | dict):
-        return json.loads(data) if isinstance(data, str) else data
+        return from_json(data) if isinstance(data, str) else data
+
+
+class ImageFormatEnum(StrEnum):
+    WEBP = auto()
+    JPEG = auto()
+
+
+class ImageVariantOut(BaseModel):
+    url: str
+    width: int
+    format: ImageFormatEnum
+
+    @field_serializer('url')
+    def serialize_url(self, url: str) -> str:
+        return get_image_url(url)
 
 
 class CarOut(BaseModel):
@@ -48,11 +69,17 @@ class CarOut(BaseModel):
     year: int
     status: CarStatusEnum
     image: str
+    image_variants: list[ImageVariantOut] = []
     rental_cost: int
     car_station_id: int
 
     model_config = ConfigDict(from_attributes=True)
 
+    @field_serializer('image')
+    def serialize_image(self, image: str) -> str:
+        # Cars keep names of images, URLs depend on the storage and may expire
+        return get_image_url(image)
+
 
 class CarIn(CarBaseModel):
     car_description: str = Field(min_length=1, max_length=32)
@@ -111,15 +138,13 @@ class CarUpdate(CarBaseModel):
 
 
 def _validate_car_number(value):
-    pattern = r'^[A-Z]{2}\d{4}[A-Z]{2}$'
-    if not bool(re.match(pattern, value)):
+    if not CAR_NUMBER_PATTERN.match(value):
         raise ValueError('Format for car number should be AE2321AE')
     return value
 
 
 def _validate_engine(value):
-    pattern = r'^[1-6]{1}\.[0-9]{1}L$'
-    if not bool(re.match(pattern, value)):
+    if not ENGINE_PATTERN.match(value):
         raise ValueError('Format for engine should be like 1.9L')
     return value
 
@@ -1,6 +1,7 @@
 from functools import lru_cache
 import os
 from pathlib import Path
+from typing import Literal
 
 from dotenv import load_dotenv
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -21,12 +22,63 @@ class Settings(BaseSettings):
     STATIC_DIR: str = os.path.join(BASE_DIR, 'app/') + 'static/'
     STATIC_URL: str
     TEST_DIR: str = os.path.join(BASE_DIR, 'tests/')
+    CAR_IMAGE_MAX_SIZE: int = 10 * 1024 * 1024
+    CAR_IMAGE_CHUNK_SIZE: int = 64 * 1024
+    CAR_IMAGE_WIDTHS: list[int] = [320, 640, 1280]
+    IMAGE_PROCESS_POOL_SIZE: int = 2
+
+    IMAGE_STORAGE: Literal['local', 's3'] = 'local'
+    S3_BUCKET: str | None = None
+    S3_ENDPOINT_URL: str | None = None
+    S3_PRESIGNED_URL_EXPIRES: int = 3600
+    S3_PUBLIC_URL: str | None = None
+    S3_MULTIPART_PART_SIZE: int = 8 * 1024 * 1024
 
     RABBITMQ_URL: str
+    RABBITMQ_CONNECTION_POOL_SIZE: int = 2
+    RABBITMQ_CHANNEL_POOL_SIZE: int = 10
     QUEUE_NAME: str
 
+    TRIP_TICK_INTERVAL: float = 1.0
+    TRIP_MESSAGES_COUNT: int = 5
+    TRIP_PUBLISH_BATCH_SIZE: int = 500
+    TRIP_MAX_PENDING_BATCHES: int = 10
+    TRIP_MAX_ACTIVE: int = 1000
+    TRIP_MESSAGE_CODEC: Literal['json', 'msgpack', 'struct'] = 'json'
+    TRIP_MESSAGES_PERSISTENT: bool = True
+    TRIP_HISTORY_FLUSH_INTERVAL: float = 1.0
+    TRIP_HISTORY_BATCH_SIZE: int = 5000
+    TRIP_HISTORY_MAX_BUFFERED_ROWS: int = 100_000
+
     GEO_SERVICE_BASE_URL: str
 
+    REDIS_HOST: str = 'localhost'
+    REDIS_PORT: int = 6379
+    REDIS_DB: int = 0
+    CAR_CACHE_TTL: int = 60
+
+    REVIEWS_PAGE_SIZE: int = 20
+
+    CAR_STATUS_IDEMPOTENCY_TTL: int = 24 * 60 * 60
+
+    SLOW_QUERY_THRESHOLD: float = 0.1
+    SLOW_QUERY_LOG_SIZE: int = 100
+    SLOW_QUERY_EXPLAIN_SAMPLE_RATE: float = 0.0
+    SLOW_QUERY_STATS_WINDOW: int = 1000
+
+    ADMIN_SECRET: str = ''
+
+    TRACING_EXPORTER: Literal['none', 'file'] = 'none'
+    TRACING_FILE: str = 'traces.jsonl'
+    TRACING_SAMPLE_RATIO: float = 1.0
+
+    PROFILING_ENABLED: bool = False
+    PROFILING_SAMPLE_RATE: float = 0.01
+    PROFILING_SECRET: str = ''
+    PROFILING_DIR: str = 'profiles'
+    PROFILING_KEEP_PER_ROUTE: int = 20
+    PROFILING_INTERVAL: float = 0.001
+
     model_config = SettingsConfigDict(case_sensitive=True, frozen=False, env_file='.env')
 
 
@@ -4,3 +4,19 @@ class NotFoundError(Exception):
 
 class SubReviewExistError(Exception):
     pass
+
+
+class TripAlreadyStartedError(Exception):
+    pass
+
+
+class TripLimitExceededError(Exception):
+    pass
+
+
+class ImageTooLargeError(Exception):
+    pass
+
+
+class UnsupportedImageTypeError(Exception):
+    pass
@@ -1,4 +1,4 @@
-from prometheus_client import Counter, Summary
+from prometheus_client import Counter, Gauge, Histogram, Summary
 
 from app.cars.schemas import CarStatusEnum
 
@@ -21,3 +21,27 @@ def update_count_car_in_state(status: CarStatusEnum, count: int):
         booked_car.labels(status).inc(count)
     else:
         other_state_car.labels('other').inc(count)
+
+
+active_trips = Gauge('trips_active', 'Simulated trips currently scheduled by the worker')
+
+trip_messages = Counter('trip_messages_published', 'Trip messages published to broker', labelnames=('result',))
+
+trip_history_rows = Counter('trip_history_rows', 'Trip positions written to history', labelnames=('result',))
+
+rabbit_open_connections = Gauge('rabbitmq_open_connections', 'Open connections to RabbitMQ')
+
+rabbit_reconnects = Counter('rabbitmq_reconnects', 'Successful reconnects to RabbitMQ')
+
+car_cache_requests = Counter('car_cache_requests', 'Car cache lookups', labelnames=('cache', 'result'))
+
+car_cache_shared_loads = Counter('car_cache_shared_loads', 'Cache misses served by a load already in flight')
+
+car_query_duration = Histogram(
+    'car_query_duration_seconds',
+    'Duration of car listing queries by the filters they combine',
+    labelnames=('shape',),
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+car_slow_queries = Counter('car_slow_queries', 'Car listing queries slower than the threshold', labelnames=('shape',))
@@ -0,0 +1,214 @@
+import asyncio
+from dataclasses import asdict
+from functools import lru_cache
+import hashlib
+import json
+import logging
+from typing import Awaitable, Callable, Iterable, TypeVar
+
+from pydantic import TypeAdapter
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.cars.schemas import CarFiltering, CarOut
+from app.config import get_settings
+from app.custom_metrics import car_cache_requests, car_cache_shared_loads
+from app.models import Car
+from app.redis_client import get_redis_client
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+VERSION_KEY = 'cars:version'
+
+_cars_adapter = TypeAdapter(list[CarOut])
+
+
+class CarCache:
+    """
+    Read-through cache of cars. Loaders return rows with the fields of CarOut, rows are cached as they are
+    since URLs of images are built for every response. Single cars are cached under car:<id> and removed on writes,
+    results of filtered queries are cached under the current version which every write bumps.
+    Concurrent misses of one key in a process share a single database query.
+    Entries expire after ttl, which also bounds staleness when a read races a write.
+    Redis errors are logged and reads fall back to the database.
+    """
+
+    def __init__(self, client: Redis, ttl: int = 60):
+        self._client = client
+        self._ttl = ttl
+        self._in_flight: dict[str, asyncio.Future] = {}
+
+    async def get_car(self, car_id: int, load: Callable[[], Awaitable[dict | None]]) -> CarOut | None:
+        key = _car_key(car_id)
+        cached = await self._get('car', key)
+        if cached is not None:
+            return CarOut.model_validate_json(cached)
+
+        async def load_and_store() -> dict | None:
+            row = await load()
+            if row is not None:
+                await self._set({key: json.dumps(row)})
+            return row
+
+        row = await self._single_flight(key, load_and_store)
+        return CarOut.model_validate(row) if row is not None else None
+
+    async def get_cars(
+            self,
+            params: CarFiltering,
+            load: Callable[[CarFiltering], Awaitable[list[dict]]],
+    ) -> list[CarOut]:
+        if params.car_ids and not any(value for name, value in asdict(params).items() if name != 'car_ids'):
+            # Lookups by ids are served from entries of single cars, so writes do not invalidate them all
+            return await self._get_cars_by_ids(params.car_ids, load)
+
+        try:
+            version = int(await self._client.get(VERSION_KEY) or 0)
+        except RedisError:
+            logger.warning('Car cache is unavailable', exc_info=True)
+            car_cache_requests.labels('query', 'error').inc()
+            return _cars_adapter.validate_python(await load(params))
+
+        key = f'cars:query:{version}:{_params_digest(params)}'
+        cached = await self._get('query', key)
+        if cached is not None:
+            return _cars_adapter.validate_json(cached)
+
+        async def load_and_store() -> list[dict]:
+            rows = await load(params)
+            await self._set({key: json.dumps(rows)})
+            return rows
+
+        return _cars_adapter.validate_python(await self._single_flight(key, load_and_store))
+
+    async def get_reviews_page(self, car_id: int, load: Callable[[], Awaitable[dict]]) -> dict:
+        """First page of reviews of a car, the one every car page loads."""
+        key = _reviews_key(car_id)
+        cached = await self._get('reviews', key)
+        if cached is not None:
+            return json.loads(cached)
+
+        async def load_and_store() -> dict:
+            page = await load()
+            await self._set({key: json.dumps(page)})
+            return page
+
+        return await self._single_flight(key, load_and_store)
+
+    async def invalidate_reviews(self, car_id: int):
+        self._in_flight.pop(_reviews_key(car_id), None)
+        try:
+            await self._client.delete(_reviews_key(car_id))
+        except RedisError:
+            logger.exception('Failed to invalidate cached reviews of car %s', car_id)
+
+    async def invalidate(self, car_ids: Iterable[int] = ()):
+        # Loads already in flight may have read rows older than the write
+        self._in_flight.clear()
+        try:
+            async with self._client.pipeline(transaction=False) as pipe:
+                pipe.incr(VERSION_KEY)
+                # Reviews of a deleted car are deleted with it
+                keys = [key for car_id in car_ids for key in (_car_key(car_id), _reviews_key(car_id))]
+                if keys:
+                    pipe.delete(*keys)
+                await pipe.execute()
+        except RedisError:
+            logger.exception('Failed to invalidate cached cars %s', list(car_ids))
+
+    async def _get_cars_by_ids(
+            self,
+            car_ids: list[int],
+            load: Callable[[CarFiltering], Awaitable[list[dict]]],
+    ) -> list[CarOut]:
+        car_ids = sorted(set(car_ids))
+        try:
+            cached = await self._client.mget([_car_key(car_id) for car_id in car_ids])
+        except RedisError:
+            logger.warning('Car cache is unavailable', exc_info=True)
+            car_cache_requests.labels('car', 'error').inc(len(car_ids))
+            return _cars_adapter.validate_python(await load(CarFiltering(car_ids=car_ids)))
+
+        cars = {
+            car_id: CarOut.model_validate_json(value) for car_id, value in zip(car_ids, cached) if value is not None
+        }
+        missing = [car_id for car_id in car_ids if car_id not in cars]
+        car_cache_requests.labels('car', 'hit').inc(len(cars))
+        car_cache_requests.labels('car', 'miss').inc(len(missing))
+
+        if missing:
+            async def load_and_store() -> list[dict]:
+                rows = await load(CarFiltering(car_ids=missing))
+                await self._set({_car_key(row['id']): json.dumps(row) for row in rows})
+                return rows
+
+            rows = await self._single_flight(f'cars:ids:{",".join(map(str, missing))}', load_and_store)
+            cars.update((car.id, car) for car in _cars_adapter.validate_python(rows))
+
+        return [cars[car_id] for car_id in car_ids if car_id in cars]
+
+    async def _get(self, cache: str, key: str) -> bytes | None:
+        try:
+            value = await self._client.get(key)
+        except RedisError:
+            logger.warning('Car cache is unavailable', exc_info=True)
+            car_cache_requests.labels(cache, 'error').inc()
+            return None
+
+        car_cache_requests.labels(cache, 'miss' if value is None else 'hit').inc()
+        return value
+
+    async def _set(self, values: dict[str, str]):
+        if not values:
+            return
+        try:
+            async with self._client.pipeline(transaction=False) as pipe:
+                for key, value in values.items():
+                    pipe.set(key, value, ex=self._ttl)
+                await pipe.execute()
+        except RedisError:
+            logger.warning('Failed to cache cars', exc_info=True)
+
+    async def _single_flight(self, key: str, load: Callable[[], Awaitable[T]]) -> T:
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(load())
+            self._in_flight[key] = future
+
+            def forget(done: asyncio.Future):
+                # The key may already belong to a load started after invalidation
+                if self._in_flight.get(key) is done:
+                    del self._in_flight[key]
+
+            future.add_done_callback(forget)
+        else:
+            car_cache_shared_loads.inc()
+        # A cancelled request must not cancel the load other requests wait for
+        return await asyncio.shield(future)
+
+
+def _car_key(car_id: int) -> str:
+    return f'car:{car_id}'
+
+
+def _reviews_key(car_id: int) -> str:
+    return f'car:{car_id}:reviews'
+
+
+def _params_digest(params: CarFiltering) -> str:
+    values = asdict(params)
+    if values['car_ids']:
+        values['car_ids'] = sorted(set(values['car_ids']))
+    return hashlib.sha1(json.dumps(values, sort_keys=True).encode()).hexdigest()
+
+
+def car_to_row(car: Car) -> dict:
+    return {name: getattr(car, name) for name in CarOut.model_fields}
+
+
+@lru_cache
+def get_car_cache() -> CarCache:
+    return CarCache(get_redis_client(), get_settings().CAR_CACHE_TTL)
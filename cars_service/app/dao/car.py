@@ -1,46 +1,97 @@
-from typing import Sequence
+from datetime import datetime, timedelta
+import os
+import shutil
+import tempfile
 
-import aiofiles
-import aiofiles.os as aio_os
 from fastapi import UploadFile
 from httpx import AsyncClient
-from sqlalchemy import delete, insert, select, update
+from PIL import UnidentifiedImageError
+from service_common.instrumentation.http import InstrumentedTransport
+from sqlalchemy import delete, exists, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 
-from app.cars.schemas import CarUpdate, CarIn, CarFiltering, CarUpdateStatus
-from app.custom_exceptions import NotFoundError
+from app.cars.schemas import CarUpdate, CarIn, CarFiltering, CarOut, CarUpdateStatus
+from app.custom_exceptions import NotFoundError, UnsupportedImageTypeError
 from app.config import get_settings
 from app.custom_metrics import update_count_car_in_state, execution_time
+from app.dao.cache import car_to_row, get_car_cache
 from app.dao.car_filter import CarQueryBuilder
-from app.models import Car
+from app.dao.slow_queries import get_slow_query_log
+from app.images.processing import create_image_variants
+from app.images.storage import get_image_name, get_image_storage
+from app.images.upload import save_upload
+from app.models import Car, CarStatusRequest
 
 
-async def get_cars(db: AsyncSession, params: CarFiltering) -> Sequence[Car]:
-    query = CarQueryBuilder(params).build_query()
-    result = await db.execute(query)
-    return result.scalars().all()
+async def get_cars(db: AsyncSession, params: CarFiltering, route: str = '') -> list[CarOut]:
+    async def load(params: CarFiltering) -> list[dict]:
+        builder = CarQueryBuilder(params)
+        result = await get_slow_query_log().execute(db, builder.build_query(), builder.shape, route)
+        return [car_to_row(car) for car in result.scalars()]
+
+    return await get_car_cache().get_cars(params, load)
 
 
 @execution_time.time()
 async def create_car(db: AsyncSession, car: CarIn, file: UploadFile) -> Car:
-    file_name = car.car_number.replace(' ', '') + '.jpg'
-    await write_car_image(get_settings().STATIC_DIR + file_name, file)
+    image = await write_car_image(file)
 
-    query = insert(Car).values(**car.model_dump(), image=get_settings().STATIC_URL + file_name).returning(Car)
+    query = insert(Car).values(**car.model_dump(), **image).returning(Car)
     result = await db.execute(query)
     result = result.scalar()
     await db.commit()
+    await get_car_cache().invalidate()
     return result
 
 
-async def write_car_image(full_path: str, file: UploadFile):
-    async with aiofiles.open(full_path, 'wb') as out_file:
-        content = await file.read()
-        await out_file.write(content)
-
-
-async def delete_car_image(full_path: str):
-    await aio_os.remove(full_path)
+async def write_car_image(file: UploadFile) -> dict:
+    """
+    Stores the uploaded image under a name derived from its content together with its downscaled variants.
+    Returns values of the image columns of Car.
+    """
+    settings = get_settings()
+    storage = get_image_storage()
+    work_dir = await run_in_threadpool(tempfile.mkdtemp, dir=storage.work_dir, prefix='.upload-')
+    try:
+        file_name = await save_upload(
+            file,
+            work_dir,
+            max_size=settings.CAR_IMAGE_MAX_SIZE,
+            chunk_size=settings.CAR_IMAGE_CHUNK_SIZE,
+        )
+        try:
+            variants = await create_image_variants(os.path.join(work_dir, file_name))
+        except (UnidentifiedImageError, OSError):
+            raise UnsupportedImageTypeError
+
+        for variant in variants:
+            await storage.store(os.path.join(work_dir, variant['file_name']), variant['file_name'])
+        # The original goes last, a car is never saved with variants missing from the storage
+        await storage.store(os.path.join(work_dir, file_name), file_name)
+    finally:
+        await run_in_threadpool(shutil.rmtree, work_dir, ignore_errors=True)
+
+    return {
+        'image': file_name,
+        'image_variants': [{'url': variant.pop('file_name'), **variant} for variant in variants],
+    }
+
+
+async def delete_car_image(db: AsyncSession, image: str | None, image_variants: list[dict]):
+    """Images are named by content, so the files are kept while another car still shows the same image."""
+    name = get_image_name(image)
+    if not name:
+        return
+    if await db.scalar(select(exists().where(Car.image.in_({image, name})))):
+        return
+
+    storage = get_image_storage()
+    for variant in image_variants:
+        if variant_name := get_image_name(variant['url']):
+            await storage.delete(variant_name)
+    await storage.delete(name)
 
 
 async def delete_car_by_id(db: AsyncSession, car_id: int) -> Car:
@@ -49,48 +100,94 @@ async def delete_car_by_id(db: AsyncSession, car_id: int) -> Car:
     await db.commit()
     car = car.scalar()
     if car:
-        filename = car.car_number + '.jpg'
-        await delete_car_image(get_settings().STATIC_DIR + filename)
+        await get_car_cache().invalidate([car_id])
+        await delete_car_image(db, car.image, car.image_variants)
         return car
     raise NotFoundError
 
 
-async def retrieve_car_by_id(db: AsyncSession, car_id: int) -> Car:
-    query = select(Car).where(Car.id == car_id)
-    result = await db.execute(query)
-    car = result.scalar()
+async def retrieve_car_by_id(db: AsyncSession, car_id: int) -> CarOut:
+    async def load() -> dict | None:
+        car = await select_car_by_id(db, car_id)
+        return car_to_row(car) if car else None
+
+    car = await get_car_cache().get_car(car_id, load)
     if car:
         return car
     raise NotFoundError
 
 
+async def select_car_by_id(db: AsyncSession, car_id: int) -> Car | None:
+    result = await db.execute(select(Car).where(Car.id == car_id))
+    return result.scalar()
+
+
 async def update_car_by_id(db: AsyncSession, car_id: int, car: CarUpdate, file: UploadFile) -> Car:
-    query = update(Car).where(Car.id == car_id).values(**car.model_dump(exclude_none=True)).returning(Car)
+    previous = (await db.execute(select(Car.image, Car.image_variants).where(Car.id == car_id))).first()
+    if previous is None:
+        raise NotFoundError
+
+    values = car.model_dump(exclude_none=True)
+    if file:
+        values.update(await write_car_image(file))
+
+    query = update(Car).where(Car.id == car_id).values(**values).returning(Car)
     result = await db.execute(query)
     await db.commit()
     db_car = result.scalar()
+    await get_car_cache().invalidate([car_id])
     update_count_car_in_state(car.status, 1)
     if db_car:
-        if file:
-            await write_car_image(get_settings().STATIC_DIR + db_car.car_number.replace(' ', '') + '.jpg', file)
+        if db_car.image != previous.image:
+            await delete_car_image(db, previous.image, previous.image_variants)
         return db_car
     raise NotFoundError
 
 
-async def update_cars_status(db: AsyncSession, car: CarUpdateStatus, car_ids: list[int]) -> list[Car]:
-    # need to check if object exists in one transaction
+async def update_cars_status(
+        db: AsyncSession,
+        car: CarUpdateStatus,
+        car_ids: list[int],
+        idempotency_key: str | None = None,
+) -> list[Car]:
+    # need to check if object exists in one transaction, the cache may be behind it
     for _id in car_ids:
-        await retrieve_car_by_id(db, _id)
+        if not await select_car_by_id(db, _id):
+            raise NotFoundError
+    if idempotency_key and not await _claim_idempotency_key(db, idempotency_key):
+        # A retry of an applied request, applying it again could overwrite a status set since
+        result = await db.execute(select(Car).where(Car.id.in_(car_ids)))
+        cars = result.scalars().all()
+        # Keeps the deletion of expired keys
+        await db.commit()
+        return cars
     update_count_car_in_state(car.status, len(car_ids))
 
     query = update(Car).where(Car.id.in_(car_ids)).values(**car.model_dump()).returning(Car)
     result = await db.execute(query)
     await db.commit()
+    await get_car_cache().invalidate(car_ids)
     return result.scalars()
 
 
+async def _claim_idempotency_key(db: AsyncSession, idempotency_key: str) -> bool:
+    """
+    Stores the key in the transaction of the update, False if it is stored already.
+    A concurrent request with the same key waits for the transaction holding it.
+    """
+    expired_before = datetime.utcnow() - timedelta(seconds=get_settings().CAR_STATUS_IDEMPOTENCY_TTL)
+    await db.execute(delete(CarStatusRequest).where(CarStatusRequest.created_at < expired_before))
+    query = (
+        pg_insert(CarStatusRequest)
+        .values(idempotency_key=idempotency_key)
+        .on_conflict_do_nothing()
+        .returning(CarStatusRequest.idempotency_key)
+    )
+    return await db.scalar(query) is not None
+
+
 async def is_car_station_exists(car_station_id: int) -> bool:
-    async with AsyncClient() as client:
+    async with AsyncClient(transport=InstrumentedTransport()) as client:
         response = await client.get(f'{get_settings().GEO_SERVICE_BASE_URL}{car_station_id}')
 
     if response.status_code == 200:
@@ -7,10 +7,17 @@ from app.models import Car
 class CarQueryBuilder:
     def __init__(self, params: CarFiltering):
         self.params = params
+        self.filters: list[str] = []
         self._query = None
 
+    @property
+    def shape(self) -> str:
+        """Filters the built query combines, queries of one shape differ only in values."""
+        return ','.join(self.filters) or 'all'
+
     def build_query(self):
         self._query = select(Car)
+        self.filters = []
         (
             self._with_car_ids()
             ._with_engine()
@@ -27,44 +34,53 @@ class CarQueryBuilder:
     def _with_car_ids(self):
         if self.params.car_ids:
             self._query = self._query.where(Car.id.in_(self.params.car_ids))
+            self.filters.append('car_ids')
         return self
 
     def _with_year_end(self):
         if self.params.year_end:
             self._query = self._query.where(Car.year <= self.params.year_end)
+            self.filters.append('year_end')
         return self
 
     def _with_year_start(self):
         if self.params.year_start:
             self._query = self._query.where(Car.year >= self.params.year_start)
+            self.filters.append('year_start')
         return self
 
     def _with_engine(self):
         if self.params.engine:
             self._query = self._query.where(Car.engine == self.params.engine)
+            self.filters.append('engine')
         return self
 
     def _with_transmission(self):
         if self.params.transmission:
             self._query = self._query.where(Car.transmission == self.params.transmission)
+            self.filters.append('transmission')
         return self
 
     def _with_car_number(self):
         if self.params.car_number:
             self._query = self._query.where(Car.car_number == self.params.car_number)
+            self.filters.append('car_number')
         return self
 
     def _with_status(self):
         if self.params.status:
             self._query = self._query.where(Car.status == self.params.status)
+            self.filters.append('status')
         return self
 
     def _with_rental_cost_start(self):
         if self.params.rental_cost_start:
             self._query = self._query.where(Car.rental_cost >= self.params.rental_cost_start)
+            self.filters.append('rental_cost_start')
         return self
 
     def _with_rental_cost_end(self):
         if self.params.rental_cost_end:
             self._query = self._query.where(Car.rental_cost <= self.params.rental_cost_end)
+            self.filters.append('rental_cost_end')
         return self
@@ -2,10 +2,12 @@ from typing import Sequence
 
 from sqlalchemy import delete, insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import aliased, joinedload
 
+from app.config import get_settings
 from app.custom_exceptions import NotFoundError, SubReviewExistError
-from app.models import Review
+from app.dao.cache import get_car_cache
+from app.models import Review, ReviewsVersion
 from app.reviews.schemas import ReviewIn, ReviewUpdate
 
 
@@ -15,11 +17,64 @@ async def get_reviews(db: AsyncSession) -> Sequence[Review]:
     return result.scalars().unique().all()
 
 
+async def get_reviews_version(db: AsyncSession) -> int:
+    """
+    Counter bumped in the same transaction as any write to reviews, so it changes exactly when they become visible.
+    The latest updated_at would miss a transaction which started earlier but committed later.
+    """
+    return await db.scalar(select(ReviewsVersion.version).where(ReviewsVersion.id == 1))
+
+
+async def get_car_reviews(db: AsyncSession, car_id: int, cursor: int | None = None, limit: int | None = None) -> dict:
+    """
+    Root reviews of the car newest first with all their replies. Pages continue after the cursor,
+    the first page of the default size is cached.
+    """
+    page_size = get_settings().REVIEWS_PAGE_SIZE
+    limit = limit or page_size
+    if cursor is None and limit == page_size:
+        return await get_car_cache().get_reviews_page(car_id, lambda: _select_car_reviews(db, car_id, None, limit))
+    return await _select_car_reviews(db, car_id, cursor, limit)
+
+
+async def _select_car_reviews(db: AsyncSession, car_id: int, cursor: int | None, limit: int) -> dict:
+    # Roots of the page and their replies of any depth are fetched in one query by a recursive CTE
+    roots = (
+        select(Review.id, Review.comment, Review.stars, Review.car_id, Review.parent_id)
+        .where(Review.car_id == car_id, Review.parent_id.is_(None))
+        .order_by(Review.id.desc())
+        .limit(limit + 1)
+    )
+    if cursor is not None:
+        roots = roots.where(Review.id < cursor)
+
+    tree = select(roots.subquery()).cte('tree', recursive=True)
+    reply = aliased(Review)
+    tree = tree.union_all(
+        select(reply.id, reply.comment, reply.stars, reply.car_id, reply.parent_id)
+        .join(tree, reply.parent_id == tree.c.id)
+    )
+    result = await db.execute(select(tree).order_by(tree.c.id))
+
+    reviews = {row['id']: {**row, 'sub_reviews': []} for row in result.mappings()}
+    page = []
+    for review in reviews.values():
+        if review['parent_id'] is None:
+            page.append(review)
+        else:
+            reviews[review['parent_id']]['sub_reviews'].append(review)
+    page.reverse()
+
+    next_cursor = page[limit - 1]['id'] if len(page) > limit else None
+    return {'items': page[:limit], 'next_cursor': next_cursor}
+
+
 async def create_review(db: AsyncSession, item: ReviewIn) -> Review:
     query = insert(Review).values(**item.model_dump(exclude_unset=True)).returning(Review)
     result = await db.execute(query)
     review = result.scalar()
     await db.commit()
+    await get_car_cache().invalidate_reviews(review.car_id)
     return await _retrieve_review(db, review.id)
 
 
@@ -31,6 +86,7 @@ async def delete_review_by_id(db: AsyncSession, review_id: int):
     query = delete(Review).where(Review.id == review_id)
     await db.execute(query)
     await db.commit()
+    await get_car_cache().invalidate_reviews(review.car_id)
 
 
 async def _retrieve_review(db: AsyncSession, review_id: int) -> Review:
@@ -55,4 +111,5 @@ async def update_review_by_id(db: AsyncSession, review_id: int, review_data: Rev
         raise NotFoundError
 
     await db.commit()
+    await get_car_cache().invalidate_reviews(review.car_id)
     return await _retrieve_review(db, review.id)
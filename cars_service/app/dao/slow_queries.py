@@ -0,0 +1,124 @@
+"""
+Slow query log of car listings. Queries of CarQueryBuilder are timed by their shape, the filters they combine,
+so a slow combination stands out whatever its values. Queries over the threshold are kept with their bound
+parameters and route, a sample of them with the plan of EXPLAIN (ANALYZE, BUFFERS) run right after them.
+"""
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import lru_cache
+import logging
+import math
+import random
+import time
+from typing import Annotated, Any
+
+from fastapi import Depends
+from sqlalchemy import Result, Select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.custom_metrics import car_query_duration, car_slow_queries
+
+
+logger = logging.getLogger(__name__)
+
+EXPLAIN = 'EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) '
+
+
+@dataclass
+class SlowQuery:
+    shape: str
+    route: str
+    params: dict[str, Any]
+    duration: float
+    recorded_at: datetime
+    plan: list | None = None
+
+
+class QueryShapeStats:
+    """Count and total of all queries of a shape, the percentile of the latest window of them."""
+
+    def __init__(self, shape: str, window: int):
+        self.shape = shape
+        self.count = 0
+        self.total = 0.0
+        self.slow = 0
+        self._durations: deque[float] = deque(maxlen=window)
+
+    def add(self, duration: float, slow: bool):
+        self.count += 1
+        self.total += duration
+        self.slow += slow
+        self._durations.append(duration)
+
+    @property
+    def p95(self) -> float:
+        durations = sorted(self._durations)
+        return durations[max(0, math.ceil(0.95 * len(durations)) - 1)] if durations else 0.0
+
+
+class SlowQueryLog:
+    def __init__(self, threshold: float, size: int, explain_sample_rate: float, window: int):
+        self._threshold = threshold
+        self._explain_sample_rate = explain_sample_rate
+        self._window = window
+        self._slow_queries: deque[SlowQuery] = deque(maxlen=size)
+        self._stats: dict[str, QueryShapeStats] = {}
+
+    async def execute(self, db: AsyncSession, query: Select, shape: str, route: str) -> Result:
+        started = time.perf_counter()
+        result = await db.execute(query)
+        duration = time.perf_counter() - started
+
+        slow = duration >= self._threshold
+        car_query_duration.labels(shape).observe(duration)
+        if shape not in self._stats:
+            self._stats[shape] = QueryShapeStats(shape, self._window)
+        self._stats[shape].add(duration, slow)
+        if slow:
+            car_slow_queries.labels(shape).inc()
+            await self._record(db, query, shape, route, duration)
+        return result
+
+    def stats(self) -> list[QueryShapeStats]:
+        """Shapes taking the most time in total first."""
+        return sorted(self._stats.values(), key=lambda stats: stats.total, reverse=True)
+
+    def slow_queries(self) -> list[SlowQuery]:
+        """Newest first."""
+        return list(reversed(self._slow_queries))
+
+    async def _record(self, db: AsyncSession, query: Select, shape: str, route: str, duration: float):
+        connection = await db.connection()
+        # Values of IN are rendered as separate parameters, so the statement runs as is for EXPLAIN
+        compiled = query.compile(dialect=connection.dialect, compile_kwargs={'render_postcompile': True})
+        slow_query = SlowQuery(shape, route, compiled.params, duration, datetime.now(timezone.utc))
+        self._slow_queries.append(slow_query)
+        # Parameters are user input, they are kept out of logs and served only by the admin endpoint
+        logger.warning('Slow car query %s on %s took %.3fs', shape, route, duration)
+
+        if random.random() >= self._explain_sample_rate:
+            return
+        try:
+            # ANALYZE runs the query again, a savepoint keeps the transaction usable if EXPLAIN fails
+            async with db.begin_nested():
+                explain = await connection.exec_driver_sql(EXPLAIN + str(compiled), compiled.params)
+                slow_query.plan = explain.scalar()
+        except SQLAlchemyError:
+            logger.warning('Failed to explain slow car query %s', shape, exc_info=True)
+
+
+@lru_cache
+def get_slow_query_log() -> SlowQueryLog:
+    settings = get_settings()
+    return SlowQueryLog(
+        settings.SLOW_QUERY_THRESHOLD,
+        settings.SLOW_QUERY_LOG_SIZE,
+        settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE,
+        settings.SLOW_QUERY_STATS_WINDOW,
+    )
+
+
+slow_query_log_dependency = Annotated[SlowQueryLog, Depends(get_slow_query_log)]
@@ -0,0 +1,34 @@
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import TripPosition
+from app.trip.downsampling import downsample
+from app.trip.schemas import TripHistoryOut
+
+
+async def get_trip_history(
+        db: AsyncSession,
+        car_number: str,
+        date_from: datetime,
+        date_to: datetime,
+        max_points: int,
+) -> TripHistoryOut:
+    # Range condition on recorded_at lets the planner skip partitions of other days
+    query = (
+        select(TripPosition.latitude, TripPosition.longitude, TripPosition.recorded_at)
+        .where(
+            TripPosition.car_number == car_number,
+            TripPosition.recorded_at >= date_from,
+            TripPosition.recorded_at <= date_to,
+        )
+        .order_by(TripPosition.recorded_at)
+    )
+    result = await db.execute(query)
+    points = result.all()
+    return TripHistoryOut(
+        car_number=car_number,
+        total_points=len(points),
+        points=[point._asdict() for point in downsample(points, max_points)],
+    )
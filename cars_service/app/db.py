@@ -1,11 +1,24 @@
-from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession, create_async_engine
+from functools import lru_cache
+
+from service_common.instrumentation.sql import instrument_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncEngine, AsyncSession, create_async_engine
 
 from app.config import get_settings
 
 
 async def get_session() -> AsyncSession:
-    settings = get_settings()
-    engine = create_async_engine(settings.DATABASE_URL, echo=True, future=True)
-    async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
-    async with async_session() as session:
+    async with get_sessionmaker()() as session:
         yield session
+
+
+@lru_cache
+def get_engine() -> AsyncEngine:
+    """Shared by request sessions and background writers, its pool and query metrics outlive a request."""
+    engine = create_async_engine(get_settings().DATABASE_URL)
+    instrument_engine(engine)
+    return engine
+
+
+@lru_cache
+def get_sessionmaker() -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(get_engine(), class_=AsyncSession, expire_on_commit=False)
@@ -0,0 +1,45 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+import logging
+import sys
+
+from sqlalchemy import select
+
+from app.db import get_engine
+from app.images.static import CONTENT_ADDRESSED_NAME
+from app.images.storage import get_image_name, get_image_storage
+from app.models import Car
+
+
+logger = logging.getLogger(__name__)
+
+
+async def remove_orphaned_images(grace_period: timedelta = timedelta(hours=1)) -> list[str]:
+    """
+    Removes content addressed images no car refers to, e.g. left by an upload whose car was never saved.
+    Recent images are kept, their car may still be in the middle of being created.
+    """
+    async with get_engine().connect() as conn:
+        result = await conn.execute(select(Car.image, Car.image_variants))
+        referenced = set()
+        for image, variants in result:
+            referenced.add(get_image_name(image))
+            referenced.update(get_image_name(variant['url']) for variant in variants)
+
+    storage = get_image_storage()
+    threshold = datetime.now(timezone.utc) - grace_period
+    removed = []
+    for name, modified_at in await storage.list_images():
+        if not CONTENT_ADDRESSED_NAME.match(name) or name in referenced or modified_at > threshold:
+            continue
+        await storage.delete(name)
+        removed.append(name)
+
+    logger.info('Removed %s orphaned images', len(removed))
+    return removed
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    hours = float(sys.argv[1]) if len(sys.argv) > 1 else 1
+    asyncio.run(remove_orphaned_images(timedelta(hours=hours)))
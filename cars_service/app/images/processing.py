@@ -0,0 +1,56 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+import os
+from typing import Sequence
+
+from PIL import Image, ImageOps
+
+from app.config import get_settings
+
+
+# Pillow format, extension and encoder options of every rendered derivative
+_FORMATS = (
+    ('WEBP', '.webp', {'quality': 80, 'method': 4}),
+    ('JPEG', '.jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+)
+
+
+@lru_cache
+def get_process_pool() -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(max_workers=get_settings().IMAGE_PROCESS_POOL_SIZE)
+
+
+def render_variants(source: str, widths: Sequence[int]) -> list[dict]:
+    """
+    Renders downscaled copies of the image next to it, runs in a worker process.
+    Widths not smaller than the original are skipped, images are never upscaled.
+    """
+    directory, file_name = os.path.split(source)
+    stem = os.path.splitext(file_name)[0]
+    variants = []
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original).convert('RGB')
+
+    for width in sorted(widths):
+        if width >= image.width:
+            break
+        resized = image.resize((width, round(image.height * width / image.width)), Image.Resampling.LANCZOS)
+        for image_format, extension, options in _FORMATS:
+            variant_name = f'{stem}-{width}w{extension}'
+            temp_path = os.path.join(directory, f'.{variant_name}')
+            resized.save(temp_path, image_format, **options)
+            os.replace(temp_path, os.path.join(directory, variant_name))
+            variants.append({'file_name': variant_name, 'width': width, 'format': image_format.lower()})
+    return variants
+
+
+async def create_image_variants(source: str) -> list[dict]:
+    """Resizing is CPU bound, it is done in the process pool to keep the event loop responsive."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_process_pool(),
+        render_variants,
+        source,
+        get_settings().CAR_IMAGE_WIDTHS,
+    )
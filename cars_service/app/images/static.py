@@ -0,0 +1,142 @@
+from mimetypes import guess_type
+import os
+import re
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Receive, Scope, Send
+
+from app.images.storage import IMMUTABLE_CACHE_CONTROL
+
+
+# Uploads and their variants are named after the content hash, so such a URL never changes its content
+CONTENT_ADDRESSED_NAME = re.compile(r'^[0-9a-f]{32}(-\d+w)?\.(jpg|png|webp)$')
+_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+REVALIDATE_CACHE_CONTROL = 'public, no-cache'
+
+
+class ImmutableStaticFiles(StaticFiles):
+    """
+    Serves content addressed images with a year long immutable Cache-Control and a strong ETag built from the name.
+    Other files must be revalidated. If-None-Match and single byte ranges are supported for both.
+    """
+
+    def file_response(
+            self,
+            full_path: str | os.PathLike,
+            stat_result: os.stat_result,
+            scope: Scope,
+            status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        file_name = os.path.basename(full_path)
+        if CONTENT_ADDRESSED_NAME.match(file_name):
+            etag = f'"{file_name}"'
+            cache_control = IMMUTABLE_CACHE_CONTROL
+        else:
+            etag = f'"{int(stat_result.st_mtime)}-{stat_result.st_size}"'
+            cache_control = REVALIDATE_CACHE_CONTROL
+        headers = {'etag': etag, 'cache-control': cache_control, 'accept-ranges': 'bytes'}
+
+        if _etag_matches(request_headers.get('if-none-match'), etag):
+            return Response(status_code=304, headers=headers)
+
+        byte_range = _parse_range(request_headers, etag, stat_result.st_size)
+        if byte_range is None:
+            return FileResponse(
+                full_path,
+                status_code=status_code,
+                headers=headers,
+                stat_result=stat_result,
+                method=scope['method'],
+            )
+        if byte_range == ():
+            return Response(status_code=416, headers={**headers, 'content-range': f'bytes */{stat_result.st_size}'})
+
+        start, end = byte_range
+        return FileRangeResponse(full_path, start, end, stat_result, headers, scope['method'])
+
+
+class FileRangeResponse(Response):
+    chunk_size = 64 * 1024
+
+    def __init__(
+            self,
+            path: str | os.PathLike,
+            start: int,
+            end: int,
+            stat_result: os.stat_result,
+            headers: dict[str, str],
+            method: str,
+    ):
+        self.path = path
+        self.start = start
+        self.end = end
+        self.send_body = method.upper() != 'HEAD'
+        self.status_code = 206
+        self.background = None
+        self.media_type = guess_type(str(path))[0] or 'application/octet-stream'
+        self.init_headers({
+            **headers,
+            'content-type': self.media_type,
+            'content-length': str(end - start + 1),
+            'content-range': f'bytes {start}-{end}/{stat_result.st_size}',
+        })
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({'type': 'http.response.start', 'status': self.status_code, 'headers': self.raw_headers})
+        if not self.send_body:
+            await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+            return
+
+        remaining = self.end - self.start + 1
+        async with await anyio.open_file(self.path, mode='rb') as file:
+            await file.seek(self.start)
+            while remaining > 0:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                remaining -= len(chunk)
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': remaining > 0 and bool(chunk)})
+                if not chunk:
+                    break
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+    return '*' in tags or etag in tags
+
+
+def _parse_range(request_headers: Headers, etag: str, size: int) -> tuple[int, ...] | None:
+    """
+    Returns None when the whole file should be sent, an empty tuple when the range can not be satisfied
+    and first and last byte positions otherwise. Multiple ranges are answered with the whole file.
+    """
+    header = request_headers.get('range')
+    if not header:
+        return None
+    if_range = request_headers.get('if-range')
+    if if_range and if_range != etag:
+        return None
+
+    match = _RANGE.match(header.strip())
+    if match is None:
+        return None
+
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        suffix = int(last)
+        if suffix == 0:
+            return ()
+        return max(0, size - suffix), size - 1
+
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return ()
+    return start, end
@@ -0,0 +1,170 @@
+from datetime import datetime, timezone
+from functools import lru_cache
+from mimetypes import guess_type
+import os
+import tempfile
+import time
+from typing import Protocol
+
+import aiofiles.os as aio_os
+import boto3
+from boto3.s3.transfer import TransferConfig
+from starlette.concurrency import run_in_threadpool
+
+from app.config import get_settings
+
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+class ImageStorage(Protocol):
+    # Uploads are staged here before they are stored
+    work_dir: str
+
+    async def store(self, path: str, name: str):
+        """Takes over the staged file at path and stores it under name."""
+
+    async def delete(self, name: str):
+        """Missing images are ignored."""
+
+    async def list_images(self) -> list[tuple[str, datetime]]:
+        """Names of stored images with their modification time."""
+
+    def url(self, name: str) -> str:
+        ...
+
+
+class LocalImageStorage:
+    """Images are kept in STATIC_DIR and served by the app itself."""
+
+    def __init__(self, directory: str, base_url: str):
+        self.work_dir = directory
+        self._directory = directory
+        self._base_url = base_url
+
+    async def store(self, path: str, name: str):
+        await aio_os.replace(path, os.path.join(self._directory, name))
+
+    async def delete(self, name: str):
+        try:
+            await aio_os.remove(os.path.join(self._directory, name))
+        except FileNotFoundError:
+            pass
+
+    async def list_images(self) -> list[tuple[str, datetime]]:
+        return await run_in_threadpool(self._list)
+
+    def url(self, name: str) -> str:
+        return self._base_url + name
+
+    def _list(self) -> list[tuple[str, datetime]]:
+        return [
+            (entry.name, datetime.fromtimestamp(entry.stat().st_mtime, timezone.utc))
+            for entry in os.scandir(self._directory)
+            if entry.is_file()
+        ]
+
+
+class S3ImageStorage:
+    """
+    Images are kept in an S3 compatible bucket, so any number of replicas can accept uploads.
+    Large files are uploaded in parts. Clients download them from public_url, a CDN or a public bucket,
+    when it is set, otherwise by presigned URLs. A signed URL is reused for the first half of its lifetime,
+    so responses listing the same cars do not sign every image again and clients can cache the images.
+    """
+
+    def __init__(
+            self,
+            client,
+            bucket: str,
+            url_expires: int = 3600,
+            part_size: int = 8 * 1024 * 1024,
+            public_url: str | None = None,
+    ):
+        self.work_dir = tempfile.gettempdir()
+        self._client = client
+        self._bucket = bucket
+        self._url_expires = url_expires
+        self._public_url = public_url
+        self._signed_urls: dict[str, tuple[str, float]] = {}
+        self._transfer_config = TransferConfig(multipart_threshold=part_size, multipart_chunksize=part_size)
+
+    async def store(self, path: str, name: str):
+        try:
+            await run_in_threadpool(
+                self._client.upload_file,
+                path,
+                self._bucket,
+                name,
+                ExtraArgs={
+                    'ContentType': guess_type(name)[0] or 'application/octet-stream',
+                    'CacheControl': IMMUTABLE_CACHE_CONTROL,
+                },
+                Config=self._transfer_config,
+            )
+        finally:
+            await aio_os.remove(path)
+
+    async def delete(self, name: str):
+        self._signed_urls.pop(name, None)
+        await run_in_threadpool(self._client.delete_object, Bucket=self._bucket, Key=name)
+
+    async def list_images(self) -> list[tuple[str, datetime]]:
+        return await run_in_threadpool(self._list)
+
+    def url(self, name: str) -> str:
+        if self._public_url:
+            return self._public_url + name
+
+        now = time.monotonic()
+        url, refresh_at = self._signed_urls.get(name, (None, now))
+        if url is None or now >= refresh_at:
+            # Signing is done locally, no request to the storage is made
+            url = self._client.generate_presigned_url(
+                'get_object',
+                Params={'Bucket': self._bucket, 'Key': name},
+                ExpiresIn=self._url_expires,
+            )
+            self._signed_urls[name] = (url, now + self._url_expires / 2)
+        return url
+
+    def _list(self) -> list[tuple[str, datetime]]:
+        paginator = self._client.get_paginator('list_objects_v2')
+        return [
+            (item['Key'], item['LastModified'])
+            for page in paginator.paginate(Bucket=self._bucket)
+            for item in page.get('Contents', [])
+        ]
+
+
+@lru_cache
+def get_image_storage() -> ImageStorage:
+    settings = get_settings()
+    if settings.IMAGE_STORAGE == 's3':
+        client = boto3.client('s3', endpoint_url=settings.S3_ENDPOINT_URL)
+        return S3ImageStorage(
+            client,
+            settings.S3_BUCKET,
+            url_expires=settings.S3_PRESIGNED_URL_EXPIRES,
+            part_size=settings.S3_MULTIPART_PART_SIZE,
+            public_url=settings.S3_PUBLIC_URL,
+        )
+    return LocalImageStorage(settings.STATIC_DIR, settings.STATIC_URL)
+
+
+def get_image_name(image: str | None) -> str | None:
+    """
+    Cars store names of images in the storage. Older rows keep full URLs of files in STATIC_DIR,
+    any other URL does not belong to the storage.
+    """
+    if not image or '://' not in image:
+        return image
+
+    static_url = get_settings().STATIC_URL
+    return image.removeprefix(static_url) if image.startswith(static_url) else None
+
+
+def get_image_url(image: str | None) -> str | None:
+    if not image or '://' in image:
+        return image
+    return get_image_storage().url(image)
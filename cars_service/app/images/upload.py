@@ -0,0 +1,56 @@
+import hashlib
+import os
+
+import aiofiles
+import aiofiles.os as aio_os
+from fastapi import UploadFile
+
+from app.custom_exceptions import ImageTooLargeError, UnsupportedImageTypeError
+
+
+# Magic bytes of accepted images and extensions they are stored with
+_SIGNATURES = (
+    (b'\xff\xd8\xff', '.jpg'),
+    (b'\x89PNG\r\n\x1a\n', '.png'),
+)
+
+
+def sniff_image_extension(head: bytes) -> str:
+    """Detects image type by content, the content type sent by the client is not trusted."""
+    for signature, extension in _SIGNATURES:
+        if head.startswith(signature):
+            return extension
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return '.webp'
+    raise UnsupportedImageTypeError
+
+
+async def save_upload(file: UploadFile, directory: str, max_size: int, chunk_size: int) -> str:
+    """
+    Streams the upload to a temporary file chunk by chunk and renames it to a name derived from its content,
+    so a reader never sees a partially written image. Returns the file name.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    extension = None
+    async with aiofiles.tempfile.NamedTemporaryFile('wb', dir=directory, prefix='.upload-', delete=False) as out_file:
+        try:
+            while chunk := await file.read(chunk_size):
+                size += len(chunk)
+                if size > max_size:
+                    raise ImageTooLargeError
+                if extension is None:
+                    extension = sniff_image_extension(chunk)
+                digest.update(chunk)
+                await out_file.write(chunk)
+
+            if extension is None:
+                raise UnsupportedImageTypeError
+        except BaseException:
+            await out_file.close()
+            await aio_os.remove(out_file.name)
+            raise
+
+    file_name = digest.hexdigest()[:32] + extension
+    await aio_os.replace(out_file.name, os.path.join(directory, file_name))
+    return file_name
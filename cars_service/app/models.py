@@ -1,7 +1,7 @@
 from datetime import datetime
 
-from sqlalchemy import DateTime, ForeignKey, func, Integer, String, Text
-from sqlalchemy.dialects.postgresql import ENUM
+from sqlalchemy import BigInteger, DateTime, Float, ForeignKey, func, Index, Integer, String, Text
+from sqlalchemy.dialects.postgresql import ENUM, JSONB
 from sqlalchemy.orm import backref, DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -32,7 +32,8 @@ class Car(Base, CommonFieldsMixin):
         ENUM('active', 'broken', 'repairing', 'busy', name='status_car'),
         nullable=False,
     )
-    image: Mapped[str] = mapped_column(String(64), nullable=True)
+    image: Mapped[str] = mapped_column(String(255), nullable=True)
+    image_variants: Mapped[list[dict]] = mapped_column(JSONB, server_default='[]', nullable=False)
     rental_cost: Mapped[int] = mapped_column(Integer, nullable=False)
     car_station_id: Mapped[int] = mapped_column(Integer, nullable=True)
 
@@ -43,13 +44,45 @@ class Car(Base, CommonFieldsMixin):
 class Review(Base, CommonFieldsMixin):
     # https://docs.sqlalchemy.org/en/20/orm/join_conditions.html#handling-multiple-join-pathsselfjoin
     __tablename__ = 'reviews'
+    # Serves pages of reviews of a car ordered by id
+    __table_args__ = (Index('ix_reviews_car_id_id', 'car_id', 'id'),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     comment: Mapped[str] = mapped_column(Text)
     stars: Mapped[int] = mapped_column(Integer)
     car_id: Mapped[int] = mapped_column(Integer, ForeignKey('cars.id', ondelete='CASCADE'))
-    parent_id: Mapped[int] = mapped_column(Integer, ForeignKey('reviews.id'), nullable=True)
+    parent_id: Mapped[int] = mapped_column(Integer, ForeignKey('reviews.id'), index=True, nullable=True)
     sub_reviews: Mapped[list['Review']] = relationship('Review', backref=backref('parent', remote_side='Review.id'))
 
     def __str__(self):
         return f'{self.comment} - {self.stars}'
+
+
+class ReviewsVersion(Base):
+    """Single row bumped by a trigger on every statement writing reviews."""
+    __tablename__ = 'reviews_version'
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    version: Mapped[int] = mapped_column(BigInteger, server_default='0', nullable=False)
+
+
+class TripPosition(Base):
+    """Raw trip telemetry, the table is partitioned by day of recorded_at."""
+    __tablename__ = 'trip_positions'
+    __table_args__ = {'postgresql_partition_by': 'RANGE (recorded_at)'}
+
+    car_number: Mapped[str] = mapped_column(String(16), primary_key=True)
+    recorded_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    latitude: Mapped[float] = mapped_column(Float, nullable=False)
+    longitude: Mapped[float] = mapped_column(Float, nullable=False)
+
+    def __str__(self):
+        return f'{self.car_number} - {self.recorded_at}'
+
+
+class CarStatusRequest(Base):
+    """Idempotency key of an applied car status request, a retry of the request is not applied again."""
+    __tablename__ = 'car_status_requests'
+
+    idempotency_key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), index=True, nullable=False)
@@ -0,0 +1,11 @@
+from functools import lru_cache
+
+from service_common.instrumentation.redis import InstrumentedRedis
+
+from app.config import get_settings
+
+
+@lru_cache
+def get_redis_client() -> InstrumentedRedis:
+    settings = get_settings()
+    return InstrumentedRedis(host=settings.REDIS_HOST, port=settings.REDIS_PORT, db=settings.REDIS_DB)
@@ -1,17 +1,21 @@
-from fastapi import APIRouter, HTTPException, Response
+from fastapi import APIRouter, HTTPException, Request, Response
+from service_common.etag import check_etag, ETagRoute
+from service_common.serialization import model_response
 
 from app.common.dependency import db_dependency
 from app.custom_exceptions import SubReviewExistError, NotFoundError
-from app.dao.reviews import create_review, delete_review_by_id, get_reviews, update_review_by_id
+from app.dao.reviews import create_review, delete_review_by_id, get_reviews, get_reviews_version, update_review_by_id
 from app.reviews.schemas import ReviewOut, ReviewIn, ReviewUpdate
 
 
-router = APIRouter(prefix='/reviews', tags=['Review'])
+router = APIRouter(prefix='/reviews', tags=['Review'], route_class=ETagRoute)
 
 
 @router.get('/', response_model=list[ReviewOut])
-async def get_all_reviews(db: db_dependency):
-    return await get_reviews(db)
+async def get_all_reviews(db: db_dependency, request: Request, response: Response):
+    if unchanged := check_etag(request, response, await get_reviews_version(db)):
+        return unchanged
+    return model_response(list[ReviewOut], await get_reviews(db))
 
 
 @router.post('/', response_model=ReviewOut, status_code=201)
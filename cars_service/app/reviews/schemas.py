@@ -15,6 +15,11 @@ class ReviewOut(BaseReview):
     sub_reviews: list['ReviewOut']
 
 
+class ReviewPageOut(BaseModel):
+    items: list[ReviewOut]
+    next_cursor: int | None = None
+
+
 class ReviewIn(BaseReview):
     car_id: int
     stars: int = Field(ge=0, le=10)
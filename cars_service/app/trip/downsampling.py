@@ -0,0 +1,52 @@
+import heapq
+import math
+from typing import Sequence, TypeVar
+
+
+T = TypeVar('T')
+
+
+def downsample(points: Sequence[T], max_points: int) -> list[T]:
+    """
+    Douglas-Peucker simplification bounded by number of points instead of tolerance.
+    Segments are split on their farthest point, the farthest overall first, until max_points are kept.
+    Points must have latitude and longitude attributes.
+    """
+    if len(points) <= max_points:
+        return list(points)
+
+    last = len(points) - 1
+    kept = {0, last}
+    segments = []
+    _push_segment(segments, points, 0, last)
+    while segments and len(kept) < max_points:
+        _, start, end, farthest = heapq.heappop(segments)
+        kept.add(farthest)
+        _push_segment(segments, points, start, farthest)
+        _push_segment(segments, points, farthest, end)
+
+    return [points[index] for index in sorted(kept)]
+
+
+def _push_segment(segments: list, points: Sequence, start: int, end: int):
+    if end - start < 2:
+        return
+
+    farthest, max_distance = start + 1, -1.0
+    for index in range(start + 1, end):
+        distance = _distance_to_segment(points[index], points[start], points[end])
+        if distance > max_distance:
+            farthest, max_distance = index, distance
+    heapq.heappush(segments, (-max_distance, start, end, farthest))
+
+
+def _distance_to_segment(point, start, end) -> float:
+    """Planar distance in degrees, good enough to rank points of one trip."""
+    dx, dy = end.longitude - start.longitude, end.latitude - start.latitude
+    px, py = point.longitude - start.longitude, point.latitude - start.latitude
+    length = dx * dx + dy * dy
+    if length == 0:
+        return math.hypot(px, py)
+
+    ratio = max(0.0, min(1.0, (px * dx + py * dy) / length))
+    return math.hypot(px - ratio * dx, py - ratio * dy)
@@ -0,0 +1,112 @@
+import asyncio
+from contextlib import suppress
+from datetime import date, datetime, time, timedelta, timezone
+import logging
+
+import psycopg
+from service_common.coordinates import CoordinateMessage
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.custom_metrics import trip_history_rows
+
+
+logger = logging.getLogger(__name__)
+
+
+class TripHistoryWriter:
+    """
+    Appends published trip positions to the day partitioned trip_positions table.
+    Rows are buffered and written with a single COPY per flush, partitions of new days are created on the way.
+    A batch with a row the database rejects is split until the row is isolated and dropped. Rows of a flush
+    failing otherwise are kept for the next one, the oldest are dropped past max_buffered_rows.
+    """
+
+    def __init__(
+            self,
+            engine: AsyncEngine,
+            flush_interval: float = 1.0,
+            batch_size: int = 5000,
+            max_buffered_rows: int = 100_000,
+    ):
+        self._engine = engine
+        self._flush_interval = flush_interval
+        self._batch_size = batch_size
+        self._max_buffered_rows = max_buffered_rows
+        self._rows: list[tuple[str, float, float, datetime]] = []
+        self._partitions: set[date] = set()
+        self._full = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def add(self, messages: list[CoordinateMessage], recorded_at: datetime):
+        self._rows.extend((msg.car_number, msg.latitude, msg.longitude, recorded_at) for msg in messages)
+        if len(self._rows) >= self._batch_size:
+            self._full.set()
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        await self.flush()
+
+    async def flush(self):
+        rows, self._rows = self._rows, []
+        pending = [rows] if rows else []
+        while pending:
+            batch = pending.pop()
+            try:
+                await self._copy(batch)
+            except (psycopg.DataError, psycopg.IntegrityError):
+                if len(batch) == 1:
+                    trip_history_rows.labels('rejected').inc()
+                    logger.warning('Trip position %s rejected by the database', batch[0], exc_info=True)
+                    continue
+                middle = len(batch) // 2
+                pending.extend((batch[middle:], batch[:middle]))
+            except Exception:
+                unstored = [row for rest in (batch, *reversed(pending)) for row in rest]
+                self._rows = (unstored + self._rows)[-self._max_buffered_rows:]
+                raise
+            else:
+                trip_history_rows.labels('stored').inc(len(batch))
+
+    async def _copy(self, rows: list[tuple[str, float, float, datetime]]):
+        days = {row[3].astimezone(timezone.utc).date() for row in rows} - self._partitions
+        # The COPY runs on the driver connection, only a transaction begun here makes the commit reach it
+        async with self._engine.begin() as conn:
+            for day in days:
+                await conn.execute(text(_create_partition_sql(day)))
+
+            raw_connection = await conn.get_raw_connection()
+            async with raw_connection.driver_connection.cursor() as cursor:
+                async with cursor.copy(
+                    'COPY trip_positions (car_number, latitude, longitude, recorded_at) FROM STDIN',
+                ) as copy:
+                    for row in rows:
+                        await copy.write_row(row)
+        # Partitions are created in the transaction of the COPY, they are known once it is committed
+        self._partitions.update(days)
+
+    async def _run(self):
+        while True:
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._full.wait(), self._flush_interval)
+            self._full.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception('Failed to store trip history')
+
+
+def _create_partition_sql(day: date) -> str:
+    start = datetime.combine(day, time(), timezone.utc)
+    end = start + timedelta(days=1)
+    return (
+        f'CREATE TABLE IF NOT EXISTS trip_positions_{day:%Y%m%d} PARTITION OF trip_positions '
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    )
@@ -1,13 +1,73 @@
-from fastapi import APIRouter, BackgroundTasks
+from datetime import datetime, timedelta, timezone
+from typing import Annotated
 
-from app.rabbit_connection import rabbit_dependency
-from app.trip.tasks import start_trip
+from fastapi import APIRouter, HTTPException, Query, Response
+
+from app.cars.schemas import CAR_NUMBER_PATTERN
+from app.common.dependency import db_dependency
+from app.custom_exceptions import NotFoundError, TripAlreadyStartedError, TripLimitExceededError
+from app.dao.trip import get_trip_history
+from app.trip.schemas import TripHistoryOut, TripStatusOut
+from app.trip.tasks import trip_scheduler_dependency
 
 
 router = APIRouter(prefix='/trip', tags=['Trip'])
 
 
 @router.post('/')
-async def start_new_trip(car_number: str, task: BackgroundTasks,  rabbit_pool: rabbit_dependency):
-    task.add_task(start_trip, car_number, rabbit_pool)
+async def start_new_trip(
+        car_number: Annotated[str, Query(pattern=CAR_NUMBER_PATTERN.pattern)],
+        scheduler: trip_scheduler_dependency,
+):
+    """Car numbers are checked like those of cars, trip messages carry them in a fixed size field."""
+    try:
+        scheduler.add_trip(car_number)
+    except TripAlreadyStartedError:
+        raise HTTPException(status_code=409, detail='Trip for this car is already started')
+    except TripLimitExceededError:
+        raise HTTPException(status_code=429, detail='Too many active trips, try later')
     return {'message': f'Start trip for car {car_number}'}
+
+
+@router.get('/', response_model=list[TripStatusOut])
+async def get_active_trips(scheduler: trip_scheduler_dependency):
+    return scheduler.list_trips()
+
+
+@router.get('/{car_number}', response_model=TripStatusOut)
+async def get_trip_status(car_number: str, scheduler: trip_scheduler_dependency):
+    try:
+        return scheduler.get_trip(car_number)
+    except NotFoundError:
+        raise HTTPException(status_code=404, detail='Trip not found')
+
+
+@router.delete('/{car_number}', response_class=Response, status_code=204)
+async def stop_trip(car_number: str, scheduler: trip_scheduler_dependency):
+    try:
+        scheduler.cancel_trip(car_number)
+    except NotFoundError:
+        raise HTTPException(status_code=404, detail='Trip not found')
+
+
+@router.get('/{car_number}/history', response_model=TripHistoryOut)
+async def trip_history(
+        car_number: str,
+        db: db_dependency,
+        date_from: Annotated[datetime | None, Query(alias='from')] = None,
+        date_to: Annotated[datetime | None, Query(alias='to')] = None,
+        max_points: Annotated[int, Query(ge=2, le=10000)] = 500,
+):
+    """
+    Positions of the car for the period, last day by default, simplified down to max_points.
+    Dates without a timezone are taken as UTC.
+    """
+    date_to = _as_utc(date_to) if date_to else datetime.now(timezone.utc)
+    date_from = _as_utc(date_from) if date_from else date_to - timedelta(days=1)
+    if date_from > date_to:
+        raise HTTPException(status_code=422, detail='Date from can not be higher than date to')
+    return await get_trip_history(db, car_number, date_from, date_to, max_points)
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
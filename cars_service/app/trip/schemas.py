@@ -1,7 +1,21 @@
+from datetime import datetime
+
 from pydantic import BaseModel
 
 
-class CoordinateMessage(BaseModel):
+class TripStatusOut(BaseModel):
     car_number: str
+    started_at: datetime
+    messages_left: int
+
+
+class TripPointOut(BaseModel):
     latitude: float
     longitude: float
+    recorded_at: datetime
+
+
+class TripHistoryOut(BaseModel):
+    car_number: str
+    total_points: int
+    points: list[TripPointOut]
@@ -1,27 +1,194 @@
 import asyncio
+from contextlib import suppress
+from datetime import datetime, timezone
+import logging
 import random
+from typing import Annotated
 
 from aio_pika import DeliveryMode, Message
 from aio_pika.pool import Pool
+from fastapi import Depends, Request
+from opentelemetry import propagate, trace
+from opentelemetry.trace import SpanKind
+from service_common.coordinates import CoordinateCodec, CoordinateMessage, get_codec, JsonCodec
 
 from app.config import get_settings
-from app.trip.schemas import CoordinateMessage
+from app.custom_exceptions import NotFoundError, TripAlreadyStartedError, TripLimitExceededError
+from app.custom_metrics import active_trips, trip_messages
+from app.trip.history import TripHistoryWriter
+from app.trip.schemas import TripStatusOut
 
 
-async def start_trip(car_number: str, rabbit_pool: Pool):
-    settings = get_settings()
+logger = logging.getLogger(__name__)
+tracer = trace.get_tracer(__name__)
+
+
+class TripScheduler:
+    """
+    Drives all simulated trips of the worker from a single timer loop.
+    Every tick publishes one message per active trip through pooled channels,
+    broker confirms of a batch are awaited in background so a slow broker does not delay the next tick.
+    At most max_pending_batches are awaited at once, beyond that a tick waits for the broker.
+    """
+
+    def __init__(
+            self,
+            channel_pool: Pool,
+            queue_name: str,
+            interval: float = 1.0,
+            messages_count: int = 5,
+            batch_size: int = 500,
+            codec: CoordinateCodec = JsonCodec(),
+            persistent: bool = True,
+            history: TripHistoryWriter | None = None,
+            max_active_trips: int = 1000,
+            max_pending_batches: int = 10,
+    ):
+        self._channel_pool = channel_pool
+        self._queue_name = queue_name
+        self._interval = interval
+        self._messages_count = messages_count
+        self._batch_size = batch_size
+        self._codec = codec
+        # Positions are superseded every tick, transient delivery skips the broker disk write
+        self._delivery_mode = DeliveryMode.PERSISTENT if persistent else DeliveryMode.NOT_PERSISTENT
+        self._history = history
+        self._max_active_trips = max_active_trips
+        self._max_pending_batches = max_pending_batches
+        self._trips: dict[str, TripStatusOut] = {}
+        self._confirms: set[asyncio.Task] = set()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def active_trips(self) -> dict[str, int]:
+        return {car_number: trip.messages_left for car_number, trip in self._trips.items()}
+
+    def list_trips(self) -> list[TripStatusOut]:
+        return [trip.model_copy() for trip in self._trips.values()]
+
+    def get_trip(self, car_number: str) -> TripStatusOut:
+        try:
+            return self._trips[car_number].model_copy()
+        except KeyError:
+            raise NotFoundError from None
+
+    def add_trip(self, car_number: str) -> TripStatusOut:
+        if car_number in self._trips:
+            raise TripAlreadyStartedError
+        if len(self._trips) >= self._max_active_trips:
+            raise TripLimitExceededError
+
+        trip = TripStatusOut(
+            car_number=car_number,
+            started_at=datetime.now(timezone.utc),
+            messages_left=self._messages_count,
+        )
+        self._trips[car_number] = trip
+        active_trips.set(len(self._trips))
+        return trip.model_copy()
+
+    def cancel_trip(self, car_number: str):
+        """Trip is dropped from the schedule, no more messages are published for it starting from the next tick."""
+        if self._trips.pop(car_number, None) is None:
+            raise NotFoundError
+        active_trips.set(len(self._trips))
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+        if self._confirms:
+            await asyncio.gather(*self._confirms, return_exceptions=True)
+
+    async def tick(self):
+        messages = [_form_message(car_number) for car_number in self._advance_trips()]
+        if self._history is not None and messages:
+            self._history.add(messages, datetime.now(timezone.utc))
+        for start in range(0, len(messages), self._batch_size):
+            if len(self._confirms) >= self._max_pending_batches:
+                await asyncio.wait(self._confirms, return_when=asyncio.FIRST_COMPLETED)
+            task = asyncio.create_task(self._publish_batch(messages[start:start + self._batch_size]))
+            self._confirms.add(task)
+            task.add_done_callback(self._confirms.discard)
 
-    async with rabbit_pool.acquire() as connection:
-        channel = await connection.channel()
-        await channel.declare_queue(settings.QUEUE_NAME, durable=True)
+    def _advance_trips(self) -> list[str]:
+        car_numbers = list(self._trips)
+        for car_number in car_numbers:
+            self._trips[car_number].messages_left -= 1
+            if self._trips[car_number].messages_left <= 0:
+                del self._trips[car_number]
+        active_trips.set(len(self._trips))
+        return car_numbers
 
-        for _ in range(5):
-            msg = _form_message(car_number)
-            await channel.default_exchange.publish(
-                Message(body=msg.model_dump_json().encode(), delivery_mode=DeliveryMode.PERSISTENT),
-                routing_key=settings.QUEUE_NAME,
-            )
-            await asyncio.sleep(1)
+    async def _publish_batch(self, messages: list[CoordinateMessage]):
+        try:
+            results = await self._publish(messages)
+        except Exception:
+            # Runs as a background task, nothing else would retrieve the error
+            trip_messages.labels('failed').inc(len(messages))
+            logger.exception('Failed to publish a batch of %s trip messages', len(messages))
+            return
+
+        failed = sum(isinstance(result, Exception) for result in results)
+        trip_messages.labels('confirmed').inc(len(results) - failed)
+        if failed:
+            trip_messages.labels('failed').inc(failed)
+            logger.warning('%s of %s trip messages were not confirmed by broker', failed, len(results))
+
+    async def _publish(self, messages: list[CoordinateMessage]) -> list:
+        published_at = datetime.now(timezone.utc)
+        with tracer.start_as_current_span(
+            f'{self._queue_name} publish',
+            kind=SpanKind.PRODUCER,
+            attributes={
+                'messaging.system': 'rabbitmq',
+                'messaging.destination.name': self._queue_name,
+                'messaging.batch.message_count': len(messages),
+            },
+        ):
+            # Messages of a batch share the trace context of its span
+            headers = {}
+            propagate.inject(headers)
+            async with self._channel_pool.acquire() as channel:
+                results = await asyncio.gather(
+                    *[
+                        channel.default_exchange.publish(
+                            Message(
+                                body=self._codec.encode(msg),
+                                headers=headers,
+                                content_type=self._codec.content_type,
+                                delivery_mode=self._delivery_mode,
+                                timestamp=published_at,
+                            ),
+                            routing_key=self._queue_name,
+                        )
+                        for msg in messages
+                    ],
+                    return_exceptions=True,
+                )
+        return results
+
+    async def _run(self):
+        async with self._channel_pool.acquire() as channel:
+            await channel.declare_queue(self._queue_name, durable=True)
+
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while True:
+            try:
+                await self.tick()
+            except Exception:
+                logger.exception('Failed to publish trip messages')
+
+            # Deadline based sleep keeps a steady rate no matter how long the tick took
+            next_tick += self._interval
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
 
 
 def _form_message(car_number: str) -> CoordinateMessage:
@@ -31,3 +198,26 @@ def _form_message(car_number: str) -> CoordinateMessage:
         longitude=random.uniform(-180, 180),
     )
     return msg
+
+
+def create_trip_scheduler(channel_pool: Pool, history: TripHistoryWriter | None = None) -> TripScheduler:
+    settings = get_settings()
+    return TripScheduler(
+        channel_pool,
+        settings.QUEUE_NAME,
+        interval=settings.TRIP_TICK_INTERVAL,
+        messages_count=settings.TRIP_MESSAGES_COUNT,
+        batch_size=settings.TRIP_PUBLISH_BATCH_SIZE,
+        codec=get_codec(settings.TRIP_MESSAGE_CODEC),
+        persistent=settings.TRIP_MESSAGES_PERSISTENT,
+        history=history,
+        max_active_trips=settings.TRIP_MAX_ACTIVE,
+        max_pending_batches=settings.TRIP_MAX_PENDING_BATCHES,
+    )
+
+
+def get_trip_scheduler(request: Request) -> TripScheduler:
+    return request.app.state.trip_scheduler
+
+
+trip_scheduler_dependency = Annotated[TripScheduler, Depends(get_trip_scheduler)]
@@ -0,0 +1,34 @@
+"""create trip positions
+
+Revision ID: 3c9e1f7a2b64
+Revises: a5ba43ea6681
+Create Date: 2026-10-19 10:12:41.518302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '3c9e1f7a2b64'
+down_revision: Union[str, None] = 'a5ba43ea6681'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('trip_positions',
+                    sa.Column('car_number', sa.String(length=16), nullable=False),
+                    sa.Column('recorded_at', sa.DateTime(timezone=True), nullable=False),
+                    sa.Column('latitude', sa.Float(), nullable=False),
+                    sa.Column('longitude', sa.Float(), nullable=False),
+                    sa.PrimaryKeyConstraint('car_number', 'recorded_at'),
+                    postgresql_partition_by='RANGE (recorded_at)'
+                    )
+    # Daily partitions are created by the history writer, default one keeps rows of days it missed
+    op.execute('CREATE TABLE trip_positions_default PARTITION OF trip_positions DEFAULT')
+
+
+def downgrade() -> None:
+    op.drop_table('trip_positions')
@@ -0,0 +1,26 @@
+"""index reviews
+
+Revision ID: 5b7d2e9c1f40
+Revises: e27b905c4d18
+Create Date: 2026-10-19 16:22:48.513204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '5b7d2e9c1f40'
+down_revision: Union[str, None] = 'e27b905c4d18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_reviews_car_id_id', 'reviews', ['car_id', 'id'], unique=False)
+    op.create_index(op.f('ix_reviews_parent_id'), 'reviews', ['parent_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_reviews_parent_id'), table_name='reviews')
+    op.drop_index('ix_reviews_car_id_id', table_name='reviews')
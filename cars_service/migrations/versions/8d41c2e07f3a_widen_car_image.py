@@ -0,0 +1,28 @@
+"""widen car image
+
+Revision ID: 8d41c2e07f3a
+Revises: 3c9e1f7a2b64
+Create Date: 2026-10-19 12:40:03.214871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '8d41c2e07f3a'
+down_revision: Union[str, None] = '3c9e1f7a2b64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Content hash file names do not fit into 64 characters together with the static URL
+    op.alter_column('cars', 'image', type_=sa.String(length=255), existing_type=sa.String(length=64),
+                    existing_nullable=True)
+
+
+def downgrade() -> None:
+    op.alter_column('cars', 'image', type_=sa.String(length=64), existing_type=sa.String(length=255),
+                    existing_nullable=True)
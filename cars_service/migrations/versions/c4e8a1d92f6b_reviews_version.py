@@ -0,0 +1,45 @@
+"""reviews version
+
+Revision ID: c4e8a1d92f6b
+Revises: 5b7d2e9c1f40
+Create Date: 2026-10-19 18:05:17.204861
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e8a1d92f6b'
+down_revision: Union[str, None] = '5b7d2e9c1f40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('reviews_version',
+                    sa.Column('id', sa.Integer(), nullable=False),
+                    sa.Column('version', sa.BigInteger(), server_default='0', nullable=False),
+                    sa.PrimaryKeyConstraint('id')
+                    )
+    op.execute('INSERT INTO reviews_version (id) VALUES (1)')
+    # Once per statement, so a bulk write or a cascade from cars bumps the version once
+    op.execute("""
+        CREATE FUNCTION bump_reviews_version() RETURNS trigger AS $$
+        BEGIN
+            UPDATE reviews_version SET version = version + 1 WHERE id = 1;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER reviews_version_bump AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON reviews
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_reviews_version()
+    """)
+
+
+def downgrade() -> None:
+    op.execute('DROP TRIGGER reviews_version_bump ON reviews')
+    op.execute('DROP FUNCTION bump_reviews_version()')
+    op.drop_table('reviews_version')
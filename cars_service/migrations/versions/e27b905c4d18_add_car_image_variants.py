@@ -0,0 +1,27 @@
+"""add car image variants
+
+Revision ID: e27b905c4d18
+Revises: 8d41c2e07f3a
+Create Date: 2026-10-19 14:05:37.902114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'e27b905c4d18'
+down_revision: Union[str, None] = '8d41c2e07f3a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('cars', sa.Column('image_variants', postgresql.JSONB(astext_type=sa.Text()),
+                                    server_default='[]', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('cars', 'image_variants')
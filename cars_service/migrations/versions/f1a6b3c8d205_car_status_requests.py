@@ -0,0 +1,33 @@
+"""car status requests
+
+Revision ID: f1a6b3c8d205
+Revises: c4e8a1d92f6b
+Create Date: 2026-10-19 19:20:44.381920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1a6b3c8d205'
+down_revision: Union[str, None] = 'c4e8a1d92f6b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('car_status_requests',
+                    sa.Column('idempotency_key', sa.String(length=64), nullable=False),
+                    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+                    sa.PrimaryKeyConstraint('idempotency_key')
+                    )
+    op.create_index(
+        op.f('ix_car_status_requests_created_at'), 'car_status_requests', ['created_at'], unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_car_status_requests_created_at'), table_name='car_status_requests')
+    op.drop_table('car_status_requests')
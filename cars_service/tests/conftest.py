@@ -7,7 +7,13 @@ from typing import Generator
 import aiofiles
 from alembic.command import downgrade, upgrade
 from alembic.config import Config
+from fakeredis.aioredis import FakeRedis
 from httpx import AsyncClient
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from PIL import Image
 from polyfactory.factories.pydantic_factory import ModelFactory
 from polyfactory.pytest_plugin import register_fixture
 import pytest
@@ -18,10 +24,15 @@ from sqlalchemy.orm import Session, SessionTransaction
 
 from app.cars.schemas import CarOut
 from app.config import get_settings
+from app.dao.cache import CarCache
+from app.images.storage import get_image_storage
 from app.reviews.schemas import ReviewIn
 from app import create_app
 
 
+pytest_plugins = ['service_common.benchmarks']
+
+
 def pytest_configure(config: pytest.Config):
     """
     Allows plugins and conftest files to perform initial configuration.
@@ -95,6 +106,31 @@ async def db(app) -> AsyncSession:
         await conn.rollback()
 
 
+@pytest.fixture(scope='session')
+def tracer_provider_exporter() -> InMemorySpanExporter:
+    """The global tracer provider can be set once per process."""
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    return exporter
+
+
+@pytest.fixture
+def span_exporter(tracer_provider_exporter: InMemorySpanExporter) -> InMemorySpanExporter:
+    tracer_provider_exporter.clear()
+    yield tracer_provider_exporter
+
+
+@pytest.fixture(autouse=True)
+def car_cache(monkeypatch) -> CarCache:
+    """Every test gets an empty in-memory cache, cars cached by a previous test were rolled back."""
+    cache = CarCache(FakeRedis())
+    for module in ('app.dao.car', 'app.dao.reviews'):
+        monkeypatch.setattr(f'{module}.get_car_cache', lambda: cache)
+    yield cache
+
+
 @pytest.fixture(scope='session')
 def alembic_config() -> Config:
     config = Config()
@@ -160,12 +196,29 @@ async def cars(cars_factory: CarReadFactory) -> tuple[CarOut]:
     yield car_1, car_2
 
 
-async def create_test_image(filename):
-    settings = get_settings()
+def _create_jpeg(width: int, height: int) -> bytes:
+    content = BytesIO()
+    Image.new('RGB', (width, height), 'red').save(content, 'JPEG')
+    return content.getvalue()
+
+
+JPEG_CONTENT = _create_jpeg(800, 600)
+
+
+@pytest.fixture
+def static_dir(tmp_path, monkeypatch) -> Path:
+    """Uploaded images are written to a temporary directory instead of app/static."""
+    monkeypatch.setattr(get_settings(), 'STATIC_DIR', f'{tmp_path}/')
+    get_image_storage.cache_clear()
+    yield tmp_path
+    get_image_storage.cache_clear()
+
+
+async def create_test_image(directory: Path, filename):
     file_content = b'This is the content of the file.'
     file_obj = BytesIO(file_content)
 
-    async with aiofiles.open(settings.STATIC_DIR + filename + '.jpg', 'wb') as output_file:
+    async with aiofiles.open(directory / f'{filename}.jpg', 'wb') as output_file:
         await output_file.write(file_obj.read())
 
 
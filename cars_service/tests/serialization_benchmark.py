@@ -0,0 +1,68 @@
+"""
+Compares CPU time per request of listing cars through response_model and through model_response.
+
+Usage: python -m tests.serialization_benchmark [number_of_cars] [number_of_requests]
+"""
+import asyncio
+import sys
+import time
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from service_common.serialization import model_response
+
+from app.cars.schemas import CarOut
+from app.models import Car
+
+
+def _make_cars(number: int) -> list[Car]:
+    return [
+        Car(
+            id=index,
+            car_description=f'Car {index}',
+            car_number=f'AA{index:04}AA',
+            transmission='automatic',
+            engine='2.0L',
+            year=2022,
+            status='active',
+            image=f'{index:032x}.jpg',
+            image_variants=[{'url': f'{index:032x}-320w.webp', 'width': 320, 'format': 'webp'}],
+            rental_cost=100,
+            car_station_id=1,
+        )
+        for index in range(number)
+    ]
+
+
+def _cpu_per_request(render, requests: int) -> float:
+    render()
+    started = time.process_time()
+    for _ in range(requests):
+        render()
+    return (time.process_time() - started) / requests
+
+
+async def _response_model(field, cars: list[Car], response_class) -> bytes:
+    content = await serialize_response(field=field, response_content=cars)
+    return response_class(content).body
+
+
+def run(number: int = 1000, requests: int = 50):
+    cars = _make_cars(number)
+    field = create_response_field(name='Response', type_=list[CarOut], mode='serialization')
+    loop = asyncio.new_event_loop()
+    paths = {
+        'response_model, JSONResponse': lambda: loop.run_until_complete(_response_model(field, cars, JSONResponse)),
+        'response_model, ORJSONResponse': lambda: loop.run_until_complete(_response_model(field, cars, ORJSONResponse)),
+        'model_response': lambda: model_response(list[CarOut], cars).body,
+    }
+
+    sys.stdout.write(f'{number} cars, {requests} requests\n')
+    for name, render in paths.items():
+        sys.stdout.write(f'{name:<34}{_cpu_per_request(render, requests) * 1000:>10.2f} ms/request\n')
+    loop.close()
+
+
+if __name__ == '__main__':
+    run(*(int(value) for value in sys.argv[1:3]))
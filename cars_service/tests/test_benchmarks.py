@@ -0,0 +1,61 @@
+import json
+
+from service_common.serialization import model_response
+
+from app.cars.schemas import _validate_car_number, _validate_engine, CarIn, CarOut, CarUpdate
+
+
+BUDGETS = {
+    'validate_car_number': 10e-6,
+    'validate_engine': 10e-6,
+    'car_in_from_dict': 120e-6,
+    'car_in_from_json_string': 160e-6,
+    'car_update_from_json_string': 80e-6,
+    'car_list_response': 7e-3,
+}
+
+CAR = {
+    'car_description': 'Comfortable family sedan',
+    'car_number': 'AA1234AA',
+    'transmission': 'automatic',
+    'engine': '2.0L',
+    'year': 2015,
+    'status': 'active',
+    'rental_cost': 100,
+    'car_station_id': 1,
+}
+
+
+def test_validate_car_number(benchmark, assert_within_budget):
+    assert benchmark(_validate_car_number, 'AA1234AA') == 'AA1234AA'
+    assert_within_budget(BUDGETS['validate_car_number'])
+
+
+def test_validate_engine(benchmark, assert_within_budget):
+    assert benchmark(_validate_engine, '2.0L') == '2.0L'
+    assert_within_budget(BUDGETS['validate_engine'])
+
+
+def test_car_in_from_dict(benchmark, assert_within_budget):
+    car = benchmark(CarIn.model_validate, CAR)
+    assert car.car_number == 'AA1234AA'
+    assert_within_budget(BUDGETS['car_in_from_dict'])
+
+
+def test_car_in_from_json_string(benchmark, assert_within_budget):
+    car = benchmark(CarIn.model_validate, json.dumps(CAR))
+    assert car.car_number == 'AA1234AA'
+    assert_within_budget(BUDGETS['car_in_from_json_string'])
+
+
+def test_car_update_from_json_string(benchmark, assert_within_budget):
+    car = benchmark(CarUpdate.model_validate, json.dumps({'engine': '1.6L', 'rental_cost': 90}))
+    assert car.engine == '1.6L'
+    assert_within_budget(BUDGETS['car_update_from_json_string'])
+
+
+def test_car_list_response(benchmark, assert_within_budget):
+    cars = [{'id': index, 'image': 'car.jpg', **CAR} for index in range(50)]
+    response = benchmark(model_response, list[CarOut], cars)
+    assert len(json.loads(response.body)) == 50
+    assert_within_budget(BUDGETS['car_list_response'])
@@ -0,0 +1,91 @@
+import asyncio
+
+from fakeredis.aioredis import FakeRedis
+from httpx import AsyncClient
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+from tests.entity_creators import create_car
+
+from app.cars.schemas import CarFiltering, CarOut
+from app.dao.cache import CarCache
+from app.models import Car
+
+
+async def test_retrieve_car_is_cached(client: AsyncClient, cars: tuple[CarOut], db: AsyncSession):
+    await create_car(db, cars[0])
+    await client.get(f'/cars/{cars[0].id}')
+    await db.execute(update(Car).where(Car.id == cars[0].id).values(car_description='Changed behind cache'))
+
+    response = await client.get(f'/cars/{cars[0].id}')
+
+    assert response.json() == cars[0].model_dump()
+
+
+async def test_update_car_invalidates_cache(client: AsyncClient, cars: tuple[CarOut], db: AsyncSession):
+    cars[0].status = 'active'
+    await create_car(db, cars[0])
+    await client.get(f'/cars/{cars[0].id}')
+    await client.get('/cars/', params={'status': 'active'})
+
+    await client.patch(f'/cars/{cars[0].id}', data={'car_description': 'Bmw Updated', 'engine': '4.0L'})
+
+    assert (await client.get(f'/cars/{cars[0].id}')).json()['car_description'] == 'Bmw Updated'
+    response = await client.get('/cars/', params={'status': 'active'})
+    assert [car['car_description'] for car in response.json()] == ['Bmw Updated']
+
+
+async def test_update_cars_status_invalidates_cache(client: AsyncClient, cars: tuple[CarOut], db: AsyncSession):
+    cars[0].status = 'active'
+    cars[1].status = 'active'
+    await create_car(db, cars[0])
+    await create_car(db, cars[1])
+    await client.get('/cars/', params={'car_ids': [cars[0].id, cars[1].id]})
+
+    await client.patch('/cars/car-status/', params={'car_ids': [cars[0].id]}, json={'status': 'busy'})
+
+    response = await client.get('/cars/', params={'car_ids': [cars[0].id, cars[1].id]})
+    assert {car['id']: car['status'] for car in response.json()} == {cars[0].id: 'busy', cars[1].id: 'active'}
+
+
+async def test_get_cars_by_ids_reuses_cached_cars(client: AsyncClient, cars: tuple[CarOut], db: AsyncSession):
+    await create_car(db, cars[0])
+    await create_car(db, cars[1])
+    await client.get(f'/cars/{cars[0].id}')
+    await db.execute(update(Car).where(Car.id == cars[0].id).values(car_description='Changed behind cache'))
+
+    response = await client.get('/cars/', params={'car_ids': [cars[1].id, cars[0].id]})
+
+    assert response.json() == [car.model_dump() for car in sorted(cars, key=lambda x: x.id)]
+
+
+async def test_concurrent_misses_share_one_load(cars: tuple[CarOut]):
+    cache = CarCache(FakeRedis())
+    loads = 0
+
+    async def load() -> dict:
+        nonlocal loads
+        loads += 1
+        await asyncio.sleep(0.01)
+        return cars[0].model_dump()
+
+    results = await asyncio.gather(*(cache.get_car(cars[0].id, load) for _ in range(10)))
+
+    assert loads == 1
+    assert [car.model_dump() for car in results] == [cars[0].model_dump()] * 10
+    assert (await cache.get_car(cars[0].id, load)).model_dump() == cars[0].model_dump()
+    assert loads == 1
+
+
+async def test_unavailable_cache_falls_back_to_loader(cars: tuple[CarOut]):
+    cache = CarCache(FakeRedis(connected=False))
+
+    async def load(params: CarFiltering) -> list[dict]:
+        return [car.model_dump() for car in cars]
+
+    expected = [car.model_dump() for car in cars]
+    by_query = await cache.get_cars(CarFiltering(status='active'), load)
+    by_ids = await cache.get_cars(CarFiltering(car_ids=[car.id for car in cars]), load)
+
+    assert [car.model_dump() for car in by_query] == expected
+    assert sorted(car.id for car in by_ids) == sorted(car.id for car in cars)
+    await cache.invalidate([cars[0].id])
@@ -1,31 +1,73 @@
+from datetime import datetime, timedelta
 from io import BytesIO
+from pathlib import Path
 from unittest.mock import patch
 
 from httpx import AsyncClient
+from PIL import Image
+import pytest
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from tests.conftest import CarReadFactory, create_test_image
+from tests.conftest import CarReadFactory, create_test_image, JPEG_CONTENT
 
-from app.cars.schemas import CarOut
+from app.cars.schemas import CarOut, CarUpdateStatus
+from app.config import get_settings
+from app.dao.car import update_cars_status
 from tests.entity_creators import create_car
-from app.models import Car
+from app.models import Car, CarStatusRequest
 
 
-async def test_create_car(client: AsyncClient, cars_factory: CarReadFactory, db: AsyncSession):
+async def test_create_car(client: AsyncClient, cars_factory: CarReadFactory, db: AsyncSession, static_dir: Path):
     filename = 'test.jpg'
     car = cars_factory.build()
-    file_content = b'This is the content of the file.'
-    file_obj = BytesIO(file_content)
+    file_obj = BytesIO(JPEG_CONTENT)
 
     with patch('app.cars.router.is_car_station_exists') as is_car_station_exists_mock:
         is_car_station_exists_mock.return_value = True
         files = {'file': (filename, file_obj, 'image/jpeg')}
-        response = await client.post('/cars/',  data=car.dict(exclude={'id', 'image'}), files=files)
+        response = await client.post('/cars/',  data=car.dict(exclude={'id', 'image', 'image_variants'}), files=files)
 
     assert response.status_code == 201
-    assert response.json() == car.dict(exclude={'id', 'image'})
+    assert response.json() == car.dict(exclude={'id', 'image', 'image_variants'})
     is_car_station_exists_mock.assert_called()
+    db_car = await db.scalar(select(Car).where(Car.car_number == car.car_number))
+    stored = static_dir / db_car.image
+    assert stored.read_bytes() == JPEG_CONTENT
+    assert len(stored.name) == len('0' * 32 + '.jpg')
+    assert [(variant['width'], variant['format']) for variant in db_car.image_variants] == [
+        (320, 'webp'), (320, 'jpeg'), (640, 'webp'), (640, 'jpeg'),
+    ]
+    variant = Image.open(static_dir / db_car.image_variants[0]['url'])
+    assert (variant.format, variant.size) == ('WEBP', (320, 240))
+    assert len(list(static_dir.iterdir())) == 5
+
+
+@pytest.mark.parametrize(
+    ('content', 'status_code'),
+    [(b'This is not an image', 415), (b'\xff\xd8\xff\xe0 broken jpeg', 415), (JPEG_CONTENT + b'0' * 1024, 413)],
+    ids=['not_image', 'broken_image', 'too_large'],
+)
+async def test_create_car_invalid_image(
+        client: AsyncClient,
+        cars_factory: CarReadFactory,
+        db: AsyncSession,
+        static_dir: Path,
+        monkeypatch,
+        content: bytes,
+        status_code: int,
+):
+    monkeypatch.setattr(get_settings(), 'CAR_IMAGE_MAX_SIZE', 1024)
+    monkeypatch.setattr(get_settings(), 'CAR_IMAGE_CHUNK_SIZE', 100)
+    car = cars_factory.build()
+
+    with patch('app.cars.router.is_car_station_exists') as is_car_station_exists_mock:
+        is_car_station_exists_mock.return_value = True
+        files = {'file': ('test.jpg', BytesIO(content), 'image/jpeg')}
+        response = await client.post('/cars/',  data=car.dict(exclude={'id', 'image', 'image_variants'}), files=files)
+
+    assert response.status_code == status_code
+    assert list(static_dir.iterdir()) == []
 
 
 async def test_get_cars(client: AsyncClient, cars: tuple[CarOut], db: AsyncSession):
@@ -38,10 +80,11 @@ async def test_get_cars(client: AsyncClient, cars: tuple[CarOut], db: AsyncSessi
     assert response.json() == [car.model_dump() for car in sorted(cars, key=lambda x: x.id)]
 
 
-async def test_delete_car(client: AsyncClient, cars: tuple[CarOut], db: AsyncSession):
+async def test_delete_car(client: AsyncClient, cars: tuple[CarOut], db: AsyncSession, static_dir: Path):
+    cars[0].image = get_settings().STATIC_URL + cars[0].car_number + '.jpg'
     await create_car(db, cars[0])
     await create_car(db, cars[1])
-    await create_test_image(cars[0].car_number)
+    await create_test_image(static_dir, cars[0].car_number)
     query = select(Car)
     result = await db.execute(query)
     assert len(result.fetchall()) == 2
@@ -51,11 +94,12 @@ async def test_delete_car(client: AsyncClient, cars: tuple[CarOut], db: AsyncSes
     assert response.status_code == 204
     result = await db.execute(query)
     assert len(result.fetchall()) == 1
+    assert list(static_dir.iterdir()) == []
 
 
-async def test_delete_car_not_found(client: AsyncClient, cars: tuple[CarOut], db: AsyncSession):
+async def test_delete_car_not_found(client: AsyncClient, cars: tuple[CarOut], db: AsyncSession, static_dir: Path):
     await create_car(db, cars[0])
-    await create_test_image(cars[0].car_number)
+    await create_test_image(static_dir, cars[0].car_number)
 
     response = await client.delete(f'/cars/{cars[0].id}1')
 
@@ -81,14 +125,15 @@ async def test_retrieve_car_not_found(client: AsyncClient, cars: tuple[CarOut],
     assert response.json() == {'detail': 'Car not found'}
 
 
-async def test_update_car(client: AsyncClient, cars: tuple[CarOut], db: AsyncSession):
+async def test_update_car(client: AsyncClient, cars: tuple[CarOut], db: AsyncSession, static_dir: Path):
     filename = 'test.jpg'
+    cars[0].image = get_settings().STATIC_URL + cars[0].car_number + '.jpg'
     await create_car(db, cars[0])
+    await create_test_image(static_dir, cars[0].car_number)
 
     with patch('app.cars.router.is_car_station_exists') as is_car_station_exists_mock:
         is_car_station_exists_mock.return_value = True
-        file_content = b'This is the content of the file.'
-        file_obj = BytesIO(file_content)
+        file_obj = BytesIO(JPEG_CONTENT)
 
         response = await client.patch(
             f'/cars/{cars[0].id}',
@@ -102,6 +147,9 @@ async def test_update_car(client: AsyncClient, cars: tuple[CarOut], db: AsyncSes
     assert response_data['engine'] == '4.0L'
     assert response_data['year'] == cars[0].year
     is_car_station_exists_mock.assert_called()
+    db_car = await db.scalar(select(Car).where(Car.id == cars[0].id))
+    assert (static_dir / db_car.image).read_bytes() == JPEG_CONTENT
+    assert not (static_dir / f'{cars[0].car_number}.jpg').exists()
 
 
 async def test_update_car_not_found(client: AsyncClient, cars: tuple[CarOut], db: AsyncSession):
@@ -158,7 +206,7 @@ async def test_get_cars_by_mult_params(client: AsyncClient, cars: tuple[CarOut],
     response = await client.get('/cars/', params={'status': 'active', 'engine': '3.5L'})
 
     assert response.status_code == 200
-    assert response.json() == [cars[1].model_dump(), cars[0].model_dump()]
+    assert response.json() == [car.model_dump() for car in sorted(cars, key=lambda x: x.id)]
 
 
 async def test_update_car_status(client: AsyncClient, cars: tuple[CarOut], db: AsyncSession):
@@ -178,6 +226,49 @@ async def test_update_car_status(client: AsyncClient, cars: tuple[CarOut], db: A
     assert response.json()[1]['status'] == 'busy'
 
 
+async def test_update_car_status_applies_idempotency_key_once(
+        client: AsyncClient,
+        cars: tuple[CarOut],
+        db: AsyncSession,
+):
+    cars[0].status = 'active'
+    car_db = await create_car(db, cars[0])
+
+    async def update_status(status: str, idempotency_key: str) -> list[dict]:
+        response = await client.patch(
+            '/cars/car-status/',
+            params={'car_ids': [car_db.id]},
+            json={'status': status},
+            headers={'Idempotency-Key': idempotency_key},
+        )
+        assert response.status_code == 200
+        return response.json()
+
+    applied = await update_status('busy', 'first')
+    changed = await update_status('repairing', 'second')
+    # A late retry of the first request does not bring the older status back
+    retried = await update_status('busy', 'first')
+
+    assert [car['status'] for car in (*applied, *changed, *retried)] == ['busy', 'repairing', 'repairing']
+
+
+async def test_update_car_status_replay_keeps_expired_keys_deleted(cars: tuple[CarOut], db: AsyncSession):
+    cars[0].status = 'active'
+    car_db = await create_car(db, cars[0])
+    await update_cars_status(db, CarUpdateStatus(status='busy'), [car_db.id], 'first')
+    expired_at = datetime.utcnow() - timedelta(seconds=get_settings().CAR_STATUS_IDEMPOTENCY_TTL + 1)
+    db.add(CarStatusRequest(idempotency_key='expired', created_at=expired_at))
+    await db.commit()
+
+    replayed = await update_cars_status(db, CarUpdateStatus(status='active'), [car_db.id], 'first')
+    statuses = [car.status for car in replayed]
+    # The session of a request is closed without a commit of its own
+    await db.rollback()
+
+    assert statuses == ['busy']
+    assert await db.get(CarStatusRequest, 'expired') is None
+
+
 async def test_update_car_status_car_not_found(client: AsyncClient, cars: tuple[CarOut], db: AsyncSession):
     cars[0].status = 'active'
     cars[1].status = 'active'
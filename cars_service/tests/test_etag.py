@@ -0,0 +1,66 @@
+from httpx import AsyncClient
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from tests.entity_creators import create_car, create_review, prepare_reviews
+
+from app.cars.schemas import CarOut
+from app.dao.reviews import get_reviews_version
+from app.models import Car
+from app.reviews.schemas import ReviewIn
+
+
+async def test_car_not_modified(client: AsyncClient, cars: tuple[CarOut], db: AsyncSession):
+    await create_car(db, cars[0])
+    response = await client.get(f'/cars/{cars[0].id}')
+
+    not_modified = await client.get(f'/cars/{cars[0].id}', headers={'If-None-Match': response.headers['etag']})
+
+    assert not_modified.status_code == 304
+    assert not_modified.headers['etag'] == response.headers['etag']
+    assert not_modified.content == b''
+
+
+async def test_car_modified(client: AsyncClient, cars: tuple[CarOut], db: AsyncSession):
+    await create_car(db, cars[0])
+    etag = (await client.get(f'/cars/{cars[0].id}')).headers['etag']
+
+    await client.patch(f'/cars/{cars[0].id}', data={'car_description': 'Bmw Updated', 'engine': '4.0L'})
+    response = await client.get(f'/cars/{cars[0].id}', headers={'If-None-Match': etag})
+
+    assert response.status_code == 200
+    assert response.headers['etag'] != etag
+
+
+async def test_reviews_not_modified(
+        client: AsyncClient,
+        reviews: tuple[ReviewIn],
+        db: AsyncSession,
+        cars: tuple[CarOut],
+):
+    review_db, _ = await prepare_reviews(db, reviews, cars)
+    etag = (await client.get('/reviews/')).headers['etag']
+
+    response = await client.get('/reviews/', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+
+    await create_review(db, ReviewIn(comment='New review', stars=5, car_id=review_db.car_id))
+    response = await client.get('/reviews/', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert len(response.json()) == 3
+
+
+async def test_reviews_version_changes_on_every_write(
+        client: AsyncClient,
+        reviews: tuple[ReviewIn],
+        db: AsyncSession,
+        cars: tuple[CarOut],
+):
+    review_db, reply_db = await prepare_reviews(db, reviews, cars)
+    created = await get_reviews_version(db)
+
+    await client.patch(f'/reviews/{reply_db.id}', json={'comment': 'Updated', 'stars': 1})
+    updated = await get_reviews_version(db)
+    await db.execute(delete(Car).where(Car.id == review_db.car_id))
+    deleted_by_cascade = await get_reviews_version(db)
+
+    assert created < updated < deleted_by_cascade
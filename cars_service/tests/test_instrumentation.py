@@ -0,0 +1,42 @@
+import os
+
+from httpx import AsyncClient
+from prometheus_client import REGISTRY
+from service_common.instrumentation.sql import instrument_engine
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from tests.entity_creators import create_car
+
+from app.cars.schemas import CarOut
+from app.models import Car
+
+
+def get_client_calls(client: str, operation: str, target: str) -> float:
+    labels = {'client': client, 'operation': operation, 'target': target}
+    return REGISTRY.get_sample_value('client_request_duration_seconds_count', labels) or 0
+
+
+async def test_metrics_labelled_by_route_template(client: AsyncClient, cars: tuple[CarOut], db: AsyncSession):
+    await create_car(db, cars[0])
+    await client.get(f'/cars/{cars[0].id}')
+
+    response = await client.get('/metrics')
+
+    assert 'http_request_duration_seconds_count{handler="/cars/{car_id}",method="GET"}' in response.text
+    assert 'http_requests_inprogress' in response.text
+    assert f'handler="/cars/{cars[0].id}"' not in response.text
+
+
+async def test_engine_queries_timed_by_table():
+    engine = create_async_engine(os.environ['DATABASE_URL'])
+    instrument_engine(engine)
+    selects = get_client_calls('postgres', 'SELECT', 'cars')
+    plain = get_client_calls('postgres', 'SELECT', 'rent-cars-test')
+
+    async with engine.connect() as conn:
+        await conn.execute(select(Car.id))
+        await conn.execute(text('SELECT 1'))
+    await engine.dispose()
+
+    assert get_client_calls('postgres', 'SELECT', 'cars') == selects + 1
+    assert get_client_calls('postgres', 'SELECT', 'rent-cars-test') == plain + 1
@@ -5,7 +5,7 @@ from app.cars.schemas import CarOut
 from app.reviews.schemas import ReviewIn
 from tests.conftest import CarReadFactory, ReviewInFactory
 
-from tests.entity_creators import prepare_reviews, create_car
+from tests.entity_creators import create_car, create_review, prepare_reviews
 
 
 async def test_create_review(
@@ -103,3 +103,36 @@ async def test_update_review_not_found(
 
     assert response.status_code == 404
     assert response.json() == {'detail': 'Review not found'}
+
+
+async def test_get_car_reviews_pages(client: AsyncClient, db: AsyncSession, cars: tuple[CarOut]):
+    car = await create_car(db, cars[0])
+    roots = [await create_review(db, ReviewIn(comment=f'Review {i}', stars=5, car_id=car.id)) for i in range(3)]
+    reply = await create_review(db, ReviewIn(comment='Reply', stars=5, car_id=car.id, parent_id=roots[1].id))
+    await create_review(db, ReviewIn(comment='Reply to reply', stars=5, car_id=car.id, parent_id=reply.id))
+
+    first = (await client.get(f'/cars/{car.id}/reviews', params={'limit': 2})).json()
+    second = (await client.get(f'/cars/{car.id}/reviews', params={'limit': 2, 'cursor': first['next_cursor']})).json()
+
+    assert [review['id'] for review in first['items']] == [roots[2].id, roots[1].id]
+    assert first['next_cursor'] == roots[1].id
+    assert first['items'][1]['sub_reviews'][0]['comment'] == 'Reply'
+    assert first['items'][1]['sub_reviews'][0]['sub_reviews'][0]['comment'] == 'Reply to reply'
+    assert [review['id'] for review in second['items']] == [roots[0].id]
+    assert second['next_cursor'] is None
+
+
+async def test_car_reviews_first_page_cache_invalidated(
+        client: AsyncClient,
+        reviews: tuple[ReviewIn],
+        db: AsyncSession,
+        cars: tuple[CarOut],
+):
+    review_db_1, _ = await prepare_reviews(db, reviews, cars)
+    response = await client.get(f'/cars/{review_db_1.car_id}/reviews')
+    assert [review['id'] for review in response.json()['items']] == [review_db_1.id]
+
+    created = await client.post('/reviews/', json={'comment': 'New review', 'stars': 5, 'car_id': review_db_1.car_id})
+
+    response = await client.get(f'/cars/{review_db_1.car_id}/reviews')
+    assert [review['id'] for review in response.json()['items']] == [created.json()['id'], review_db_1.id]
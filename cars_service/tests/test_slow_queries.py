@@ -0,0 +1,83 @@
+from httpx import AsyncClient
+from prometheus_client import REGISTRY
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+from tests.entity_creators import create_car
+
+from app.cars.schemas import CarFiltering, CarOut
+from app.config import get_settings
+from app.dao.car_filter import CarQueryBuilder
+from app.dao.slow_queries import get_slow_query_log
+
+
+ADMIN_HEADERS = {'X-Admin-Token': 'admin-secret'}
+
+
+@pytest.fixture
+def slow_query_settings(monkeypatch):
+    """Every query is slow and explained, the log starts empty."""
+    settings = get_settings()
+    monkeypatch.setattr(settings, 'ADMIN_SECRET', ADMIN_HEADERS['X-Admin-Token'])
+    monkeypatch.setattr(settings, 'SLOW_QUERY_THRESHOLD', 0.0)
+    monkeypatch.setattr(settings, 'SLOW_QUERY_EXPLAIN_SAMPLE_RATE', 1.0)
+    get_slow_query_log.cache_clear()
+    yield settings
+    get_slow_query_log.cache_clear()
+
+
+def slow_queries_count(shape: str) -> float:
+    return REGISTRY.get_sample_value('car_slow_queries_total', {'shape': shape}) or 0
+
+
+def test_query_shape():
+    builder = CarQueryBuilder(CarFiltering(engine='2.0L', status='active', year_start=2010))
+    builder.build_query()
+
+    assert builder.shape == 'engine,year_start,status'
+    assert CarQueryBuilder(CarFiltering()).shape == 'all'
+
+
+async def test_slow_query_is_logged_with_plan(
+        client: AsyncClient,
+        cars: tuple[CarOut],
+        db: AsyncSession,
+        slow_query_settings,
+):
+    cars[0].status = 'active'
+    await create_car(db, cars[0])
+    before = slow_queries_count('engine,status')
+
+    response = await client.get('/cars/', params={'status': 'active', 'engine': cars[0].engine})
+    slow_queries = (await client.get('/admin/slow-queries', headers=ADMIN_HEADERS)).json()
+
+    assert [car['id'] for car in response.json()] == [cars[0].id]
+    [stats] = slow_queries['stats']
+    assert stats['shape'] == 'engine,status'
+    assert stats['count'] == stats['slow'] == 1
+    assert stats['p95'] == stats['total'] > 0
+    [slow_query] = slow_queries['slow_queries']
+    assert slow_query['route'] == '/cars/'
+    assert sorted(slow_query['params'].values()) == sorted([cars[0].engine, 'active'])
+    assert {'Actual Total Time', 'Shared Hit Blocks'} <= slow_query['plan'][0]['Plan'].keys()
+    assert slow_queries_count('engine,status') == before + 1
+
+
+async def test_fast_queries_are_only_counted(client: AsyncClient, db: AsyncSession, slow_query_settings):
+    slow_query_settings.SLOW_QUERY_THRESHOLD = 60.0
+
+    await client.get('/cars/', params={'car_ids': [1, 2]})
+    await client.get('/cars/', params={'transmission': 'automatic'})
+    slow_queries = (await client.get('/admin/slow-queries', headers=ADMIN_HEADERS)).json()
+
+    assert {stats['shape']: stats['count'] for stats in slow_queries['stats']} == {'car_ids': 1, 'transmission': 1}
+    assert slow_queries['slow_queries'] == []
+
+
+@pytest.mark.parametrize(('secret', 'headers'), [('', {}), ('', {'X-Admin-Token': ''}), ('admin-secret', {})])
+async def test_slow_queries_require_admin_token(client: AsyncClient, monkeypatch, secret: str, headers: dict):
+    monkeypatch.setattr(get_settings(), 'ADMIN_SECRET', secret)
+
+    response = await client.get('/admin/slow-queries', headers=headers)
+    wrong_token = await client.get('/admin/slow-queries', headers={'X-Admin-Token': 'wrong'})
+
+    assert response.status_code == wrong_token.status_code == 403
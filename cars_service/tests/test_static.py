@@ -0,0 +1,110 @@
+import os
+from pathlib import Path
+
+from httpx import AsyncClient
+import pytest
+
+from app.config import get_settings
+from app.images.cleanup import remove_orphaned_images
+
+
+CONTENT = bytes(range(256)) * 4
+
+
+@pytest.fixture
+def content_addressed_image() -> Path:
+    path = Path(get_settings().STATIC_DIR) / ('a' * 32 + '-320w.webp')
+    path.write_bytes(CONTENT)
+    yield path
+    path.unlink()
+
+
+@pytest.fixture
+def other_image() -> Path:
+    path = Path(get_settings().STATIC_DIR) / 'AX2345AF.jpg'
+    path.write_bytes(CONTENT)
+    yield path
+    path.unlink()
+
+
+async def test_content_addressed_image_is_immutable(client: AsyncClient, content_addressed_image: Path):
+    response = await client.get(f'/static/{content_addressed_image.name}')
+
+    assert response.status_code == 200
+    assert response.content == CONTENT
+    assert response.headers['cache-control'] == 'public, max-age=31536000, immutable'
+    assert response.headers['etag'] == f'"{content_addressed_image.name}"'
+    assert response.headers['accept-ranges'] == 'bytes'
+
+
+async def test_not_modified(client: AsyncClient, content_addressed_image: Path):
+    etag = f'"{content_addressed_image.name}"'
+
+    response = await client.get(f'/static/{content_addressed_image.name}', headers={'If-None-Match': etag})
+
+    assert response.status_code == 304
+    assert response.content == b''
+    assert response.headers['etag'] == etag
+
+
+async def test_other_files_are_revalidated(client: AsyncClient, other_image: Path):
+    response = await client.get(f'/static/{other_image.name}')
+
+    assert response.status_code == 200
+    assert response.headers['cache-control'] == 'public, no-cache'
+    assert response.headers['etag'].startswith('"')
+
+
+@pytest.mark.parametrize(
+    ('range_header', 'content_range', 'content'),
+    [
+        ('bytes=0-9', 'bytes 0-9/1024', CONTENT[:10]),
+        ('bytes=1000-', 'bytes 1000-1023/1024', CONTENT[1000:]),
+        ('bytes=-4', 'bytes 1020-1023/1024', CONTENT[-4:]),
+        ('bytes=1020-5000', 'bytes 1020-1023/1024', CONTENT[1020:]),
+    ],
+)
+async def test_range(
+        client: AsyncClient,
+        content_addressed_image: Path,
+        range_header: str,
+        content_range: str,
+        content: bytes,
+):
+    response = await client.get(f'/static/{content_addressed_image.name}', headers={'Range': range_header})
+
+    assert response.status_code == 206
+    assert response.headers['content-range'] == content_range
+    assert response.content == content
+
+
+async def test_range_not_satisfiable(client: AsyncClient, content_addressed_image: Path):
+    response = await client.get(f'/static/{content_addressed_image.name}', headers={'Range': 'bytes=2000-'})
+
+    assert response.status_code == 416
+    assert response.headers['content-range'] == 'bytes */1024'
+
+
+async def test_range_ignored_for_changed_etag(client: AsyncClient, content_addressed_image: Path):
+    response = await client.get(
+        f'/static/{content_addressed_image.name}',
+        headers={'Range': 'bytes=0-9', 'If-Range': '"other"'},
+    )
+
+    assert response.status_code == 200
+    assert response.content == CONTENT
+
+
+async def test_remove_orphaned_images(static_dir: Path):
+    orphaned = static_dir / ('b' * 32 + '.jpg')
+    recent = static_dir / ('c' * 32 + '.jpg')
+    not_content_addressed = static_dir / 'AX2345AF.jpg'
+    for path in (orphaned, recent, not_content_addressed):
+        path.write_bytes(CONTENT)
+    os.utime(orphaned, (0, 0))
+    os.utime(not_content_addressed, (0, 0))
+
+    removed = await remove_orphaned_images()
+
+    assert removed == [orphaned.name]
+    assert sorted(path.name for path in static_dir.iterdir()) == sorted([recent.name, not_content_addressed.name])
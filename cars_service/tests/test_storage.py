@@ -0,0 +1,95 @@
+from pathlib import Path
+from unittest.mock import MagicMock
+from urllib.parse import parse_qs, urlparse
+
+import boto3
+from moto import mock_s3
+import pytest
+
+from app.config import get_settings
+from app.images.storage import get_image_name, get_image_url, IMMUTABLE_CACHE_CONTROL, S3ImageStorage
+
+
+BUCKET = 'car-images'
+
+
+@pytest.fixture
+def s3_client():
+    with mock_s3():
+        client = boto3.client('s3', region_name='us-east-1')
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+
+@pytest.fixture
+def s3_storage(s3_client) -> S3ImageStorage:
+    return S3ImageStorage(s3_client, BUCKET, url_expires=60, part_size=5 * 1024 * 1024)
+
+
+async def test_s3_store_multipart(s3_client, s3_storage: S3ImageStorage, tmp_path: Path):
+    content = b'0123456789' * 1024 * 1024
+    path = tmp_path / 'upload'
+    path.write_bytes(content)
+
+    await s3_storage.store(str(path), 'a' * 32 + '.jpg')
+
+    stored = s3_client.get_object(Bucket=BUCKET, Key='a' * 32 + '.jpg')
+    assert stored['Body'].read() == content
+    assert stored['ContentType'] == 'image/jpeg'
+    assert stored['CacheControl'] == IMMUTABLE_CACHE_CONTROL
+    # Multipart uploads get an ETag with the number of parts
+    assert stored['ETag'].endswith('-2"')
+    assert not path.exists()
+
+
+async def test_s3_list_and_delete(s3_client, s3_storage: S3ImageStorage):
+    for name in ('a.jpg', 'b.webp'):
+        s3_client.put_object(Bucket=BUCKET, Key=name, Body=b'image')
+
+    assert sorted(name for name, _ in await s3_storage.list_images()) == ['a.jpg', 'b.webp']
+
+    await s3_storage.delete('a.jpg')
+    await s3_storage.delete('missing.jpg')
+
+    assert [name for name, _ in await s3_storage.list_images()] == ['b.webp']
+
+
+def test_s3_presigned_url(s3_storage: S3ImageStorage):
+    url = urlparse(s3_storage.url('a.jpg'))
+
+    assert url.netloc.startswith(BUCKET)
+    assert url.path == '/a.jpg'
+    assert {'Signature', 'Expires'} <= parse_qs(url.query).keys()
+
+
+def test_s3_presigned_url_reused_for_half_of_its_lifetime(s3_client, monkeypatch):
+    client = MagicMock(wraps=s3_client)
+    storage = S3ImageStorage(client, BUCKET, url_expires=60)
+    monkeypatch.setattr('app.images.storage.time.monotonic', lambda: 1000.0)
+    url = storage.url('a.jpg')
+    monkeypatch.setattr('app.images.storage.time.monotonic', lambda: 1029.0)
+    reused = storage.url('a.jpg')
+    other = storage.url('b.jpg')
+    monkeypatch.setattr('app.images.storage.time.monotonic', lambda: 1030.0)
+    storage.url('a.jpg')
+
+    assert reused == url != other
+    assert [call.kwargs['Params']['Key'] for call in client.generate_presigned_url.call_args_list] == [
+        'a.jpg', 'b.jpg', 'a.jpg',
+    ]
+
+
+def test_s3_public_url(s3_client):
+    storage = S3ImageStorage(s3_client, BUCKET, public_url='https://cdn.example.com/cars/')
+
+    assert storage.url('a.jpg') == 'https://cdn.example.com/cars/a.jpg'
+
+
+def test_image_names_and_urls(static_dir: Path):
+    static_url = get_settings().STATIC_URL
+
+    assert get_image_name(static_url + 'a.jpg') == 'a.jpg'
+    assert get_image_name('a.jpg') == 'a.jpg'
+    assert get_image_name('https://example.com/a.jpg') is None
+    assert get_image_url('a.jpg') == static_url + 'a.jpg'
+    assert get_image_url('https://example.com/a.jpg') == 'https://example.com/a.jpg'
@@ -0,0 +1,79 @@
+import json
+
+import httpx
+from httpx import AsyncClient
+from opentelemetry import trace
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.trace import SpanKind
+from service_common.tracing import OTLPFileSpanExporter
+from sqlalchemy.ext.asyncio import AsyncSession
+from tests.entity_creators import create_car
+from tests.test_trip import create_channel_pool_mock
+
+from app.cars.schemas import CarOut
+from app.dao.car import is_car_station_exists
+from app.trip.tasks import TripScheduler
+
+
+TRACE_ID = '4bf92f3577b34da6a3ce929d0e0e4736'
+PARENT_ID = '00f067aa0ba902b7'
+
+
+async def test_request_continues_caller_trace(
+        client: AsyncClient,
+        cars: tuple[CarOut],
+        db: AsyncSession,
+        span_exporter: InMemorySpanExporter,
+):
+    await create_car(db, cars[0])
+
+    await client.get(f'/cars/{cars[0].id}', headers={'traceparent': f'00-{TRACE_ID}-{PARENT_ID}-01'})
+
+    server_span = next(span for span in span_exporter.get_finished_spans() if span.kind == SpanKind.SERVER)
+    assert server_span.name == 'GET /cars/{car_id}'
+    assert format(server_span.context.trace_id, '032x') == TRACE_ID
+    assert format(server_span.parent.span_id, '016x') == PARENT_ID
+    assert server_span.attributes['http.response.status_code'] == 200
+
+
+async def test_outgoing_request_carries_trace_context(monkeypatch, span_exporter: InMemorySpanExporter):
+    sent: list[httpx.Request] = []
+
+    async def handle_async_request(transport, request: httpx.Request) -> httpx.Response:
+        sent.append(request)
+        return httpx.Response(200)
+
+    monkeypatch.setattr(httpx.AsyncHTTPTransport, 'handle_async_request', handle_async_request)
+
+    assert await is_car_station_exists(1)
+
+    [span] = span_exporter.get_finished_spans()
+    assert span.kind == SpanKind.CLIENT
+    assert span.name == 'GET test-car-service-host'
+    assert sent[0].headers['traceparent'].startswith(f'00-{span.context.trace_id:032x}-{span.context.span_id:016x}-')
+
+
+async def test_trip_messages_carry_trace_context(span_exporter: InMemorySpanExporter):
+    channel_pool, channel = create_channel_pool_mock()
+    scheduler = TripScheduler(channel_pool, 'test')
+    scheduler.add_trip('AA1111AA')
+
+    await scheduler.tick()
+    await scheduler.stop()
+
+    [span] = span_exporter.get_finished_spans()
+    message = channel.default_exchange.publish.await_args.args[0]
+    assert span.kind == SpanKind.PRODUCER
+    assert message.headers['traceparent'].startswith(f'00-{span.context.trace_id:032x}-{span.context.span_id:016x}-')
+
+
+def test_file_exporter_writes_otlp_json(tmp_path, span_exporter: InMemorySpanExporter):
+    with trace.get_tracer(__name__).start_as_current_span('test'):
+        pass
+    path = tmp_path / 'traces.jsonl'
+
+    OTLPFileSpanExporter(str(path)).export(span_exporter.get_finished_spans())
+
+    [line] = path.read_text().splitlines()
+    [resource_spans] = json.loads(line)['resourceSpans']
+    assert resource_spans['scopeSpans'][0]['spans'][0]['name'] == 'test'
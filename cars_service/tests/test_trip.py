@@ -1,12 +1,284 @@
-from unittest.mock import patch
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock
 
+from aio_pika import DeliveryMode
 from httpx import AsyncClient
+from prometheus_client import REGISTRY
+import pytest
+from service_common.coordinates import CODECS, CoordinateMessage
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 
+from app.config import get_settings
+from app.models import TripPosition
+from app.rabbit_connection import close_pools, create_channel_pool, create_connection_pool
+from app.trip.downsampling import downsample
+from app.trip.history import TripHistoryWriter
+from app.trip.tasks import get_trip_scheduler, TripScheduler
 
-async def test_run_trip(client: AsyncClient):
-    with patch('app.trip.router.start_trip') as start_trip_mock:
-        response = await client.post('/trip/', params={'car_number': '1'})
 
+HISTORY_RECORDED_AT = datetime(2001, 1, 1, 12, tzinfo=timezone.utc)
+
+
+def create_channel_pool_mock() -> tuple[MagicMock, MagicMock]:
+    channel = MagicMock()
+    channel.default_exchange.publish = AsyncMock()
+    channel_pool = MagicMock()
+    channel_pool.acquire.return_value.__aenter__.return_value = channel
+    return channel_pool, channel
+
+
+def trip_messages_count(result: str) -> float:
+    return REGISTRY.get_sample_value('trip_messages_published_total', {'result': result}) or 0
+
+
+async def test_run_trip(client: AsyncClient, app):
+    channel_pool, _ = create_channel_pool_mock()
+    scheduler = TripScheduler(channel_pool, 'test')
+    app.dependency_overrides[get_trip_scheduler] = lambda: scheduler
+
+    response = await client.post('/trip/', params={'car_number': 'AA1111AA'})
+
+    app.dependency_overrides.pop(get_trip_scheduler)
     assert response.status_code == 200
-    assert response.json() == {'message': 'Start trip for car 1'}
-    start_trip_mock.assert_called()
+    assert response.json() == {'message': 'Start trip for car AA1111AA'}
+    assert scheduler.active_trips == {'AA1111AA': 5}
+
+
+@pytest.mark.parametrize('car_number', ['1', 'AA1111AA' * 3])
+async def test_run_trip_validates_car_number(client: AsyncClient, app, car_number: str):
+    channel_pool, _ = create_channel_pool_mock()
+    scheduler = TripScheduler(channel_pool, 'test')
+    app.dependency_overrides[get_trip_scheduler] = lambda: scheduler
+
+    response = await client.post('/trip/', params={'car_number': car_number})
+
+    app.dependency_overrides.pop(get_trip_scheduler)
+    assert response.status_code == 422
+    assert scheduler.active_trips == {}
+
+
+async def test_trip_lifecycle(client: AsyncClient, app):
+    channel_pool, _ = create_channel_pool_mock()
+    scheduler = TripScheduler(channel_pool, 'test', max_active_trips=1)
+    app.dependency_overrides[get_trip_scheduler] = lambda: scheduler
+
+    started = await client.post('/trip/', params={'car_number': 'AA1111AA'})
+    duplicate = await client.post('/trip/', params={'car_number': 'AA1111AA'})
+    over_limit = await client.post('/trip/', params={'car_number': 'AA2222AA'})
+    trips = await client.get('/trip/')
+    status = await client.get('/trip/AA1111AA')
+    stopped = await client.delete('/trip/AA1111AA')
+    missing = await client.get('/trip/AA1111AA')
+    stopped_again = await client.delete('/trip/AA1111AA')
+
+    app.dependency_overrides.pop(get_trip_scheduler)
+    assert started.status_code == 200
+    assert duplicate.status_code == 409
+    assert over_limit.status_code == 429
+    assert [trip['car_number'] for trip in trips.json()] == ['AA1111AA']
+    assert status.json()['messages_left'] == 5
+    assert stopped.status_code == 204
+    assert missing.status_code == 404
+    assert stopped_again.status_code == 404
+    assert scheduler.active_trips == {}
+
+
+async def test_trip_scheduler_publishes_all_trips_in_batches():
+    channel_pool, channel = create_channel_pool_mock()
+    scheduler = TripScheduler(channel_pool, 'test', messages_count=2, batch_size=2)
+    for car_number in ('AA1111AA', 'AA2222AA', 'AA3333AA'):
+        scheduler.add_trip(car_number)
+
+    await scheduler.tick()
+    await scheduler.tick()
+    await scheduler.stop()
+
+    assert channel.default_exchange.publish.await_count == 6
+    assert channel_pool.acquire.call_count == 4
+    assert scheduler.active_trips == {}
+
+
+async def test_trip_scheduler_counts_batch_that_failed_to_publish(caplog):
+    channel_pool, channel = create_channel_pool_mock()
+    channel_pool.acquire.return_value.__aenter__.side_effect = ConnectionError('broker is down')
+    scheduler = TripScheduler(channel_pool, 'test')
+    scheduler.add_trip('AA1111AA')
+    before = trip_messages_count('failed')
+
+    await scheduler.tick()
+    await scheduler.stop()
+
+    assert trip_messages_count('failed') == before + 1
+    assert 'Failed to publish a batch of 1 trip messages' in caplog.text
+
+
+async def test_trip_scheduler_bounds_pending_batches():
+    channel_pool, channel = create_channel_pool_mock()
+    confirmed = asyncio.Event()
+
+    async def publish(*args, **kwargs):
+        await confirmed.wait()
+
+    channel.default_exchange.publish.side_effect = publish
+    scheduler = TripScheduler(channel_pool, 'test', batch_size=1, max_pending_batches=2)
+    for car_number in ('AA1111AA', 'AA2222AA', 'AA3333AA'):
+        scheduler.add_trip(car_number)
+
+    tick = asyncio.create_task(scheduler.tick())
+    await asyncio.sleep(0.01)
+
+    assert not tick.done()
+    assert channel.default_exchange.publish.await_count == 2
+    confirmed.set()
+    await tick
+    await scheduler.stop()
+    assert channel.default_exchange.publish.await_count == 3
+
+
+async def test_trip_scheduler_publishes_with_codec_content_type():
+    channel_pool, channel = create_channel_pool_mock()
+    scheduler = TripScheduler(channel_pool, 'test', codec=CODECS['msgpack'], persistent=False)
+    scheduler.add_trip('AA1111AA')
+
+    await scheduler.tick()
+    await scheduler.stop()
+
+    published = channel.default_exchange.publish.await_args.args[0]
+    assert published.content_type == 'application/msgpack'
+    assert published.delivery_mode == DeliveryMode.NOT_PERSISTENT
+    assert CODECS['msgpack'].decode(published.body).car_number == 'AA1111AA'
+
+
+async def test_rabbit_pools_use_running_loop():
+    connection_pool = create_connection_pool()
+    channel_pool = create_channel_pool(connection_pool)
+
+    assert connection_pool.loop is asyncio.get_running_loop()
+    assert channel_pool.loop is asyncio.get_running_loop()
+
+    await close_pools(channel_pool, connection_pool)
+    assert channel_pool.is_closed
+    assert connection_pool.is_closed
+
+
+def test_downsample_keeps_turning_points():
+    points = [MagicMock(latitude=0, longitude=float(x)) for x in range(10)]
+    points += [MagicMock(latitude=float(y), longitude=9) for y in range(1, 10)]
+
+    result = downsample(points, 3)
+
+    assert result == [points[0], points[9], points[-1]]
+
+
+def test_downsample_returns_short_track_as_is():
+    points = [MagicMock(latitude=0, longitude=float(x)) for x in range(3)]
+
+    assert downsample(points, 5) == points
+
+
+async def test_trip_history(client: AsyncClient, db: AsyncSession):
+    start = datetime(2023, 9, 1, tzinfo=timezone.utc)
+    await db.execute(insert(TripPosition).values([
+        {'car_number': 'AA1111AA', 'latitude': 0, 'longitude': minute, 'recorded_at': start + timedelta(minutes=minute)}
+        for minute in range(10)
+    ]))
+    await db.commit()
+
+    response = await client.get(
+        '/trip/AA1111AA/history',
+        params={'from': start.isoformat(), 'to': (start + timedelta(hours=1)).isoformat(), 'max_points': 2},
+    )
+
+    assert response.status_code == 200
+    assert response.json()['total_points'] == 10
+    assert [point['longitude'] for point in response.json()['points']] == [0, 9]
+
+
+async def test_trip_history_takes_naive_dates_as_utc(client: AsyncClient, db: AsyncSession):
+    start = datetime.now(timezone.utc) - timedelta(hours=2)
+    await db.execute(insert(TripPosition).values([
+        {'car_number': 'AA2222AA', 'latitude': 0, 'longitude': minute, 'recorded_at': start + timedelta(minutes=minute)}
+        for minute in range(3)
+    ]))
+    await db.commit()
+    naive_from = (start - timedelta(minutes=1)).replace(tzinfo=None).isoformat()
+
+    response = await client.get('/trip/AA2222AA/history', params={'from': naive_from})
+    naive_to = await client.get('/trip/AA2222AA/history', params={'to': naive_from})
+
+    assert response.status_code == 200
+    assert response.json()['total_points'] == 3
+    assert naive_to.status_code == 200
+    assert naive_to.json()['total_points'] == 0
+
+
+async def test_trip_history_validates_period(client: AsyncClient):
+    response = await client.get('/trip/AA1111AA/history', params={'from': '2023-09-02', 'to': '2023-09-01'})
+
+    assert response.status_code == 422
+
+
+@pytest.fixture
+async def history_engine():
+    """Engine of history tests, the day partition they write to is dropped afterwards."""
+    engine = create_async_engine(get_settings().DATABASE_URL)
+    yield engine
+    async with engine.begin() as conn:
+        await conn.execute(text(f'DROP TABLE IF EXISTS trip_positions_{HISTORY_RECORDED_AT:%Y%m%d}'))
+    await engine.dispose()
+
+
+async def stored_positions(engine, car_numbers: list[str]) -> list[tuple[str, float]]:
+    async with engine.connect() as conn:
+        query = select(TripPosition.car_number, TripPosition.latitude).where(TripPosition.car_number.in_(car_numbers))
+        return (await conn.execute(query.order_by(TripPosition.car_number))).all()
+
+
+def trip_history_rows_count(result: str) -> float:
+    return REGISTRY.get_sample_value('trip_history_rows_total', {'result': result}) or 0
+
+
+async def test_trip_history_writer_copies_positions(history_engine):
+    writer = TripHistoryWriter(history_engine)
+    writer.add([CoordinateMessage(car_number='ZZ9998ZZ', latitude=1, longitude=2)], HISTORY_RECORDED_AT)
+    await writer.flush()
+    # The partition is known by now, the second flush only copies
+    writer.add([CoordinateMessage(car_number='ZZ9999ZZ', latitude=3, longitude=4)], HISTORY_RECORDED_AT)
+    await writer.flush()
+
+    async with history_engine.connect() as conn:
+        partition = await conn.scalar(select(func.to_regclass(f'trip_positions_{HISTORY_RECORDED_AT:%Y%m%d}')))
+    assert await stored_positions(history_engine, ['ZZ9998ZZ', 'ZZ9999ZZ']) == [('ZZ9998ZZ', 1.0), ('ZZ9999ZZ', 3.0)]
+    assert partition is not None
+
+
+async def test_trip_history_writer_drops_only_rejected_positions(history_engine):
+    writer = TripHistoryWriter(history_engine)
+    car_numbers = ['ZZ0001ZZ', 'Z' * 17, 'ZZ0002ZZ', 'ZZ0003ZZ']
+    writer.add(
+        [CoordinateMessage(car_number=car_number, latitude=1, longitude=2) for car_number in car_numbers],
+        HISTORY_RECORDED_AT,
+    )
+    rejected = trip_history_rows_count('rejected')
+
+    await writer.flush()
+
+    assert await stored_positions(history_engine, car_numbers) == [
+        ('ZZ0001ZZ', 1.0), ('ZZ0002ZZ', 1.0), ('ZZ0003ZZ', 1.0),
+    ]
+    assert trip_history_rows_count('rejected') == rejected + 1
+
+
+async def test_trip_history_writer_keeps_positions_of_failed_flush(history_engine, monkeypatch):
+    writer = TripHistoryWriter(history_engine)
+    writer.add([CoordinateMessage(car_number='ZZ0004ZZ', latitude=1, longitude=2)], HISTORY_RECORDED_AT)
+    monkeypatch.setattr(writer, '_copy', AsyncMock(side_effect=ConnectionError))
+
+    with pytest.raises(ConnectionError):
+        await writer.flush()
+    monkeypatch.undo()
+    await writer.flush()
+
+    assert await stored_positions(history_engine, ['ZZ0004ZZ']) == [('ZZ0004ZZ', 1.0)]
@@ -1,12 +1,21 @@
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+from service_common.instrumentation import instrument_app
+from service_common.profiling import init_profiling
+from service_common.tracing import init_tracing
 
 from app.car_stations.router import router as car_stations_router
+from app.config import get_settings
 from app.redis_client import get_redis_client
 
 
 def create_app() -> FastAPI:
-    app = FastAPI()
+    settings = get_settings()
+    app = FastAPI(default_response_class=ORJSONResponse)
     app.include_router(car_stations_router)
+    instrument_app(app)
+    init_tracing(app, 'geo_service', settings)
+    init_profiling(app, settings)
 
     @app.on_event("shutdown")
     async def shutdown_event():
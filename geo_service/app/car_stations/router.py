@@ -1,4 +1,5 @@
 from fastapi import APIRouter, HTTPException, Response
+from service_common.etag import ETagRoute
 
 from app.car_stations.schemas import CarStationIn, CarStationOut, CarStationUpdate
 from app.custom_exceptions import NotFoundError
@@ -12,7 +13,7 @@ from app.service.car_station import (
 from app.redis_client import db_dependency
 
 
-router = APIRouter(prefix='/car-station', tags=['Car Station'])
+router = APIRouter(prefix='/car-station', tags=['Car Station'], route_class=ETagRoute)
 
 
 @router.get('/', response_model=list[CarStationOut])
@@ -3,6 +3,9 @@ import re
 from pydantic import BaseModel, Field, field_validator, ConfigDict
 
 
+WORKING_HOURS_PATTERN = re.compile(r'^\d{2}:\d{2}-\d{2}:\d{2}$')
+
+
 class CarStationOut(BaseModel):
     name: str
     address: str
@@ -43,8 +46,6 @@ class CarStationUpdate(BaseModel):
 
 
 def _validate_format(value):
-    pattern = r'^\d{2}:\d{2}-\d{2}:\d{2}$'
-
-    if re.match(pattern, value):
+    if WORKING_HOURS_PATTERN.match(value):
         return value
     raise ValueError('Must be such format H:M-H:M')
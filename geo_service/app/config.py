@@ -1,4 +1,5 @@
 from functools import lru_cache
+from typing import Literal
 
 from dotenv import load_dotenv
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -12,6 +13,17 @@ class Settings(BaseSettings):
     REDIS_PORT: int
     REDIS_DB: int
 
+    TRACING_EXPORTER: Literal['none', 'file'] = 'none'
+    TRACING_FILE: str = 'traces.jsonl'
+    TRACING_SAMPLE_RATIO: float = 1.0
+
+    PROFILING_ENABLED: bool = False
+    PROFILING_SAMPLE_RATE: float = 0.01
+    PROFILING_SECRET: str = ''
+    PROFILING_DIR: str = 'profiles'
+    PROFILING_KEEP_PER_ROUTE: int = 20
+    PROFILING_INTERVAL: float = 0.001
+
     model_config = SettingsConfigDict(case_sensitive=True, frozen=True, env_file='.env')
 
 
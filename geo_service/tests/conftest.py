@@ -1,3 +1,4 @@
+import os
 import uuid
 from asyncio import AbstractEventLoop, get_event_loop_policy
 from functools import lru_cache
@@ -10,10 +11,24 @@ from polyfactory.pytest_plugin import register_fixture
 import pytest
 from fakeredis import aioredis
 from app.redis_client import get_redis_client
-from app.main import create_app
+from app import create_app
 from app.car_stations.schemas import CarStationIn
 
 
+pytest_plugins = ['service_common.benchmarks']
+
+
+def pytest_configure(config: pytest.Config):
+    """
+    Allows plugins and conftest files to perform initial configuration.
+    This hook is called for every plugin and initial conftest
+    file after command line options have been parsed.
+    """
+    os.environ['REDIS_HOST'] = 'localhost'
+    os.environ['REDIS_PORT'] = '6379'
+    os.environ['REDIS_DB'] = '0'
+
+
 @pytest.fixture(scope='session')
 def event_loop() -> AbstractEventLoop:
     """Create an instance of the default event loop for each test case."""
@@ -0,0 +1,36 @@
+import json
+
+from app.car_stations.schemas import _validate_format, CarStationIn, CarStationOut
+
+
+BUDGETS = {
+    'validate_format': 10e-6,
+    'car_station_in': 60e-6,
+    'car_station_out_from_json': 60e-6,
+}
+
+CAR_STATION = {
+    'name': 'Central',
+    'address': 'Khreshchatyk 1',
+    'working_hours': '08:00-20:00',
+    'latitude': 50.45,
+    'longitude': 30.52,
+    'city': 'Kyiv',
+}
+
+
+def test_validate_format(benchmark, assert_within_budget):
+    assert benchmark(_validate_format, '08:00-20:00') == '08:00-20:00'
+    assert_within_budget(BUDGETS['validate_format'])
+
+
+def test_car_station_in(benchmark, assert_within_budget):
+    car_station = benchmark(CarStationIn.model_validate, CAR_STATION)
+    assert car_station.working_hours == '08:00-20:00'
+    assert_within_budget(BUDGETS['car_station_in'])
+
+
+def test_car_station_out_from_json(benchmark, assert_within_budget):
+    car_station = benchmark(CarStationOut.model_validate_json, json.dumps(CAR_STATION))
+    assert car_station.city == 'Kyiv'
+    assert_within_budget(BUDGETS['car_station_out_from_json'])
@@ -20,6 +20,15 @@ async def test_get_car_stations(client: AsyncClient, car_stations: list[tuple[st
     assert response.json() == [car_stations[0][1].model_dump()]
 
 
+async def test_get_car_stations_not_modified(client: AsyncClient, car_stations: list[tuple[str, CarStationIn]]):
+    etag = (await client.get('/car-station/')).headers['etag']
+
+    response = await client.get('/car-station/', headers={'If-None-Match': etag})
+
+    assert response.status_code == 304
+    assert response.headers['etag'] == etag
+
+
 async def test_delete_cart_station(client: AsyncClient, car_stations: list[tuple[str, CarStationIn]]):
     response = await client.delete(f'/car-station/{car_stations[0][0]}')
 
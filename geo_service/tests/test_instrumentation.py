@@ -0,0 +1,21 @@
+from fakeredis import aioredis
+from prometheus_client import REGISTRY
+from service_common.instrumentation.redis import InstrumentedRedis
+
+
+def get_redis_calls(operation: str) -> float:
+    labels = {'client': 'redis', 'operation': operation, 'target': 'localhost:6379/0'}
+    return REGISTRY.get_sample_value('client_request_duration_seconds_count', labels) or 0
+
+
+async def test_redis_commands_timed_by_name():
+    client = InstrumentedRedis(connection_pool=aioredis.FakeRedis(host='localhost').connection_pool)
+    sets, pipelines = get_redis_calls('SET'), get_redis_calls('PIPELINE')
+
+    await client.set('key', 'value')
+    async with client.pipeline() as pipe:
+        await pipe.get('key').delete('key').execute()
+
+    assert get_redis_calls('SET') == sets + 1
+    assert get_redis_calls('PIPELINE') == pipelines + 1
+    assert get_redis_calls('GET') == 0
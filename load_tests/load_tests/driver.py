@@ -0,0 +1,95 @@
+import asyncio
+from collections import defaultdict
+from dataclasses import dataclass
+import time
+from typing import Protocol
+
+import httpx
+
+
+@dataclass
+class Targets:
+    cars: str = 'http://localhost:8000'
+    orders: str = 'http://localhost:8001'
+    geo: str = 'http://localhost:8002'
+    auth: str = 'http://localhost:8003'
+    websocket: str = 'http://localhost:8004'
+    geo_redis: str = 'redis://localhost:6379/0'
+
+
+class Recorder:
+    """Latencies and errors of every operation, a request is an error when its status is not the expected one."""
+
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+
+    def add(self, operation: str, latency: float, ok: bool):
+        self.latencies[operation].append(latency)
+        if not ok:
+            self.errors[operation] += 1
+
+
+class Session:
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, targets: Targets):
+        self.client = client
+        self.targets = targets
+        self._recorder = recorder
+
+    async def request(
+            self,
+            operation: str,
+            method: str,
+            url: str,
+            expected: tuple[int, ...] = (200,),
+            **kwargs,
+    ) -> httpx.Response | None:
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self._recorder.add(operation, time.perf_counter() - started, False)
+            return None
+        self._recorder.add(operation, time.perf_counter() - started, response.status_code in expected)
+        return response
+
+
+class Scenario(Protocol):
+    name: str
+
+    async def setup(self, session: Session):
+        """Seeds data the steps need, runs once before the workers start and is not measured."""
+
+    async def step(self, session: Session, worker: int):
+        """One iteration of a worker, every request of it goes through session.request."""
+
+
+async def run_scenario(
+        scenario: Scenario,
+        targets: Targets,
+        concurrency: int = 10,
+        duration: float = 30.0,
+        warmup: float = 3.0,
+        transport: httpx.AsyncBaseTransport | None = None,
+) -> tuple[Recorder, float]:
+    """
+    Workers repeat the scenario step as fast as responses come back (closed model).
+    Samples of the warmup period are dropped, returns the recorder and the measured time.
+    """
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=30, transport=transport) as client:
+        await scenario.setup(Session(client, Recorder(), targets))
+
+        recorder = Recorder()
+        loop = asyncio.get_running_loop()
+        measure_from = loop.time() + warmup
+        deadline = measure_from + duration
+
+        async def work(worker: int):
+            warmup_session = Session(client, Recorder(), targets)
+            session = Session(client, recorder, targets)
+            while (now := loop.time()) < deadline:
+                await scenario.step(session if now >= measure_from else warmup_session, worker)
+
+        await asyncio.gather(*(work(worker) for worker in range(concurrency)))
+        return recorder, loop.time() - measure_from
@@ -0,0 +1,106 @@
+"""Latency percentiles and throughput of a run, saved as JSON so runs of two commits can be compared."""
+from datetime import datetime, timezone
+import json
+import math
+import subprocess
+from typing import TextIO
+
+from load_tests.driver import Recorder
+
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(sorted_values: list[float], rank: float) -> float:
+    """Nearest rank, so the value was actually observed."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(rank / 100 * len(sorted_values)) - 1)]
+
+
+def build_report(scenario: str, recorder: Recorder, elapsed: float, concurrency: int) -> dict:
+    operations = {}
+    for operation, latencies in sorted(recorder.latencies.items()):
+        latencies = sorted(latencies)
+        operations[operation] = {
+            'requests': len(latencies),
+            'errors': recorder.errors.get(operation, 0),
+            'throughput': len(latencies) / elapsed,
+            **{f'p{rank}': percentile(latencies, rank) * 1000 for rank in PERCENTILES},
+            'max': latencies[-1] * 1000,
+        }
+    return {
+        'scenario': scenario,
+        'commit': _current_commit(),
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'concurrency': concurrency,
+        'elapsed': elapsed,
+        'operations': operations,
+    }
+
+
+def write_report(report: dict, out: TextIO):
+    out.write(f'{report["scenario"]} @ {report["commit"] or "unknown commit"}, '
+              f'{report["concurrency"]} workers, {report["elapsed"]:.1f}s\n')
+    out.write(f'{"operation":<36}{"req/s":>10}{"errors":>8}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}{"max ms":>10}\n')
+    for operation, stats in report['operations'].items():
+        out.write(
+            f'{operation:<36}{stats["throughput"]:>10.1f}{stats["errors"]:>8}{stats["p50"]:>10.2f}'
+            f'{stats["p95"]:>10.2f}{stats["p99"]:>10.2f}{stats["max"]:>10.2f}\n'
+        )
+
+
+def compare_reports(baseline: dict, current: dict, threshold: float = 0.1) -> list[str]:
+    """
+    Returns regressions of operations present in both runs: a percentile grown or the throughput fallen
+    by more than the threshold, or errors where the baseline had none.
+    """
+    regressions = []
+    for operation, stats in current['operations'].items():
+        base = baseline['operations'].get(operation)
+        if base is None:
+            continue
+        for rank in PERCENTILES:
+            key = f'p{rank}'
+            if base[key] and stats[key] > base[key] * (1 + threshold):
+                regressions.append(f'{operation} {key} {base[key]:.2f} -> {stats[key]:.2f} ms')
+        if base['throughput'] and stats['throughput'] < base['throughput'] * (1 - threshold):
+            regressions.append(f'{operation} throughput {base["throughput"]:.1f} -> {stats["throughput"]:.1f} req/s')
+        if stats['errors'] and not base['errors']:
+            regressions.append(f'{operation} errors 0 -> {stats["errors"]}')
+    return regressions
+
+
+def write_comparison(baseline: dict, current: dict, out: TextIO):
+    out.write(f'{baseline["commit"] or "baseline"} -> {current["commit"] or "current"}\n')
+    out.write(f'{"operation":<36}{"req/s":>16}{"p50 ms":>16}{"p95 ms":>16}{"p99 ms":>16}\n')
+    for operation, stats in current['operations'].items():
+        base = baseline['operations'].get(operation)
+        if base is None:
+            continue
+        cells = [_change(base[key], stats[key]) for key in ('throughput', 'p50', 'p95', 'p99')]
+        out.write(f'{operation:<36}' + ''.join(f'{cell:>16}' for cell in cells) + '\n')
+
+
+def save_report(report: dict, path: str):
+    with open(path, 'w') as file:
+        json.dump(report, file, indent=2)
+
+
+def load_report(path: str) -> dict:
+    with open(path) as file:
+        return json.load(file)
+
+
+def _change(before: float, after: float) -> str:
+    if not before:
+        return f'{after:.2f}'
+    return f'{after:.2f} ({(after - before) / before:+.0%})'
+
+
+def _current_commit() -> str | None:
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
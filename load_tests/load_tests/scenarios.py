@@ -0,0 +1,243 @@
+"""Hot paths of the services. Operations are named by method and route template so reports of runs line up."""
+import asyncio
+from contextlib import suppress
+from datetime import datetime, timedelta
+import json
+import random
+import struct
+import zlib
+
+import httpx
+import redis.asyncio as redis
+
+from load_tests.driver import Scenario, Session, Targets
+
+
+USER = {
+    'user_name': 'load-test',
+    'first_name': 'Load',
+    'last_name': 'Test',
+    'password': 'load-test',
+    'phone': '+380000000000',
+    'passport': 'LT0000',
+}
+# Far from uuids the geo service gives stations, integer ids are what cars refer to
+STATION_ID_START = 900_000
+
+
+class CarSearch:
+    """Car listing with the filter combinations of the catalogue page, and car details."""
+
+    name = 'car_search'
+
+    def __init__(self, cars: int = 200):
+        self._cars = cars
+        self._car_ids: list[int] = []
+
+    async def setup(self, session: Session):
+        self._car_ids = await seed_cars(session, self._cars)
+
+    async def step(self, session: Session, worker: int):
+        filters = random.choice((
+            {'status': 'active'},
+            {'transmission': 'automatic', 'year_start': 2015, 'year_end': 2020},
+            {'rental_cost_start': 100, 'rental_cost_end': 300, 'status': 'active'},
+            {'engine': '2.0L'},
+            {'car_ids': random.sample(self._car_ids, min(10, len(self._car_ids)))},
+        ))
+        await session.request('GET /cars/', 'GET', f'{session.targets.cars}/cars/', params=filters)
+        car_id = random.choice(self._car_ids)
+        await session.request('GET /cars/{car_id}', 'GET', f'{session.targets.cars}/cars/{car_id}')
+
+
+class OrderCreation:
+    """
+    Orders a free car. The order service marks ordered cars busy through its outbox after the response,
+    so a car is set active again once that has happened and only then goes back to the pool.
+    The pool has to cover the order rate times the release delay, otherwise workers wait for cars.
+    """
+
+    name = 'order_creation'
+
+    def __init__(self, cars: int = 200, release_delay: float = 3.0):
+        self._cars = cars
+        self._release_delay = release_delay
+        self._free_cars: asyncio.Queue[int] = asyncio.Queue()
+        self._releases: set[asyncio.Task] = set()
+        self._token = ''
+
+    async def setup(self, session: Session):
+        for car_id in await seed_cars(session, self._cars):
+            self._free_cars.put_nowait(car_id)
+        self._token = await get_token(session)
+
+    async def step(self, session: Session, worker: int):
+        car_id = await self._free_cars.get()
+        start = datetime.now() + timedelta(days=1)
+        order = {
+            'rental_date_start': start.isoformat(),
+            'rental_date_end': (start + timedelta(days=2)).isoformat(),
+            'prepayment': 0,
+            'status': 'reservation',
+            'order_cars': [car_id],
+        }
+        await session.request(
+            'POST /orders/',
+            'POST',
+            f'{session.targets.orders}/orders/',
+            (201,),
+            json=order,
+            headers={'auth-token': self._token},
+        )
+        task = asyncio.create_task(self._release(session, car_id))
+        self._releases.add(task)
+        task.add_done_callback(self._releases.discard)
+
+    async def _release(self, session: Session, car_id: int):
+        await asyncio.sleep(self._release_delay)
+        with suppress(httpx.HTTPError, RuntimeError):
+            await session.client.patch(
+                f'{session.targets.cars}/cars/car-status/', params={'car_ids': [car_id]}, json={'status': 'active'},
+            )
+            self._free_cars.put_nowait(car_id)
+
+
+class TokenValidation:
+    """The check every order request makes against the auth service."""
+
+    name = 'token_validation'
+
+    def __init__(self):
+        self._token = ''
+
+    async def setup(self, session: Session):
+        self._token = await get_token(session)
+
+    async def step(self, session: Session, worker: int):
+        await session.request(
+            'GET /auth/is-user-logged-in',
+            'GET',
+            f'{session.targets.auth}/auth/is-user-logged-in',
+            headers={'Authorization': f'Bearer {self._token}'},
+        )
+
+
+class StationLookup:
+    """Station details, the lookup cars make for every created car, and the station list now and then."""
+
+    name = 'station_lookup'
+
+    def __init__(self, stations: int = 100):
+        self._station_ids = list(range(STATION_ID_START, STATION_ID_START + stations))
+
+    async def setup(self, session: Session):
+        await seed_stations(session.targets, self._station_ids)
+
+    async def step(self, session: Session, worker: int):
+        station_id = random.choice(self._station_ids)
+        await session.request(
+            'GET /car-station/{car_station_id}', 'GET', f'{session.targets.geo}/car-station/{station_id}',
+        )
+        if random.random() < 0.1:
+            await session.request('GET /car-station/', 'GET', f'{session.targets.geo}/car-station/')
+
+
+class TripTelemetry:
+    """
+    Starts trips and reads them back, positions published by the trips are queried from the websocket service.
+    Positions only show up when RabbitMQ carries trip messages between the services.
+    """
+
+    name = 'trip_telemetry'
+
+    def __init__(self, cars: int = 500):
+        self._car_numbers = [f'TT{index:04}TT' for index in range(cars)]
+
+    async def setup(self, session: Session):
+        pass
+
+    async def step(self, session: Session, worker: int):
+        car_number = random.choice(self._car_numbers)
+        await session.request(
+            'POST /trip/', 'POST', f'{session.targets.cars}/trip/', (200, 409, 429), params={'car_number': car_number},
+        )
+        await session.request(
+            'GET /trip/{car_number}', 'GET', f'{session.targets.cars}/trip/{car_number}', (200, 404),
+        )
+        await session.request(
+            'GET /positions/nearby',
+            'GET',
+            f'{session.targets.websocket}/positions/nearby',
+            params={'lat': random.uniform(-60, 60), 'lon': random.uniform(-180, 180), 'radius': 1000},
+        )
+
+
+SCENARIOS: dict[str, type[Scenario]] = {
+    scenario.name: scenario for scenario in (CarSearch, OrderCreation, TokenValidation, StationLookup, TripTelemetry)
+}
+
+
+async def seed_stations(targets: Targets, station_ids: list[int]):
+    """Stations are written straight to the geo Redis, the API does not return ids of created stations."""
+    client = redis.from_url(targets.geo_redis)
+    station = {
+        'name': 'Load test station',
+        'address': 'Khreshchatyk 1',
+        'working_hours': '08:00-20:00',
+        'latitude': 50.45,
+        'longitude': 30.52,
+        'city': 'Kyiv',
+    }
+    async with client.pipeline(transaction=False) as pipe:
+        for station_id in station_ids:
+            pipe.set(str(station_id), json.dumps(station))
+        await pipe.execute()
+    await client.close()
+
+
+async def seed_cars(session: Session, count: int) -> list[int]:
+    """Cars are created through the API, cars left by an earlier run are reused."""
+    await seed_stations(session.targets, [STATION_ID_START])
+    image = _png(64, 48)
+    for index in range(count):
+        await session.client.post(
+            f'{session.targets.cars}/cars/',
+            data={
+                'car_description': f'Load test car {index}',
+                'car_number': f'LT{index:04}AA',
+                'transmission': random.choice(('automatic', 'mechanical')),
+                'engine': random.choice(('1.6L', '2.0L', '3.0L')),
+                'year': random.randint(2010, 2023),
+                'status': 'active',
+                'rental_cost': random.randint(50, 500),
+                'car_station_id': STATION_ID_START,
+            },
+            files={'file': ('car.png', image, 'image/png')},
+        )
+    response = await session.client.get(f'{session.targets.cars}/cars/')
+    response.raise_for_status()
+    car_ids = [car['id'] for car in response.json() if car['car_number'].startswith('LT')]
+    if not car_ids:
+        raise RuntimeError('No cars could be created, check that cars and geo services are reachable')
+    return car_ids
+
+
+async def get_token(session: Session) -> str:
+    await session.client.post(f'{session.targets.auth}/users/', json=USER)
+    response = await session.client.post(
+        f'{session.targets.auth}/auth/token',
+        data={'username': USER['user_name'], 'password': USER['password']},
+    )
+    if response.status_code != 201:
+        raise httpx.HTTPStatusError('Could not log in', request=response.request, response=response)
+    return response.json()['access_token']
+
+
+def _png(width: int, height: int) -> bytes:
+    """Plain grey RGB image, enough for the cars service to make its variants."""
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    rows = b''.join(b'\x00' + b'\x80' * width * 3 for _ in range(height))
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) + chunk(b'IDAT', zlib.compress(rows)) + chunk(b'IEND', b'')
@@ -0,0 +1,56 @@
+"""
+Serves one service with the stand-ins set up by load_tests.standins. Runs from the service directory,
+so it imports nothing from load_tests: python standin_app.py <service> <port>
+"""
+import os
+import sys
+
+import uvicorn
+
+
+def cars():
+    from alembic.command import upgrade
+    from alembic.config import Config
+
+    config = Config()
+    config.set_main_option('script_location', 'migrations')
+    config.set_main_option('sqlalchemy.url', os.environ['DATABASE_URL'])
+    upgrade(config, 'head')
+    from app import create_app
+    return create_app()
+
+
+def orders():
+    from mongomock_motor import AsyncMongoMockClient
+
+    import app.db
+    client = AsyncMongoMockClient()
+    app.db.get_motor_client = lambda: client
+    from app import create_app
+    return create_app()
+
+
+def auth():
+    from app.config import get_settings
+    from app.db import init_dynamodb_resource
+    from app.init_db import create_table
+
+    ddb = init_dynamodb_resource()
+    if get_settings().USER_TABLE not in {table.name for table in ddb.tables.all()}:
+        create_table(ddb, get_settings().USER_TABLE)
+    from app import create_app
+    return create_app()
+
+
+def default():
+    from app import create_app
+    return create_app()
+
+
+APPS = {'cars': cars, 'orders': orders, 'auth': auth}
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, os.getcwd())
+    service, port = sys.argv[1], int(sys.argv[2])
+    uvicorn.run(APPS.get(service, default)(), host='127.0.0.1', port=port, log_level='warning')
@@ -0,0 +1,54 @@
+import httpx
+
+from load_tests.driver import Recorder, run_scenario, Session, Targets
+from load_tests.report import build_report, compare_reports, percentile
+
+
+class PingScenario:
+    name = 'ping'
+
+    def __init__(self):
+        self.setup_done = False
+
+    async def setup(self, session: Session):
+        self.setup_done = True
+
+    async def step(self, session: Session, worker: int):
+        await session.request('GET /ping', 'GET', f'{session.targets.cars}/ping')
+        await session.request('GET /fail', 'GET', f'{session.targets.cars}/fail')
+
+
+def test_percentile_is_an_observed_value():
+    values = [float(value) for value in range(1, 101)]
+
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([0.5], 95) == 0.5
+    assert percentile([], 50) == 0
+
+
+async def test_run_scenario_records_latencies_and_errors():
+    transport = httpx.MockTransport(lambda request: httpx.Response(200 if request.url.path == '/ping' else 500))
+    scenario = PingScenario()
+
+    recorder, elapsed = await run_scenario(
+        scenario, Targets(), concurrency=2, duration=0.1, warmup=0, transport=transport,
+    )
+    report = build_report('ping', recorder, elapsed, 2)
+
+    assert scenario.setup_done
+    assert report['operations']['GET /ping']['requests'] > 0
+    assert report['operations']['GET /ping']['errors'] == 0
+    assert report['operations']['GET /fail']['errors'] == report['operations']['GET /fail']['requests']
+
+
+def test_compare_reports_finds_regressions():
+    recorder = Recorder()
+    for latency in (0.010, 0.011, 0.012):
+        recorder.add('GET /cars/', latency, True)
+    baseline = build_report('car_search', recorder, 1.0, 1)
+    slower = build_report('car_search', recorder, 1.0, 1)
+    slower['operations']['GET /cars/']['p99'] *= 2
+
+    assert compare_reports(baseline, baseline) == []
+    assert compare_reports(baseline, slower) == ['GET /cars/ p99 12.00 -> 24.00 ms']
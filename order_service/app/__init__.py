@@ -1,22 +1,35 @@
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
-from prometheus_fastapi_instrumentator import Instrumentator
+from fastapi.responses import ORJSONResponse
+from service_common.instrumentation import instrument_app
+from service_common.profiling import init_profiling
+from service_common.tracing import init_tracing
 
+from app.config import get_settings
 from app.db import init_db
 from app.orders.router import router as order_router
+from app.outbox.flusher import CarStatusOutboxFlusher
 
 
 @asynccontextmanager
 async def lifespan(application: FastAPI):
+    settings = get_settings()
     await init_db()
+
+    flusher = CarStatusOutboxFlusher(settings.OUTBOX_FLUSH_INTERVAL)
+    if settings.OUTBOX_FLUSHER_ENABLED:
+        flusher.start()
     yield
+    await flusher.stop()
 
 
 def create_app() -> FastAPI:
-    app = FastAPI(lifespan=lifespan)
+    settings = get_settings()
+    app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
     app.include_router(order_router)
 
-    instrumentator = Instrumentator().instrument(app)
-    instrumentator.expose(app)
+    instrument_app(app)
+    init_tracing(app, 'order_service', settings)
+    init_profiling(app, settings)
     return app
@@ -1,4 +1,5 @@
 from functools import lru_cache
+from typing import Literal
 
 from dotenv import load_dotenv
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -14,6 +15,31 @@ class Settings(BaseSettings):
     CAR_SERVICE_BASE_URL: str
     AUTH_SERVICE_BASE_URL: str
 
+    # Multi-document transactions need a replica set, standalone servers write sequentially
+    MONGODB_TRANSACTIONS: bool = False
+
+    IDEMPOTENCY_KEY_TTL: int = 24 * 60 * 60
+    IDEMPOTENCY_KEY_LEASE: int = 60
+
+    OUTBOX_FLUSHER_ENABLED: bool = True
+    OUTBOX_FLUSH_INTERVAL: float = 1.0
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_MAX_ATTEMPTS: int = 5
+    OUTBOX_RETRY_BACKOFF: float = 2.0
+    # Claimed entries are not taken by other replicas for this long, it must exceed the time to send a batch
+    OUTBOX_LOCK_TIMEOUT: float = 60.0
+
+    TRACING_EXPORTER: Literal['none', 'file'] = 'none'
+    TRACING_FILE: str = 'traces.jsonl'
+    TRACING_SAMPLE_RATIO: float = 1.0
+
+    PROFILING_ENABLED: bool = False
+    PROFILING_SAMPLE_RATE: float = 0.01
+    PROFILING_SECRET: str = ''
+    PROFILING_DIR: str = 'profiles'
+    PROFILING_KEEP_PER_ROUTE: int = 20
+    PROFILING_INTERVAL: float = 0.001
+
     model_config = SettingsConfigDict(case_sensitive=True, frozen=True, env_file='.env')
 
 
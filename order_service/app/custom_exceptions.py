@@ -8,3 +8,11 @@ class OrderNotFoundError(Exception):
 
 class NotOwnerError(Exception):
     pass
+
+
+class IdempotencyKeyReusedError(Exception):
+    pass
+
+
+class IdempotencyKeyInProgressError(Exception):
+    pass
@@ -1,4 +1,5 @@
 from httpx import AsyncClient
+from service_common.instrumentation.http import InstrumentedTransport
 
 from app.config import get_settings
 from app.custom_exceptions import CarServiceError
@@ -15,7 +16,7 @@ async def get_order_cars(car_ids: list[int]) -> list[CarOut]:
 
 
 async def _request_cars(car_ids) -> list[CarOut]:
-    async with AsyncClient() as client:
+    async with AsyncClient(transport=InstrumentedTransport()) as client:
         response = await client.get(
             get_settings().CAR_SERVICE_BASE_URL,
             params={'car_ids': car_ids, 'status': CarStatusEnum.ACTIVE},
@@ -26,12 +27,14 @@ async def _request_cars(car_ids) -> list[CarOut]:
     return [CarOut(**car) for car in response.json()]
 
 
-async def update_cars_status(car_ids: list[int], status: str):
-    async with AsyncClient() as client:
+async def update_cars_status(car_ids: list[int], status: str, idempotency_key: str | None = None):
+    headers = {'Idempotency-Key': idempotency_key} if idempotency_key else None
+    async with AsyncClient(transport=InstrumentedTransport()) as client:
         response = await client.patch(
             f'{get_settings().CAR_SERVICE_BASE_URL}car-status/',
             params={'car_ids': car_ids},
             json={'status': status},
+            headers=headers,
         )
 
     if response.status_code == 404:
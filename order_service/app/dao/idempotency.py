@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta
+import hashlib
+
+from beanie.operators import Set
+from pymongo.errors import DuplicateKeyError
+
+from app.config import get_settings
+from app.custom_exceptions import IdempotencyKeyInProgressError, IdempotencyKeyReusedError
+from app.models import IdempotencyStateEnum, OrderIdempotencyKey
+from app.orders.schemas import OrderCreate
+
+
+async def reserve_idempotency_key(key: str, customer_id: str, order: OrderCreate) -> OrderIdempotencyKey | None:
+    """
+    Returns the completed record when the request is a retry, otherwise reserves the key
+    for the current request and returns None. A key in progress longer than the lease is left by
+    a request that crashed, so it is reclaimed.
+    """
+    request_hash = hashlib.sha256(order.model_dump_json().encode()).hexdigest()
+    record = await _find_idempotency_key(key, customer_id)
+
+    # Mongo removes expired documents only once a minute
+    if record and record.expires_at <= datetime.utcnow():
+        await record.delete()
+        record = None
+
+    if record is None:
+        record = OrderIdempotencyKey(
+            key=key,
+            customer_id=customer_id,
+            request_hash=request_hash,
+            expires_at=datetime.utcnow() + timedelta(seconds=get_settings().IDEMPOTENCY_KEY_TTL),
+        )
+        try:
+            await record.insert()
+            return None
+        except DuplicateKeyError:
+            record = await _find_idempotency_key(key, customer_id)
+
+    if record.request_hash != request_hash:
+        raise IdempotencyKeyReusedError
+    if record.state == IdempotencyStateEnum.IN_PROGRESS:
+        if not await _reclaim_idempotency_key(record):
+            raise IdempotencyKeyInProgressError
+        return None
+    return record
+
+
+async def complete_idempotency_key(key: str, customer_id: str, status_code: int, response: dict):
+    record = await _find_idempotency_key(key, customer_id)
+    await record.set({
+        OrderIdempotencyKey.state: IdempotencyStateEnum.COMPLETED,
+        OrderIdempotencyKey.status_code: status_code,
+        OrderIdempotencyKey.response: response,
+    })
+
+
+async def release_idempotency_key(key: str, customer_id: str):
+    """Failed requests are not cached, so the client is able to retry them with the same key."""
+    await OrderIdempotencyKey.find(
+        OrderIdempotencyKey.customer_id == customer_id,
+        OrderIdempotencyKey.key == key,
+    ).delete()
+
+
+async def _reclaim_idempotency_key(record: OrderIdempotencyKey) -> bool:
+    """Renews the lease of an expired key, only one of concurrent retries matches its previous start."""
+    now = datetime.utcnow()
+    if record.started_at > now - timedelta(seconds=get_settings().IDEMPOTENCY_KEY_LEASE):
+        return False
+    result = await OrderIdempotencyKey.find_one(
+        OrderIdempotencyKey.id == record.id,
+        OrderIdempotencyKey.state == IdempotencyStateEnum.IN_PROGRESS,
+        OrderIdempotencyKey.started_at == record.started_at,
+    ).update(Set({OrderIdempotencyKey.started_at: now}))
+    return result.modified_count == 1
+
+
+async def _find_idempotency_key(key: str, customer_id: str) -> OrderIdempotencyKey | None:
+    return await OrderIdempotencyKey.find_one(
+        OrderIdempotencyKey.customer_id == customer_id,
+        OrderIdempotencyKey.key == key,
+    )
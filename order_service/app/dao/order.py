@@ -1,8 +1,11 @@
 from beanie import PydanticObjectId
 
 from app.custom_exceptions import NotOwnerError, OrderNotFoundError
-from app.custom_metrics import total_orders
-from app.dao.car import get_order_cars, update_cars_status
+from app.custom_metrics import orders_revenue, total_orders
+from app.dao.car import get_order_cars
+from app.dao.outbox import enqueue_cars_status
+from app.dao.stats import add_order_to_stats, remove_order_from_stats
+from app.db import start_transaction
 from app.models import Order
 from app.orders.schemas import CarStatusEnum, OrderCarOut, OrderCreate, OrderUpdate
 
@@ -14,15 +17,30 @@ async def get_orders() -> list[Order]:
 
 async def create_order(order: OrderCreate, customer_id: str) -> Order:
     rental_time = order.rental_date_end - order.rental_date_start
-    total = await _count_order_total(order.order_cars, rental_time.days)
-    order_db = Order(**order.model_dump(), rental_time=rental_time.days, total_cost=total, customer_id=customer_id)
-    await update_cars_status(order.order_cars, CarStatusEnum.ACTIVE)
-    total_orders.labels('total_orders').inc(total)
-    return await order_db.insert()
+    cars_cost = await _count_cars_cost(order.order_cars, rental_time.days)
+    order_db = Order(
+        **order.model_dump(),
+        rental_time=rental_time.days,
+        total_cost=sum(cars_cost.values()),
+        cars_cost=cars_cost,
+        customer_id=customer_id,
+    )
+
+    # Cars service is updated by the outbox flusher, so its latency and outages do not affect orders
+    async with start_transaction() as session:
+        await order_db.insert(session=session)
+        await enqueue_cars_status(order.order_cars, CarStatusEnum.ACTIVE, order_db.id, session=session)
+        await add_order_to_stats(order_db, session=session)
+
+    total_orders.labels('total_orders').inc()
+    orders_revenue.inc(order_db.total_cost)
+    return order_db
 
 
 async def delete_order(order: Order):
-    await order.delete()
+    async with start_transaction() as session:
+        await order.delete(session=session)
+        await remove_order_from_stats(order, session=session)
 
 
 async def retrieve_order_by_id(order_id: PydanticObjectId, customer_id: str) -> Order:
@@ -53,20 +71,24 @@ async def update_order_by_id(order_id: PydanticObjectId, order: OrderUpdate, cus
 
     if order.rental_date_end and order.rental_date_end:
         rental_time = order.rental_date_end - order.rental_date_start
-        total = await _count_order_total(order.order_cars or order_db.order_cars, rental_time.days)
-        update_query['$set'].update({'total_cost': total, 'rental_time': rental_time.days})
-
-    await order_db.update(update_query)
-
-    # Need extra query because when I update_order list response has not updated list of values
-    order = await Order.get(order_id)
+        cars_cost = await _count_cars_cost(order.order_cars or order_db.order_cars, rental_time.days)
+        update_query['$set'].update({
+            'total_cost': sum(cars_cost.values()),
+            'cars_cost': cars_cost,
+            'rental_time': rental_time.days,
+        })
+
+    old_order = order_db.model_copy(deep=True)
+    async with start_transaction() as session:
+        await order_db.update(update_query, session=session)
+
+        # Need extra query because when I update_order list response has not updated list of values
+        order = await Order.get(order_id, session=session)
+        await remove_order_from_stats(old_order, session=session)
+        await add_order_to_stats(order, session=session)
     return order
 
 
-async def _count_order_total(car_ids: list[int], rental_time: int) -> int:
-    total = 0
+async def _count_cars_cost(car_ids: list[int], rental_time: int) -> dict[str, int]:
     cars = await get_order_cars(car_ids)
-    for car in cars:
-        total += car.rental_cost * rental_time
-
-    return total
+    return {str(car.id): car.rental_cost * rental_time for car in cars}
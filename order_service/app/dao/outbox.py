@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from beanie import PydanticObjectId
+from beanie.operators import Eq, In, Inc, Or, Set
+from motor.motor_asyncio import AsyncIOMotorClientSession
+
+from app.models import CarStatusOutbox, OutboxStateEnum
+
+
+async def enqueue_cars_status(
+        car_ids: list[int],
+        status: str,
+        order_id: PydanticObjectId | None = None,
+        session: AsyncIOMotorClientSession | None = None,
+):
+    """
+    Pending entries of the cars are superseded by the new ones, so an older status waiting for a retry
+    can not be sent after a newer one.
+    """
+    entries = [
+        CarStatusOutbox(car_id=car_id, car_status=status, order_id=order_id)
+        for car_id in dict.fromkeys(car_ids)
+    ]
+    if not entries:
+        return
+    await CarStatusOutbox.find(
+        In(CarStatusOutbox.car_id, [entry.car_id for entry in entries]),
+        CarStatusOutbox.state == OutboxStateEnum.PENDING,
+        session=session,
+    ).update(Set({CarStatusOutbox.state: OutboxStateEnum.SUPERSEDED}), session=session)
+    await CarStatusOutbox.insert_many(entries, session=session)
+
+
+async def claim_pending_entries(limit: int, lock_timeout: float) -> list[CarStatusOutbox]:
+    """
+    Locks a batch of due entries, so several replicas of the service never send the same entry.
+    Entries of a flusher which crashed are claimed again when their lock expires.
+    """
+    now = datetime.utcnow()
+    due = (
+        CarStatusOutbox.state == OutboxStateEnum.PENDING,
+        CarStatusOutbox.next_attempt_at <= now,
+        Or(Eq(CarStatusOutbox.locked_until, None), CarStatusOutbox.locked_until <= now),
+    )
+    candidates = await CarStatusOutbox.find(*due).sort(
+        +CarStatusOutbox.created_at, +CarStatusOutbox.id,
+    ).limit(limit).to_list()
+    if not candidates:
+        return []
+
+    # Conditions are checked again by the update, so an entry claimed by another replica meanwhile is skipped
+    claim_id = uuid4().hex
+    candidate_ids = In(CarStatusOutbox.id, [entry.id for entry in candidates])
+    await CarStatusOutbox.find(candidate_ids, *due).update(
+        Set({CarStatusOutbox.claim_id: claim_id, CarStatusOutbox.locked_until: now + timedelta(seconds=lock_timeout)}),
+    )
+    return await CarStatusOutbox.find(candidate_ids, CarStatusOutbox.claim_id == claim_id).sort(
+        +CarStatusOutbox.created_at, +CarStatusOutbox.id,
+    ).to_list()
+
+
+async def mark_entries_sent(entry_ids: list[PydanticObjectId]):
+    await CarStatusOutbox.find(In(CarStatusOutbox.id, entry_ids)).update(
+        Set({CarStatusOutbox.state: OutboxStateEnum.SENT}),
+    )
+
+
+async def mark_entries_failed(entry_ids: list[PydanticObjectId]):
+    await CarStatusOutbox.find(In(CarStatusOutbox.id, entry_ids)).update(
+        Set({CarStatusOutbox.state: OutboxStateEnum.FAILED}),
+        Inc({CarStatusOutbox.attempts: 1}),
+    )
+
+
+async def schedule_entries_retry(entries: list[CarStatusOutbox], max_attempts: int, backoff: float):
+    """Postpones entries with exponential backoff or marks them failed when attempts are exhausted."""
+    exhausted = [entry.id for entry in entries if entry.attempts + 1 >= max_attempts]
+    if exhausted:
+        await mark_entries_failed(exhausted)
+
+    retry = [entry for entry in entries if entry.attempts + 1 < max_attempts]
+    if not retry:
+        return
+
+    attempt = max(entry.attempts for entry in retry)
+    next_attempt_at = datetime.utcnow() + timedelta(seconds=backoff * 2 ** attempt)
+    await CarStatusOutbox.find(In(CarStatusOutbox.id, [entry.id for entry in retry])).update(
+        Set({CarStatusOutbox.next_attempt_at: next_attempt_at, CarStatusOutbox.locked_until: None}),
+        Inc({CarStatusOutbox.attempts: 1}),
+    )
@@ -0,0 +1,96 @@
+from datetime import date, datetime, time
+
+from motor.motor_asyncio import AsyncIOMotorClientSession
+from pymongo import UpdateOne
+
+from app.models import CarDailyStats, Order, OrderDailyStats
+from app.orders.schemas import CarStatsOut, DailyStatsOut, OrderStatsOut
+
+
+async def add_order_to_stats(order: Order, session: AsyncIOMotorClientSession | None = None):
+    await _apply_order(order, 1, session)
+
+
+async def remove_order_from_stats(order: Order, session: AsyncIOMotorClientSession | None = None):
+    await _apply_order(order, -1, session)
+
+
+async def get_order_stats(date_from: date, date_to: date) -> OrderStatsOut:
+    """Reads only rollup documents of the period, orders collection is not touched."""
+    day_from, day_to = datetime.combine(date_from, time()), datetime.combine(date_to, time())
+    days = await OrderDailyStats.find(
+        OrderDailyStats.day >= day_from,
+        OrderDailyStats.day <= day_to,
+    ).sort(+OrderDailyStats.day).to_list()
+    car_days = await CarDailyStats.find(CarDailyStats.day >= day_from, CarDailyStats.day <= day_to).to_list()
+
+    cars = {}
+    for car_day in car_days:
+        car = cars.setdefault(car_day.car_id, CarStatsOut(car_id=car_day.car_id))
+        car.orders += car_day.orders
+        car.revenue += car_day.revenue
+        car.rental_days += car_day.rental_days
+
+    period_days = (day_to - day_from).days + 1
+    for car in cars.values():
+        car.utilisation = round(car.rental_days / period_days, 4)
+
+    return OrderStatsOut(
+        date_from=day_from,
+        date_to=day_to,
+        orders=sum(day.orders for day in days),
+        revenue=sum(day.revenue for day in days),
+        rental_days=sum(day.rental_days for day in days),
+        days=[DailyStatsOut.model_validate(day) for day in days if day.orders],
+        cars=sorted((car for car in cars.values() if car.orders), key=lambda car: car.car_id),
+    )
+
+
+async def _apply_order(order: Order, sign: int, session: AsyncIOMotorClientSession | None):
+    """Increments rollups of the day when the order was booked, sign -1 reverts the order contribution."""
+    day = _day_start(order.id.generation_time)
+    cars_cost = _cars_cost(order)
+
+    await OrderDailyStats.get_motor_collection().update_one(
+        {'day': day},
+        {'$inc': {
+            'orders': sign,
+            'revenue': sign * order.total_cost,
+            'rental_days': sign * order.rental_time * len(cars_cost),
+        }},
+        upsert=True,
+        session=session,
+    )
+    if not cars_cost:
+        return
+
+    await CarDailyStats.get_motor_collection().bulk_write(
+        [
+            UpdateOne(
+                {'day': day, 'car_id': car_id},
+                {'$inc': {
+                    'orders': sign,
+                    'revenue': sign * cars_cost[car_id],
+                    'rental_days': sign * order.rental_time,
+                }},
+                upsert=True,
+            )
+            for car_id in cars_cost
+        ],
+        ordered=False,
+        session=session,
+    )
+
+
+def _cars_cost(order: Order) -> dict[int, float]:
+    """Orders created before cars cost was stored split the total evenly between cars."""
+    car_ids = list(dict.fromkeys(order.order_cars))
+    if not car_ids:
+        return {}
+    if order.cars_cost:
+        return {car_id: order.cars_cost.get(str(car_id), 0) for car_id in car_ids}
+    return {car_id: order.total_cost / len(car_ids) for car_id in car_ids}
+
+
+def _day_start(value: datetime) -> datetime:
+    return value.replace(tzinfo=None, hour=0, minute=0, second=0, microsecond=0)
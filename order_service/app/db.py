@@ -1,11 +1,36 @@
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import AsyncIterator
+
 from beanie import init_beanie
-from motor.motor_asyncio import AsyncIOMotorClient
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorClientSession
+from service_common.instrumentation.mongo import MongoCommandListener
 
 from app.config import get_settings
 from app.models import gather_documents
 
 
+@lru_cache
+def get_motor_client() -> AsyncIOMotorClient:
+    return AsyncIOMotorClient(get_settings().MONGODB_URI, event_listeners=[MongoCommandListener()])
+
+
 async def init_db():
     settings = get_settings()
-    client = AsyncIOMotorClient(settings.MONGODB_URI)
+    client = get_motor_client()
     await init_beanie(database=getattr(client, settings.MONGODB_DB_NAME), document_models=gather_documents())
+
+
+@asynccontextmanager
+async def start_transaction() -> AsyncIterator[AsyncIOMotorClientSession | None]:
+    """
+    Yields a session bound to a transaction, or None when transactions are disabled
+    and writes are executed one by one.
+    """
+    if not get_settings().MONGODB_TRANSACTIONS:
+        yield None
+        return
+
+    async with await get_motor_client().start_session() as session:
+        async with session.start_transaction():
+            yield session
@@ -2,13 +2,14 @@ from typing import Annotated
 
 from fastapi import Depends, Header, HTTPException
 from httpx import AsyncClient
+from service_common.instrumentation.http import InstrumentedTransport
 
 from app.config import get_settings
 from app.users.schemas import UserOut
 
 
 async def get_current_user(auth_token: Annotated[str, Header()]) -> UserOut:
-    async with AsyncClient() as client:
+    async with AsyncClient(transport=InstrumentedTransport()) as client:
         response = await client.get(
             f'{get_settings().AUTH_SERVICE_BASE_URL}is-user-logged-in',
             headers={'Authorization': f'Bearer {auth_token}'},
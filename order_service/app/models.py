@@ -3,7 +3,9 @@ from enum import auto, StrEnum
 import sys
 from typing import Optional, TypeVar
 
-from beanie import Document
+from beanie import Document, PydanticObjectId
+from pydantic import Field
+from pymongo import ASCENDING, IndexModel
 
 
 class OrderStatusEnum(StrEnum):
@@ -11,6 +13,18 @@ class OrderStatusEnum(StrEnum):
     PAID = auto()
 
 
+class OutboxStateEnum(StrEnum):
+    PENDING = auto()
+    SENT = auto()
+    FAILED = auto()
+    SUPERSEDED = auto()
+
+
+class IdempotencyStateEnum(StrEnum):
+    IN_PROGRESS = auto()
+    COMPLETED = auto()
+
+
 class Order(Document):
     rental_date_start: datetime
     rental_date_end: datetime
@@ -21,11 +35,78 @@ class Order(Document):
     manager_id: Optional[int] = None
     customer_id: str
     order_cars: list[int]
+    # Cost of every car for the whole rental period, keys are car ids because Mongo keys must be strings
+    cars_cost: dict[str, float] = {}
 
     class Settings:
         name = 'orders'
 
 
+class CarStatusOutbox(Document):
+    """Car status change written together with an order and flushed to cars service in background."""
+    car_id: int
+    car_status: str
+    order_id: Optional[PydanticObjectId] = None
+    state: OutboxStateEnum = OutboxStateEnum.PENDING
+    attempts: int = 0
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    next_attempt_at: datetime = Field(default_factory=datetime.utcnow)
+    # Flusher which claimed the entry and until when, other replicas skip it meanwhile
+    claim_id: Optional[str] = None
+    locked_until: Optional[datetime] = None
+
+    class Settings:
+        name = 'car_status_outbox'
+        indexes = [
+            [('state', ASCENDING), ('next_attempt_at', ASCENDING), ('created_at', ASCENDING)],
+            [('car_id', ASCENDING), ('state', ASCENDING)],
+        ]
+
+
+class OrderIdempotencyKey(Document):
+    """Result of an order creation request, so retries with the same key return it instead of a new order."""
+    key: str
+    customer_id: str
+    request_hash: str
+    state: IdempotencyStateEnum = IdempotencyStateEnum.IN_PROGRESS
+    started_at: datetime = Field(default_factory=datetime.utcnow)
+    status_code: Optional[int] = None
+    response: Optional[dict] = None
+    expires_at: datetime
+
+    class Settings:
+        name = 'order_idempotency_keys'
+        indexes = [
+            IndexModel([('customer_id', ASCENDING), ('key', ASCENDING)], unique=True),
+            IndexModel([('expires_at', ASCENDING)], expireAfterSeconds=0),
+        ]
+
+
+class OrderDailyStats(Document):
+    """Rollup of orders booked during the day, kept up to date on every order change."""
+    day: datetime
+    orders: int = 0
+    revenue: float = 0
+    rental_days: int = 0
+
+    class Settings:
+        name = 'order_daily_stats'
+        indexes = [IndexModel([('day', ASCENDING)], unique=True)]
+
+
+class CarDailyStats(Document):
+    """Rollup of orders per car booked during the day, kept up to date on every order change."""
+    day: datetime
+    car_id: int
+    orders: int = 0
+    revenue: float = 0
+    rental_days: int = 0
+
+    class Settings:
+        name = 'car_daily_stats'
+        indexes = [IndexModel([('day', ASCENDING), ('car_id', ASCENDING)], unique=True)]
+
+
 ModelClasses = TypeVar('ModelClasses', bound=Document)
 
 
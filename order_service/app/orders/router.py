@@ -1,7 +1,20 @@
+from datetime import date, datetime, timedelta
+from typing import Annotated
+
 from beanie import PydanticObjectId
-from fastapi import APIRouter, HTTPException, Response
+from fastapi import APIRouter, Header, HTTPException, Query, Response
+from fastapi.responses import JSONResponse
+from service_common.etag import ETagRoute
+from service_common.serialization import model_response
 
-from app.custom_exceptions import CarServiceError, NotOwnerError, OrderNotFoundError
+from app.custom_exceptions import (
+    CarServiceError,
+    IdempotencyKeyInProgressError,
+    IdempotencyKeyReusedError,
+    NotOwnerError,
+    OrderNotFoundError,
+)
+from app.dao.idempotency import complete_idempotency_key, release_idempotency_key, reserve_idempotency_key
 from app.dao.order import (
     create_order,
     delete_order,
@@ -10,23 +23,64 @@ from app.dao.order import (
     retrieve_order_by_id,
     update_order_by_id,
 )
+from app.dao.stats import get_order_stats
 from app.dependency import current_user
-from app.orders.schemas import OrderCarOut, OrderCreate, OrderCreateReturn, OrderOut, OrderUpdate
+from app.orders.schemas import OrderCarOut, OrderCreate, OrderCreateReturn, OrderOut, OrderStatsOut, OrderUpdate
 
-router = APIRouter(prefix='/orders', tags=['Orders'])
+router = APIRouter(prefix='/orders', tags=['Orders'], route_class=ETagRoute)
 
 
 @router.get('/', response_model=list[OrderOut])
 async def get_all_orders():
-    return await get_orders()
+    return model_response(list[OrderOut], await get_orders())
+
+
+@router.get('/stats', response_model=OrderStatsOut)
+async def get_stats(
+        date_from: Annotated[date | None, Query()] = None,
+        date_to: Annotated[date | None, Query()] = None,
+):
+    date_to = date_to or datetime.utcnow().date()
+    date_from = date_from or date_to - timedelta(days=30)
+    if date_from > date_to:
+        raise HTTPException(status_code=422, detail='Date from can not be higher than date to')
+    return await get_order_stats(date_from, date_to)
 
 
-@router.post('/', response_model=OrderCreateReturn, status_code=201)
-async def create_new_order(order: OrderCreate, user: current_user):
+@router.post('/', response_model=OrderCreateReturn, status_code=201, responses={
+    409: {'description': 'Request with the same idempotency key is in progress'},
+    422: {'description': 'Idempotency key was used for another request'},
+})
+async def create_new_order(
+        order: OrderCreate,
+        user: current_user,
+        idempotency_key: Annotated[str | None, Header(min_length=1, max_length=255)] = None,
+):
+    if idempotency_key:
+        try:
+            record = await reserve_idempotency_key(idempotency_key, user.id, order)
+        except IdempotencyKeyReusedError:
+            raise HTTPException(status_code=422, detail='Idempotency key was used for another request')
+        except IdempotencyKeyInProgressError:
+            raise HTTPException(status_code=409, detail='Request with the same idempotency key is in progress')
+        if record:
+            return JSONResponse(record.response, status_code=record.status_code)
+
     try:
-        return await create_order(order, user.id)
+        order_db = await create_order(order, user.id)
     except CarServiceError as error:
+        if idempotency_key:
+            await release_idempotency_key(idempotency_key, user.id)
         raise HTTPException(status_code=error.args[0], detail=error.args[1])
+    except Exception:
+        if idempotency_key:
+            await release_idempotency_key(idempotency_key, user.id)
+        raise
+
+    if idempotency_key:
+        response = OrderCreateReturn.model_validate(order_db.model_dump()).model_dump(mode='json')
+        await complete_idempotency_key(idempotency_key, user.id, 201, response)
+    return order_db
 
 
 @router.delete('/{order_id}', response_class=Response, status_code=204)
@@ -48,7 +102,7 @@ async def delete_order_by_id(order_id: PydanticObjectId, user: current_user):
 })
 async def retrieve_order_with_cars(order_id: PydanticObjectId, user: current_user):
     try:
-        return await retrieve_order_and_cars(order_id, user.id)
+        return model_response(OrderCarOut, await retrieve_order_and_cars(order_id, user.id))
     except OrderNotFoundError:
         raise HTTPException(status_code=404, detail='Order not found')
     except CarServiceError as error:
@@ -1,8 +1,7 @@
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from enum import auto, StrEnum
 
 from beanie import PydanticObjectId
-from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel, ConfigDict, Field, model_validator
 
 
@@ -38,8 +37,7 @@ class BaseOrder(BaseModel):
     model_config = ConfigDict(from_attributes=True, populate_by_name=True, json_encoders={datetime: _replace_timezone})
 
     def serializable_dict(self, **kwargs) -> OrderDictSerialized:
-        default_dict = super().model_dump(**kwargs)
-        return jsonable_encoder(default_dict)
+        return self.model_dump(mode='json', **kwargs)
 
 
 class OrderOut(BaseOrder):
@@ -115,6 +113,33 @@ def _check_date_rental_dates(values):
     return values
 
 
+class DailyStatsOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    day: datetime
+    orders: int
+    revenue: float
+    rental_days: int
+
+
+class CarStatsOut(BaseModel):
+    car_id: int
+    orders: int = 0
+    revenue: float = 0
+    rental_days: int = 0
+    utilisation: float = 0
+
+
+class OrderStatsOut(BaseModel):
+    date_from: date
+    date_to: date
+    orders: int
+    revenue: float
+    rental_days: int
+    days: list[DailyStatsOut]
+    cars: list[CarStatsOut]
+
+
 class CarStatusEnum(StrEnum):
     ACTIVE = auto()
     BUSY = auto()
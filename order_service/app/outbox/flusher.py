@@ -0,0 +1,103 @@
+import asyncio
+from contextlib import suppress
+import hashlib
+import logging
+
+from httpx import HTTPError
+
+from app.config import get_settings
+from app.custom_exceptions import CarServiceError
+from app.dao.car import update_cars_status
+from app.dao.outbox import claim_pending_entries, mark_entries_failed, mark_entries_sent, schedule_entries_retry
+from app.models import CarStatusOutbox
+
+
+logger = logging.getLogger(__name__)
+
+
+async def flush_car_status_outbox() -> int:
+    """
+    Sends one batch of pending car status changes to cars service.
+    Only the latest status of every car is sent and cars are grouped into one request per status.
+    Entries are claimed first, so flushers of several replicas do not send them twice.
+    Returns number of processed outbox entries.
+    """
+    settings = get_settings()
+    entries = await claim_pending_entries(settings.OUTBOX_BATCH_SIZE, settings.OUTBOX_LOCK_TIMEOUT)
+    for status, group in _coalesce(entries).items():
+        await _flush_group(status, group)
+    return len(entries)
+
+
+def _coalesce(entries: list[CarStatusOutbox]) -> dict[str, list[CarStatusOutbox]]:
+    """
+    Groups entries by the latest status of their car, older entries are superseded by it.
+    Enqueueing supersedes pending entries, so several per car are only left by concurrent enqueues.
+    """
+    latest_status = {}
+    for entry in sorted(entries, key=lambda item: (item.created_at, item.id)):
+        latest_status[entry.car_id] = entry.car_status
+
+    groups = {}
+    for entry in entries:
+        groups.setdefault(latest_status[entry.car_id], []).append(entry)
+    return groups
+
+
+async def _flush_group(status: str, entries: list[CarStatusOutbox]):
+    settings = get_settings()
+    car_ids = sorted({entry.car_id for entry in entries})
+    try:
+        await update_cars_status(car_ids, status, idempotency_key=_idempotency_key(entries))
+    except CarServiceError as error:
+        if error.args[0] != 404:
+            await schedule_entries_retry(entries, settings.OUTBOX_MAX_ATTEMPTS, settings.OUTBOX_RETRY_BACKOFF)
+        elif len(car_ids) > 1:
+            # One unknown car rejects the whole request, so isolate it by sending cars one by one
+            for car_id in car_ids:
+                await _flush_group(status, [entry for entry in entries if entry.car_id == car_id])
+        else:
+            logger.warning('Car %s not found, status %s was not applied', car_ids[0], status)
+            await mark_entries_failed([entry.id for entry in entries])
+    except HTTPError:
+        logger.exception('Cars service is unavailable')
+        await schedule_entries_retry(entries, settings.OUTBOX_MAX_ATTEMPTS, settings.OUTBOX_RETRY_BACKOFF)
+    else:
+        await mark_entries_sent([entry.id for entry in entries])
+
+
+def _idempotency_key(entries: list[CarStatusOutbox]) -> str:
+    """The same set of entries always produces the same key, so retried requests can be deduplicated."""
+    entry_ids = ','.join(sorted(str(entry.id) for entry in entries))
+    return hashlib.sha256(entry_ids.encode()).hexdigest()
+
+
+class CarStatusOutboxFlusher:
+    """Periodically drains the car status outbox in background of the application."""
+
+    def __init__(self, interval: float):
+        self._interval = interval
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        with suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                processed = await flush_car_status_outbox()
+            except Exception:
+                logger.exception('Failed to flush car status outbox')
+                processed = 0
+
+            # Full batch means there is a backlog, so continue without waiting
+            if processed < get_settings().OUTBOX_BATCH_SIZE:
+                await asyncio.sleep(self._interval)
@@ -0,0 +1,18 @@
+import asyncio
+
+from app.dao.stats import add_order_to_stats
+from app.db import init_db
+from app.models import CarDailyStats, Order, OrderDailyStats
+
+
+async def rebuild_stats():
+    """Recalculates rollups from scratch, e.g. for orders created before statistics were collected."""
+    await init_db()
+    await OrderDailyStats.delete_all()
+    await CarDailyStats.delete_all()
+    async for order in Order.find_all():
+        await add_order_to_stats(order)
+
+
+if __name__ == '__main__':
+    asyncio.run(rebuild_stats())
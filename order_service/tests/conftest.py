@@ -15,6 +15,9 @@ from app.orders.schemas import CarOut, OrderCreate, OrderDictSerialized, OrderOu
 from app.users.schemas import UserOut
 
 
+pytest_plugins = ['service_common.benchmarks']
+
+
 def pytest_configure(config: pytest.Config):
     """
     Allows plugins and conftest files to perform initial configuration.
@@ -26,6 +29,7 @@ def pytest_configure(config: pytest.Config):
     os.environ['CASE_SENSITIVE'] = '1'
     os.environ['CAR_SERVICE_BASE_URL'] = 'http://test-car-service-host/cars/'
     os.environ['AUTH_SERVICE_BASE_URL'] = 'http://test-car-service-host/auth/'
+    os.environ['OUTBOX_FLUSHER_ENABLED'] = '0'
 
 
 @pytest.fixture
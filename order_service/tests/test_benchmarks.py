@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+import pytest
+
+from app.orders.schemas import OrderCreate, OrderOut
+
+
+BUDGETS = {
+    'order_create': 80e-6,
+    'order_serializable_dict': 150e-6,
+}
+
+
+@pytest.fixture(autouse=True)
+def clear_db():
+    """Benchmarks do not touch the database, they run without MongoDB."""
+
+
+@pytest.fixture
+def rental_dates() -> dict:
+    start = datetime.now() + timedelta(days=1)
+    return {'rental_date_start': start, 'rental_date_end': start + timedelta(days=3)}
+
+
+def test_order_create(benchmark, rental_dates, assert_within_budget):
+    order = {**rental_dates, 'prepayment': 100, 'status': 'reservation', 'order_cars': [1, 2, 3]}
+    assert benchmark(OrderCreate.model_validate, order).order_cars == [1, 2, 3]
+    assert_within_budget(BUDGETS['order_create'])
+
+
+def test_order_serializable_dict(benchmark, rental_dates, assert_within_budget):
+    order = OrderOut(
+        _id=ObjectId(),
+        **rental_dates,
+        rental_time=3,
+        total_cost=300.0,
+        prepayment=100,
+        status='paid',
+        customer_id='customer',
+        order_cars=[1, 2, 3],
+    )
+    serialized = benchmark(order.serializable_dict, by_alias=True)
+    assert serialized['_id'] == str(order.id)
+    assert serialized['rental_date_start'] == rental_dates['rental_date_start'].isoformat()
+    assert_within_budget(BUDGETS['order_serializable_dict'])
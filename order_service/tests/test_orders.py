@@ -2,13 +2,16 @@
 from datetime import datetime, timedelta
 from unittest.mock import patch
 
+from beanie.operators import Set
 from httpx import AsyncClient
 from pytest_httpx import HTTPXMock
 from tests.conftest import CarReadFactory, OrderCreateFactory, UserOutFactory
 from tests.factories import UserMockResponse
 
+from app.config import get_settings
 from app.custom_exceptions import CarServiceError
-from app.models import Order
+from app.dao.stats import add_order_to_stats
+from app.models import CarStatusOutbox, Order, OrderIdempotencyKey, OutboxStateEnum
 from app.orders.schemas import OrderDictSerialized
 
 
@@ -17,10 +20,7 @@ async def test_create_order(client: AsyncClient, httpx_mock: HTTPXMock):
     order = OrderCreateFactory().build().serializable_dict()
     car = CarReadFactory().build()
     car.rental_cost = 25
-    with (
-        patch('app.dao.order.get_order_cars') as get_order_cars_mock,
-        patch('app.dao.order.update_cars_status') as update_cars_status_mock,
-    ):
+    with patch('app.dao.order.get_order_cars') as get_order_cars_mock:
         get_order_cars_mock.return_value = [car]
 
         response = await client.post('/orders/', json=order, headers={'auth-token': 'token'})
@@ -36,7 +36,9 @@ async def test_create_order(client: AsyncClient, httpx_mock: HTTPXMock):
     assert total_cost == 75
     assert isinstance(customer_id, str)
     get_order_cars_mock.assert_awaited_once()
-    update_cars_status_mock.assert_awaited_once()
+    outbox_entries = await CarStatusOutbox.find_all().to_list()
+    assert {entry.car_id for entry in outbox_entries} == set(order['order_cars'])
+    assert all(entry.state == OutboxStateEnum.PENDING for entry in outbox_entries)
 
 
 async def test_create_order_user_not_found(client: AsyncClient, httpx_mock: HTTPXMock):
@@ -49,22 +51,20 @@ async def test_create_order_user_not_found(client: AsyncClient, httpx_mock: HTTP
     assert response.json() == {'detail': 'User not found'}
 
 
-async def test_create_order_raise_car_not_found(client: AsyncClient, httpx_mock: HTTPXMock):
+async def test_create_order_does_not_call_car_service(client: AsyncClient, httpx_mock: HTTPXMock):
     httpx_mock.add_response(**UserMockResponse().model_dump(), json=UserOutFactory.build().model_dump())
     order = OrderCreateFactory().build().serializable_dict()
 
     with (
         patch('app.dao.order.get_order_cars') as get_order_cars_mock,
-        patch('app.dao.order.update_cars_status') as update_cars_status_mock,
+        patch('app.dao.car.update_cars_status') as update_cars_status_mock,
     ):
-        update_cars_status_mock.side_effect = CarServiceError(404, 'One ore more cars not found')
+        get_order_cars_mock.return_value = [CarReadFactory().build()]
 
         response = await client.post('/orders/', json=order, headers={'auth-token': 'token'})
 
-    assert response.status_code == 404
-    assert response.json() == {'detail': 'One ore more cars not found'}
-    get_order_cars_mock.assert_awaited_once()
-    update_cars_status_mock.assert_awaited_once()
+    assert response.status_code == 201
+    update_cars_status_mock.assert_not_awaited()
 
 
 async def test_create_order_not_found_car(client: AsyncClient, httpx_mock: HTTPXMock):
@@ -137,6 +137,28 @@ async def test_retrieve_order_with_cars(client: AsyncClient, orders: list[OrderD
     assert cars == [car.model_dump()]
 
 
+async def test_retrieve_order_not_modified(
+        client: AsyncClient,
+        orders: list[OrderDictSerialized],
+        httpx_mock: HTTPXMock,
+):
+    httpx_mock.add_response(
+        **UserMockResponse().model_dump(),
+        json=UserOutFactory.build().model_dump(exclude={'customer_id'}) | {'id': orders[0]['customer_id']},
+    )
+    car = CarReadFactory.build()
+    with patch('app.dao.order.get_order_cars') as get_order_cars_mock:
+        get_order_cars_mock.return_value = [car.model_dump()]
+        response = await client.get(f'/orders/{orders[0]["_id"]}', headers={'auth-token': 'token'})
+        not_modified = await client.get(
+            f'/orders/{orders[0]["_id"]}',
+            headers={'auth-token': 'token', 'If-None-Match': response.headers['etag']},
+        )
+
+    assert not_modified.status_code == 304
+    assert not_modified.headers['etag'] == response.headers['etag']
+
+
 async def test_retrieve_order_with_cars_not_owner(
         client: AsyncClient,
         orders: list[OrderDictSerialized],
@@ -321,3 +343,131 @@ async def test_update_order_not_owner(client: AsyncClient, orders: list[OrderDic
 
     assert response.status_code == 403
     assert response.json() == {'detail': 'User is not owner of order'}
+
+
+async def test_create_order_with_idempotency_key(client: AsyncClient, httpx_mock: HTTPXMock):
+    user = UserOutFactory.build().model_dump()
+    httpx_mock.add_response(**UserMockResponse().model_dump(), json=user)
+    httpx_mock.add_response(**UserMockResponse().model_dump(), json=user)
+    order = OrderCreateFactory().build().serializable_dict()
+    headers = {'auth-token': 'token', 'idempotency-key': 'order-key'}
+
+    with patch('app.dao.order.get_order_cars') as get_order_cars_mock:
+        get_order_cars_mock.return_value = [CarReadFactory().build()]
+
+        response = await client.post('/orders/', json=order, headers=headers)
+        retry_response = await client.post('/orders/', json=order, headers=headers)
+
+    assert response.status_code == 201
+    assert retry_response.status_code == 201
+    assert retry_response.json() == response.json()
+    get_order_cars_mock.assert_awaited_once()
+    assert await Order.find_all().count() == 1
+
+
+async def test_create_order_idempotency_key_reused(client: AsyncClient, httpx_mock: HTTPXMock):
+    user = UserOutFactory.build().model_dump()
+    httpx_mock.add_response(**UserMockResponse().model_dump(), json=user)
+    httpx_mock.add_response(**UserMockResponse().model_dump(), json=user)
+    order = OrderCreateFactory().build().serializable_dict()
+    headers = {'auth-token': 'token', 'idempotency-key': 'order-key'}
+
+    with patch('app.dao.order.get_order_cars') as get_order_cars_mock:
+        get_order_cars_mock.return_value = [CarReadFactory().build()]
+
+        await client.post('/orders/', json=order, headers=headers)
+        response = await client.post('/orders/', json=order | {'prepayment': order['prepayment'] + 1}, headers=headers)
+
+    assert response.status_code == 422
+    assert response.json() == {'detail': 'Idempotency key was used for another request'}
+    assert await Order.find_all().count() == 1
+
+
+async def test_create_order_idempotency_key_released_on_error(client: AsyncClient, httpx_mock: HTTPXMock):
+    user = UserOutFactory.build().model_dump()
+    httpx_mock.add_response(**UserMockResponse().model_dump(), json=user)
+    httpx_mock.add_response(**UserMockResponse().model_dump(), json=user)
+    order = OrderCreateFactory().build().serializable_dict()
+    headers = {'auth-token': 'token', 'idempotency-key': 'order-key'}
+
+    with patch('app.dao.order.get_order_cars') as get_order_cars_mock:
+        get_order_cars_mock.side_effect = [CarServiceError(500, 'Internal Server Error'), [CarReadFactory().build()]]
+
+        response = await client.post('/orders/', json=order, headers=headers)
+        retry_response = await client.post('/orders/', json=order, headers=headers)
+
+    assert response.status_code == 500
+    assert retry_response.status_code == 201
+    assert await OrderIdempotencyKey.find_all().count() == 1
+
+
+async def test_get_order_stats(client: AsyncClient, httpx_mock: HTTPXMock):
+    user = UserOutFactory.build().model_dump()
+    httpx_mock.add_response(**UserMockResponse().model_dump(), json=user)
+    httpx_mock.add_response(**UserMockResponse().model_dump(), json=user)
+    order = OrderCreateFactory().build().serializable_dict()
+    car = CarReadFactory().build()
+    car.rental_cost = 25
+
+    with patch('app.dao.order.get_order_cars') as get_order_cars_mock:
+        get_order_cars_mock.return_value = [car]
+        await client.post('/orders/', json=order | {'order_cars': [car.id]}, headers={'auth-token': 'token'})
+        await client.post('/orders/', json=order | {'order_cars': [car.id]}, headers={'auth-token': 'token'})
+
+    httpx_mock.add_response(**UserMockResponse().model_dump(), json=user)
+    order_db = await Order.find_one()
+    await client.delete(f'/orders/{order_db.id}', headers={'auth-token': 'token'})
+    response = await client.get('/orders/stats')
+
+    assert response.status_code == 200
+    result = response.json()
+    assert result['orders'] == 1
+    assert result['revenue'] == 75
+    assert result['rental_days'] == 3
+    assert len(result['days']) == 1
+    assert result['cars'] == [{'car_id': car.id, 'orders': 1, 'revenue': 75, 'rental_days': 3, 'utilisation': 0.0968}]
+
+
+async def test_get_order_stats_counts_order_without_cars(client: AsyncClient):
+    order = OrderCreateFactory.build().model_dump() | {'order_cars': []}
+    order_db = await Order(**order, rental_time=3, total_cost=75, customer_id='customer').insert()
+
+    await add_order_to_stats(order_db)
+    response = await client.get('/orders/stats')
+
+    assert response.status_code == 200
+    result = response.json()
+    assert (result['orders'], result['revenue'], result['rental_days']) == (1, 75, 0)
+    assert result['cars'] == []
+
+
+async def test_get_order_stats_wrong_period(client: AsyncClient):
+    response = await client.get('/orders/stats', params={'date_from': '2023-09-02', 'date_to': '2023-09-01'})
+
+    assert response.status_code == 422
+    assert response.json() == {'detail': 'Date from can not be higher than date to'}
+
+
+async def test_create_order_reclaims_idempotency_key_of_crashed_request(client: AsyncClient, httpx_mock: HTTPXMock):
+    user = UserOutFactory.build().model_dump()
+    for _ in range(3):
+        httpx_mock.add_response(**UserMockResponse().model_dump(), json=user)
+    order = OrderCreateFactory().build().serializable_dict()
+    headers = {'auth-token': 'token', 'idempotency-key': 'order-key'}
+
+    with (
+        patch('app.dao.order.get_order_cars') as get_order_cars_mock,
+        patch('app.orders.router.release_idempotency_key'),
+    ):
+        # The key is not released, as if the request crashed
+        get_order_cars_mock.side_effect = [CarServiceError(500, 'Internal Server Error'), [CarReadFactory().build()]]
+        await client.post('/orders/', json=order, headers=headers)
+
+        in_progress_response = await client.post('/orders/', json=order, headers=headers)
+        lease_expired = datetime.utcnow() - timedelta(seconds=get_settings().IDEMPOTENCY_KEY_LEASE + 1)
+        await OrderIdempotencyKey.find_all().update(Set({OrderIdempotencyKey.started_at: lease_expired}))
+        reclaimed_response = await client.post('/orders/', json=order, headers=headers)
+
+    assert in_progress_response.status_code == 409
+    assert reclaimed_response.status_code == 201
+    assert await Order.find_all().count() == 1
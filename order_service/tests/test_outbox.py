@@ -0,0 +1,103 @@
+import asyncio
+from datetime import datetime, timedelta
+import json
+
+from pytest_httpx import HTTPXMock
+
+from app.dao.outbox import enqueue_cars_status
+from app.models import CarStatusOutbox, OutboxStateEnum
+from app.outbox.flusher import flush_car_status_outbox
+
+
+CAR_STATUS_URL = 'http://test-car-service-host/cars/car-status/'
+
+
+async def create_outbox_entry(car_id: int, status: str, created_at: datetime) -> CarStatusOutbox:
+    return await CarStatusOutbox(car_id=car_id, car_status=status, created_at=created_at).insert()
+
+
+async def test_flush_coalesces_statuses_per_car(httpx_mock: HTTPXMock):
+    now = datetime.utcnow() - timedelta(seconds=10)
+    await create_outbox_entry(1, 'busy', now)
+    await create_outbox_entry(1, 'active', now + timedelta(seconds=1))
+    await create_outbox_entry(2, 'active', now + timedelta(seconds=2))
+    httpx_mock.add_response(method='PATCH', url=f'{CAR_STATUS_URL}?car_ids=1&car_ids=2', json=[])
+
+    processed = await flush_car_status_outbox()
+
+    assert processed == 3
+    requests = httpx_mock.get_requests()
+    assert len(requests) == 1
+    assert requests[0].headers['Idempotency-Key']
+    assert await CarStatusOutbox.find(CarStatusOutbox.state == OutboxStateEnum.SENT).count() == 3
+
+
+async def test_flush_skips_entries_claimed_by_another_flusher(httpx_mock: HTTPXMock):
+    now = datetime.utcnow()
+    claimed = await create_outbox_entry(1, 'busy', now - timedelta(seconds=10))
+    await claimed.set({CarStatusOutbox.claim_id: 'other', CarStatusOutbox.locked_until: now + timedelta(seconds=60)})
+    # The flusher which claimed this entry crashed, its lock expired
+    abandoned = await create_outbox_entry(2, 'active', now - timedelta(seconds=9))
+    await abandoned.set({CarStatusOutbox.claim_id: 'crashed', CarStatusOutbox.locked_until: now - timedelta(seconds=1)})
+    httpx_mock.add_response(method='PATCH', url=f'{CAR_STATUS_URL}?car_ids=2', json=[])
+
+    processed = await flush_car_status_outbox()
+
+    assert processed == 1
+    assert (await CarStatusOutbox.get(claimed.id)).state == OutboxStateEnum.PENDING
+    assert (await CarStatusOutbox.get(abandoned.id)).state == OutboxStateEnum.SENT
+
+
+async def test_concurrent_flushes_send_entry_once(httpx_mock: HTTPXMock):
+    await create_outbox_entry(1, 'active', datetime.utcnow() - timedelta(seconds=10))
+    httpx_mock.add_response(method='PATCH', url=f'{CAR_STATUS_URL}?car_ids=1', json=[])
+
+    processed = await asyncio.gather(flush_car_status_outbox(), flush_car_status_outbox())
+
+    assert sorted(processed) == [0, 1]
+    assert len(httpx_mock.get_requests()) == 1
+
+
+async def test_flush_schedules_retry_on_car_service_error(httpx_mock: HTTPXMock):
+    await create_outbox_entry(1, 'active', datetime.utcnow() - timedelta(seconds=10))
+    httpx_mock.add_response(method='PATCH', url=f'{CAR_STATUS_URL}?car_ids=1', status_code=500)
+
+    await flush_car_status_outbox()
+
+    entry = await CarStatusOutbox.find_one()
+    assert entry.state == OutboxStateEnum.PENDING
+    assert entry.attempts == 1
+    assert entry.next_attempt_at > datetime.utcnow()
+    assert await flush_car_status_outbox() == 0
+
+
+async def test_flush_isolates_not_found_car(httpx_mock: HTTPXMock):
+    now = datetime.utcnow() - timedelta(seconds=10)
+    await create_outbox_entry(1, 'active', now)
+    await create_outbox_entry(2, 'active', now + timedelta(seconds=1))
+    httpx_mock.add_response(method='PATCH', url=f'{CAR_STATUS_URL}?car_ids=1&car_ids=2', status_code=404)
+    httpx_mock.add_response(method='PATCH', url=f'{CAR_STATUS_URL}?car_ids=1', json=[])
+    httpx_mock.add_response(method='PATCH', url=f'{CAR_STATUS_URL}?car_ids=2', status_code=404)
+
+    await flush_car_status_outbox()
+
+    assert (await CarStatusOutbox.find_one(CarStatusOutbox.car_id == 1)).state == OutboxStateEnum.SENT
+    assert (await CarStatusOutbox.find_one(CarStatusOutbox.car_id == 2)).state == OutboxStateEnum.FAILED
+
+
+async def test_enqueue_supersedes_pending_entries_of_car(httpx_mock: HTTPXMock):
+    # An older status waiting for a retry must not be sent after the newer one
+    backed_off = await create_outbox_entry(1, 'busy', datetime.utcnow() - timedelta(seconds=10))
+    await backed_off.set({
+        CarStatusOutbox.attempts: 1,
+        CarStatusOutbox.next_attempt_at: datetime.utcnow() + timedelta(seconds=60),
+    })
+
+    await enqueue_cars_status([1], 'active')
+    httpx_mock.add_response(method='PATCH', url=f'{CAR_STATUS_URL}?car_ids=1', json=[])
+    await flush_car_status_outbox()
+
+    assert (await CarStatusOutbox.get(backed_off.id)).state == OutboxStateEnum.SUPERSEDED
+    [request] = httpx_mock.get_requests()
+    assert json.loads(request.read()) == {'status': 'active'}
+    assert await CarStatusOutbox.find(CarStatusOutbox.state == OutboxStateEnum.PENDING).count() == 0
@@ -0,0 +1,23 @@
+"""
+pytest plugin checking benchmarks against budgets, upper bounds of the mean time of a call in seconds.
+Budgets are about ten times the means measured on a developer machine, so slow CI machines pass. Smaller
+regressions are caught comparing runs: --benchmark-autosave, then --benchmark-compare
+--benchmark-compare-fail=mean:20% on the next commit.
+
+Load it from tests/conftest.py with pytest_plugins = ['service_common.benchmarks'].
+"""
+from typing import Callable
+
+import pytest
+
+
+@pytest.fixture
+def assert_within_budget(benchmark) -> Callable[[float], None]:
+    def check(budget: float):
+        # Stats are not collected with --benchmark-disable
+        if benchmark.stats is None:
+            return
+        mean = benchmark.stats.stats.mean
+        assert mean < budget, f'{benchmark.name} mean of {mean:.2e}s is over its budget of {budget}s'
+
+    return check
@@ -0,0 +1,88 @@
+"""
+Wire format of car positions published by cars_service and consumed by websocket_service. The codec of a message
+is named by its content type, so consumers decode whatever codec the producer is configured with.
+"""
+import struct
+from typing import Protocol
+
+import msgpack
+from pydantic import BaseModel
+
+
+class CoordinateMessage(BaseModel):
+    car_number: str
+    latitude: float
+    longitude: float
+
+
+class CoordinateCodec(Protocol):
+    name: str
+    content_type: str
+
+    def encode(self, message: CoordinateMessage) -> bytes:
+        ...
+
+    def decode(self, body: bytes) -> CoordinateMessage:
+        ...
+
+
+class JsonCodec:
+    name = 'json'
+    content_type = 'application/json'
+
+    def encode(self, message: CoordinateMessage) -> bytes:
+        return message.model_dump_json().encode()
+
+    def decode(self, body: bytes) -> CoordinateMessage:
+        return CoordinateMessage.model_validate_json(body)
+
+
+class MsgpackCodec:
+    """Positional array instead of a map, field names are not repeated in every message."""
+
+    name = 'msgpack'
+    content_type = 'application/msgpack'
+
+    def encode(self, message: CoordinateMessage) -> bytes:
+        return msgpack.packb([message.car_number, message.latitude, message.longitude])
+
+    def decode(self, body: bytes) -> CoordinateMessage:
+        car_number, latitude, longitude = msgpack.unpackb(body)
+        return CoordinateMessage(car_number=car_number, latitude=latitude, longitude=longitude)
+
+
+class StructCodec:
+    """Fixed 32 bytes: car number null padded to 16 bytes followed by latitude and longitude as doubles."""
+
+    name = 'struct'
+    content_type = 'application/x-coordinate-struct'
+    _format = struct.Struct('<16sdd')
+
+    def encode(self, message: CoordinateMessage) -> bytes:
+        car_number = message.car_number.encode()
+        if len(car_number) > 16:
+            raise ValueError(f'Car number {message.car_number} does not fit into 16 bytes')
+        return self._format.pack(car_number, message.latitude, message.longitude)
+
+    def decode(self, body: bytes) -> CoordinateMessage:
+        car_number, latitude, longitude = self._format.unpack(body)
+        return CoordinateMessage(car_number=car_number.rstrip(b'\0').decode(), latitude=latitude, longitude=longitude)
+
+
+CODECS: dict[str, CoordinateCodec] = {codec.name: codec for codec in (JsonCodec(), MsgpackCodec(), StructCodec())}
+
+
+CODECS_BY_CONTENT_TYPE: dict[str, CoordinateCodec] = {codec.content_type: codec for codec in CODECS.values()}
+
+
+def get_codec(name: str) -> CoordinateCodec:
+    return CODECS[name]
+
+
+def decode_coordinate_message(content_type: str | None, body: bytes) -> CoordinateMessage:
+    """Messages published before the content type header was introduced are JSON."""
+    try:
+        codec = CODECS_BY_CONTENT_TYPE[content_type or JsonCodec.content_type]
+    except KeyError:
+        raise ValueError(f'Unsupported content type {content_type}') from None
+    return codec.decode(body)
@@ -0,0 +1,66 @@
+import hashlib
+from typing import Callable
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+
+
+def make_etag(*parts) -> str:
+    return '"' + hashlib.sha1(repr(parts).encode()).hexdigest() + '"'
+
+
+def etag_matches(etag: str, if_none_match: str | None) -> bool:
+    """If-None-Match uses weak comparison, so W/ prefixes are ignored."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    candidates = {candidate.strip().removeprefix('W/') for candidate in if_none_match.split(',')}
+    return etag.removeprefix('W/') in candidates
+
+
+def not_modified(headers: dict) -> Response:
+    return Response(
+        status_code=304,
+        headers={name: value for name, value in headers.items() if name.lower() in ('etag', 'cache-control', 'vary')},
+    )
+
+
+def check_etag(request: Request, response: Response, *version) -> Response | None:
+    """
+    For endpoints which know the version of their data before loading it.
+    Returns 304 Not Modified when the client has this version, otherwise the ETag is added to the response.
+    """
+    etag = make_etag(request.url.path, str(request.query_params), *version)
+    if etag_matches(etag, request.headers.get('if-none-match')):
+        return not_modified({'etag': etag})
+    response.headers['etag'] = etag
+    return None
+
+
+class ETagRoute(APIRoute):
+    """
+    Successful GET responses get an ETag hashed from the body unless the endpoint set one with check_etag,
+    a matching If-None-Match turns them into 304 Not Modified and the body is not sent.
+    """
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            response = await handler(request)
+            if request.method != 'GET' or response.status_code != 200:
+                return response
+
+            if 'etag' not in response.headers:
+                body = getattr(response, 'body', None)
+                if body is None:
+                    # Streamed bodies are not buffered for hashing
+                    return response
+                response.headers['etag'] = '"' + hashlib.sha1(body).hexdigest() + '"'
+
+            if etag_matches(response.headers['etag'], request.headers.get('if-none-match')):
+                return not_modified(response.headers)
+            return response
+
+        return route_handler
@@ -0,0 +1,71 @@
+"""
+Request latency by route template and timing of calls to databases and other services. Client calls are labelled
+with the client, the operation and the target, each call is also a client span of the current trace.
+Hooks of the clients are in the modules of this package, they import their client library.
+"""
+from contextlib import contextmanager
+import time
+from typing import Iterator
+
+from fastapi import FastAPI
+from opentelemetry import trace
+from opentelemetry.trace import SpanKind, Status, StatusCode
+from prometheus_client import Gauge, Histogram
+from prometheus_fastapi_instrumentator import Instrumentator
+
+
+client_request_duration = Histogram(
+    'client_request_duration_seconds',
+    'Duration of calls to databases and other services',
+    labelnames=('client', 'operation', 'target'),
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+client_requests_in_progress = Gauge(
+    'client_requests_in_progress',
+    'Calls to databases and other services in progress',
+    labelnames=('client', 'target'),
+)
+
+
+def instrument_app(app: FastAPI):
+    """Request latency histograms and in progress gauges labelled by route template, exposed on /metrics."""
+    instrumentator = Instrumentator(
+        should_instrument_requests_inprogress=True,
+        inprogress_labels=True,
+        excluded_handlers=['/metrics'],
+    )
+    instrumentator.instrument(app).expose(app, include_in_schema=False)
+
+
+tracer = trace.get_tracer(__name__)
+
+
+class ClientCall:
+    def __init__(self, client: str, operation: str, target: str, attributes: dict):
+        self._labels = (client, operation, target)
+        self._in_progress = client_requests_in_progress.labels(client, target)
+        self._in_progress.inc()
+        self._started = time.perf_counter()
+        self.span = tracer.start_span(f'{operation} {target}', kind=SpanKind.CLIENT, attributes=attributes)
+
+    def finish(self, error: BaseException | None = None):
+        client_request_duration.labels(*self._labels).observe(time.perf_counter() - self._started)
+        self._in_progress.dec()
+        if error is not None:
+            self.span.record_exception(error)
+            self.span.set_status(Status(StatusCode.ERROR, str(error)))
+        self.span.end()
+
+
+@contextmanager
+def track_client_call(client: str, operation: str, target: str, attributes: dict) -> Iterator[trace.Span]:
+    """The span is current inside the block, so context propagated from it names this call as the parent."""
+    call = ClientCall(client, operation, target, attributes)
+    try:
+        with trace.use_span(call.span, end_on_exit=False, record_exception=False, set_status_on_exception=False):
+            yield call.span
+    except BaseException as error:
+        call.finish(error)
+        raise
+    call.finish()
@@ -0,0 +1,15 @@
+"""DynamoDB table operations by action and table."""
+from mypy_boto3_dynamodb.service_resource import Table
+from starlette.concurrency import run_in_threadpool
+
+from service_common.instrumentation import track_client_call
+
+
+async def run_table_operation(table: Table, operation: str, **kwargs) -> dict:
+    """
+    Boto3 is blocking, so table operations run in the threadpool. Time spent waiting for a thread is included,
+    it is latency the request sees.
+    """
+    attributes = {'db.system': 'dynamodb', 'db.operation': operation, 'aws.dynamodb.table_names': [table.name]}
+    with track_client_call('dynamodb', operation, table.name, attributes):
+        return await run_in_threadpool(getattr(table, operation), **kwargs)
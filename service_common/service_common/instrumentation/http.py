@@ -0,0 +1,15 @@
+"""Outgoing HTTP calls of httpx clients by method and host, they carry the trace context on."""
+import httpx
+from opentelemetry import propagate
+
+from service_common.instrumentation import track_client_call
+
+
+class InstrumentedTransport(httpx.AsyncHTTPTransport):
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        attributes = {'http.request.method': request.method, 'server.address': request.url.host}
+        with track_client_call('http', request.method, request.url.host, attributes) as span:
+            propagate.inject(request.headers)
+            response = await super().handle_async_request(request)
+            span.set_attribute('http.response.status_code', response.status_code)
+            return response
@@ -0,0 +1,45 @@
+"""MongoDB commands by name and collection, reported by the pymongo driver."""
+from opentelemetry import trace
+from opentelemetry.trace import SpanKind, Status, StatusCode
+from pymongo import monitoring
+
+from service_common.instrumentation import client_request_duration, client_requests_in_progress, tracer
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """
+    Pymongo reports commands from Motor's worker threads, they run in a copy of the caller's context
+    so command spans are children of the request span. The duration comes from the driver.
+    Targets are collections, commands without one (transactions, handshakes) are labelled with the database.
+    """
+
+    def __init__(self):
+        self._calls: dict[tuple, tuple[str, trace.Span]] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent):
+        collection = event.command.get(event.command_name)
+        target = f'{event.database_name}.{collection}' if isinstance(collection, str) else event.database_name
+        span = tracer.start_span(
+            f'{event.command_name} {target}',
+            kind=SpanKind.CLIENT,
+            attributes={'db.system': 'mongodb', 'db.operation': event.command_name, 'db.mongodb.collection': target},
+        )
+        self._calls[(event.connection_id, event.request_id)] = (target, span)
+        client_requests_in_progress.labels('mongodb', target).inc()
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent):
+        self._finish(event)
+
+    def failed(self, event: monitoring.CommandFailedEvent):
+        self._finish(event)
+
+    def _finish(self, event: monitoring.CommandSucceededEvent | monitoring.CommandFailedEvent):
+        call = self._calls.pop((event.connection_id, event.request_id), None)
+        if call is None:
+            return
+        target, span = call
+        client_request_duration.labels('mongodb', event.command_name, target).observe(event.duration_micros / 1e6)
+        client_requests_in_progress.labels('mongodb', target).dec()
+        if isinstance(event, monitoring.CommandFailedEvent):
+            span.set_status(Status(StatusCode.ERROR, str(event.failure.get('errmsg', ''))))
+        span.end()
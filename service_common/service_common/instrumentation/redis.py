@@ -0,0 +1,33 @@
+"""Redis commands by name and server."""
+import redis.asyncio as redis
+from redis.asyncio.client import Pipeline
+
+from service_common.instrumentation import track_client_call
+
+
+class InstrumentedRedis(redis.Redis):
+    """Times commands by name, pipelines are timed as a whole."""
+
+    async def execute_command(self, *args, **options):
+        command, target = str(args[0]).upper(), _redis_target(self.connection_pool)
+        with track_client_call('redis', command, target, _redis_attributes(command, target)):
+            return await super().execute_command(*args, **options)
+
+    def pipeline(self, transaction: bool = True, shard_hint: str | None = None) -> Pipeline:
+        return InstrumentedPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
+
+class InstrumentedPipeline(Pipeline):
+    async def execute(self, raise_on_error: bool = True):
+        target = _redis_target(self.connection_pool)
+        with track_client_call('redis', 'PIPELINE', target, _redis_attributes('PIPELINE', target)):
+            return await super().execute(raise_on_error)
+
+
+def _redis_target(pool: redis.ConnectionPool) -> str:
+    kwargs = pool.connection_kwargs
+    return f'{kwargs.get("host", "localhost")}:{kwargs.get("port", 6379)}/{kwargs.get("db", 0)}'
+
+
+def _redis_attributes(command: str, target: str) -> dict:
+    return {'db.system': 'redis', 'db.operation': command, 'server.address': target}
@@ -0,0 +1,43 @@
+"""PostgreSQL statements of an SQLAlchemy engine by SQL verb and table."""
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from service_common.instrumentation import ClientCall
+
+
+def instrument_engine(engine: AsyncEngine):
+    sync_engine = engine.sync_engine
+    event.listen(sync_engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(sync_engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(sync_engine, 'handle_error', _handle_error)
+
+
+def _before_cursor_execute(conn, cursor, statement: str, parameters, context, executemany: bool):
+    operation = statement.split(None, 1)[0].upper() if statement.strip() else 'UNKNOWN'
+    target = _sql_target(context) or conn.engine.url.database
+    attributes = {
+        'db.system': 'postgresql',
+        'db.operation': operation,
+        'db.sql.table': target,
+        'db.statement': statement,
+    }
+    conn.info.setdefault('client_calls', []).append(ClientCall('postgres', operation, target, attributes))
+
+
+def _after_cursor_execute(conn, cursor, statement: str, parameters, context, executemany: bool):
+    conn.info['client_calls'].pop().finish()
+
+
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get('client_calls'):
+        conn.info['client_calls'].pop().finish(exception_context.original_exception)
+
+
+def _sql_target(context) -> str | None:
+    statement = getattr(getattr(context, 'compiled', None), 'statement', None)
+    table = getattr(statement, 'table', None)
+    if table is None and hasattr(statement, 'get_final_froms'):
+        froms = statement.get_final_froms()
+        table = froms[0] if froms else None
+    return getattr(table, 'name', None)
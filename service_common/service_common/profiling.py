@@ -0,0 +1,228 @@
+"""
+Opt-in request profiling with pyinstrument, a statistical profiler. A sample of requests, and requests carrying
+a signed X-Profile-Token header, are profiled. Profiles are kept per route as speedscope JSON and collapsed stacks
+for flamegraph.pl, the newest PROFILING_KEEP_PER_ROUTE of every route, and served under /profiles to holders
+of a token signed with PROFILING_SECRET.
+"""
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+import hashlib
+import hmac
+import json
+from pathlib import Path
+import random
+import re
+import time
+from typing import Annotated, Literal, Protocol
+import uuid
+
+from fastapi import APIRouter, Depends, FastAPI, Header, HTTPException, status
+from fastapi.responses import FileResponse
+from prometheus_fastapi_instrumentator.routing import get_route_name
+from pyinstrument import Profiler
+from pyinstrument.frame import Frame
+from pyinstrument.renderers import SpeedscopeRenderer
+from pyinstrument.session import Session
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+PROFILE_TOKEN_HEADER = 'x-profile-token'
+PROFILE_ID_HEADER = 'x-profile-id'
+PROFILE_ID_PATTERN = re.compile(r'^\d+-[0-9a-f]{8}$')
+EXCLUDED_ROUTES = ('/metrics', '/profiles')
+FORMATS = {'speedscope': 'speedscope.json', 'collapsed': 'collapsed.txt'}
+
+
+class ProfilingSettings(Protocol):
+    PROFILING_ENABLED: bool
+    PROFILING_SAMPLE_RATE: float
+    PROFILING_SECRET: str
+    PROFILING_DIR: str
+    PROFILING_KEEP_PER_ROUTE: int
+    PROFILING_INTERVAL: float
+
+
+def init_profiling(app: FastAPI, settings: ProfilingSettings):
+    """Settings are read on every request, so they may change while the app runs."""
+    if not settings.PROFILING_ENABLED:
+        return
+    if not settings.PROFILING_SECRET:
+        raise RuntimeError('PROFILING_SECRET is required when profiling is enabled')
+    app.add_middleware(ProfilingMiddleware, settings=settings)
+    app.include_router(profiles_router(settings))
+
+
+def sign_profile_token(secret: str, expires: int) -> str:
+    """Token for the X-Profile-Token header, valid until the unix time expires."""
+    signature = hmac.new(secret.encode(), str(expires).encode(), hashlib.sha256).hexdigest()
+    return f'{expires}.{signature}'
+
+
+def is_valid_profile_token(secret: str, token: str | None) -> bool:
+    if not secret or not token:
+        return False
+    expires, _, _ = token.partition('.')
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    return hmac.compare_digest(token, sign_profile_token(secret, int(expires)))
+
+
+@dataclass
+class ProfileInfo:
+    id: str
+    route: str
+    method: str
+    path: str
+    status_code: int
+    duration: float
+    created_at: str
+
+
+class ProfileStore:
+    """Profiles as files of a directory, metadata of a profile is next to its outputs."""
+
+    def __init__(self, directory: str, keep_per_route: int):
+        self._directory = Path(directory)
+        self._keep_per_route = keep_per_route
+
+    def save(self, info: ProfileInfo, speedscope: str, collapsed: str):
+        self._directory.mkdir(parents=True, exist_ok=True)
+        (self._directory / f'{info.id}.{FORMATS["speedscope"]}').write_text(speedscope)
+        (self._directory / f'{info.id}.{FORMATS["collapsed"]}').write_text(collapsed)
+        (self._directory / f'{info.id}.meta.json').write_text(json.dumps(asdict(info)))
+        for outdated in self.list(info.route)[self._keep_per_route:]:
+            for path in self._directory.glob(f'{outdated.id}.*'):
+                path.unlink(missing_ok=True)
+
+    def list(self, route: str | None = None) -> list[ProfileInfo]:
+        """Newest first."""
+        profiles = []
+        for path in self._directory.glob('*.meta.json'):
+            try:
+                info = ProfileInfo(**json.loads(path.read_text()))
+            except (OSError, ValueError):
+                # Pruned by a concurrent save or not completely written yet
+                continue
+            if route is None or info.route == route:
+                profiles.append(info)
+        return sorted(profiles, key=lambda info: info.id, reverse=True)
+
+    def path(self, profile_id: str, format: str) -> Path | None:
+        if not PROFILE_ID_PATTERN.match(profile_id):
+            return None
+        path = self._directory / f'{profile_id}.{FORMATS[format]}'
+        return path if path.exists() else None
+
+
+def collapsed_stacks(root: Frame) -> str:
+    """Brendan Gregg's folded format, one line per stack with its own time in microseconds."""
+    lines = []
+
+    def walk(frame: Frame, stack: tuple[str, ...]):
+        stack = (*stack, f'{frame.function} ({frame.file_path_short}:{frame.line_no})'.replace(';', ','))
+        self_time = frame.time - sum(child.time for child in frame.children)
+        if self_time > 0:
+            lines.append(f'{";".join(stack)} {round(self_time * 1_000_000)}')
+        for child in frame.children:
+            walk(child, stack)
+
+    walk(root, ())
+    return '\n'.join(lines) + '\n'
+
+
+class ProfilingMiddleware:
+    """
+    Profiles the whole request in async mode, time spent awaiting shows as await frames. Code of sync routes runs
+    in the thread pool and is not sampled, requests shorter than the sampling interval leave no profile.
+    """
+
+    def __init__(self, app: ASGIApp, settings: ProfilingSettings):
+        self.app = app
+        self._settings = settings
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        route = get_route_name(Request(scope))
+        if not route or route.startswith(EXCLUDED_ROUTES) or not self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = f'{time.time_ns()}-{uuid.uuid4().hex[:8]}'
+        status_code = 500
+
+        async def send_with_profile_id(message: Message):
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+                MutableHeaders(scope=message).append(PROFILE_ID_HEADER, profile_id)
+            await send(message)
+
+        profiler = Profiler(interval=self._settings.PROFILING_INTERVAL, async_mode='enabled')
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            session = profiler.stop()
+            info = ProfileInfo(
+                id=profile_id,
+                route=route,
+                method=scope['method'],
+                path=scope['path'],
+                status_code=status_code,
+                duration=session.duration,
+                created_at=datetime.now(timezone.utc).isoformat(),
+            )
+            # Rendering walks every sampled frame, it would hold up other requests on the event loop
+            await run_in_threadpool(self._save, session, info)
+
+    def _should_profile(self, scope: Scope) -> bool:
+        token = Headers(scope=scope).get(PROFILE_TOKEN_HEADER)
+        if random.random() < self._settings.PROFILING_SAMPLE_RATE:
+            return True
+        return is_valid_profile_token(self._settings.PROFILING_SECRET, token)
+
+    def _save(self, session: Session, info: ProfileInfo):
+        root = session.root_frame()
+        if root is None:
+            return
+        store = ProfileStore(self._settings.PROFILING_DIR, self._settings.PROFILING_KEEP_PER_ROUTE)
+        store.save(info, SpeedscopeRenderer().render(session), collapsed_stacks(root))
+
+
+def profiles_router(settings: ProfilingSettings) -> APIRouter:
+    def get_profile_store() -> ProfileStore:
+        return ProfileStore(settings.PROFILING_DIR, settings.PROFILING_KEEP_PER_ROUTE)
+
+    def check_profile_token(x_profile_token: Annotated[str | None, Header()] = None):
+        if not is_valid_profile_token(settings.PROFILING_SECRET, x_profile_token):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='Invalid profile token')
+
+    router = APIRouter(prefix='/profiles', tags=['profiles'], dependencies=[Depends(check_profile_token)])
+
+    @router.get('/')
+    async def list_profiles(
+            store: Annotated[ProfileStore, Depends(get_profile_store)],
+            route: str | None = None,
+            limit: int = 50,
+    ) -> list[ProfileInfo]:
+        return (await run_in_threadpool(store.list, route))[:limit]
+
+    @router.get('/{profile_id}')
+    async def get_profile(
+            store: Annotated[ProfileStore, Depends(get_profile_store)],
+            profile_id: str,
+            format: Literal['speedscope', 'collapsed'] = 'speedscope',
+    ) -> FileResponse:
+        path = store.path(profile_id, format)
+        if path is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Profile not found')
+        media_type = 'application/json' if format == 'speedscope' else 'text/plain'
+        return FileResponse(path, media_type=media_type, filename=path.name)
+
+    return router
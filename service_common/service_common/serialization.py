@@ -0,0 +1,20 @@
+from functools import lru_cache
+from typing import Any
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+
+@lru_cache(maxsize=None)
+def get_type_adapter(type_: Any) -> TypeAdapter:
+    return TypeAdapter(type_)
+
+
+def model_response(type_: Any, content: Any, status_code: int = 200) -> Response:
+    """
+    Validates rows into type_ once and dumps them straight to JSON bytes. For response_model FastAPI validates,
+    dumps to Python objects and encodes those again. Keep response_model on the route for the schema.
+    """
+    adapter = get_type_adapter(type_)
+    body = adapter.dump_json(adapter.validate_python(content, from_attributes=True), by_alias=True)
+    return Response(body, status_code=status_code, media_type='application/json')
@@ -0,0 +1,90 @@
+"""
+OpenTelemetry tracing. Requests continue the W3C trace context sent by the caller, spans of client calls
+come from the hooks of service_common.instrumentation.
+"""
+import threading
+from typing import Literal, Protocol, Sequence
+
+from fastapi import FastAPI
+from google.protobuf import json_format
+from opentelemetry import propagate, trace
+from opentelemetry.exporter.otlp.proto.common.trace_encoder import encode_spans
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+from opentelemetry.trace import SpanKind, Status, StatusCode
+from prometheus_fastapi_instrumentator.routing import get_route_name
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+tracer = trace.get_tracer(__name__)
+
+
+class TracingSettings(Protocol):
+    TRACING_EXPORTER: Literal['none', 'file']
+    TRACING_FILE: str
+    TRACING_SAMPLE_RATIO: float
+
+
+def init_tracing(app: FastAPI, service_name: str, settings: TracingSettings):
+    """Without an exporter spans are not recorded, trace context is still passed on."""
+    if settings.TRACING_EXPORTER == 'file':
+        provider = TracerProvider(
+            resource=Resource.create({'service.name': service_name}),
+            sampler=ParentBased(TraceIdRatioBased(settings.TRACING_SAMPLE_RATIO)),
+        )
+        provider.add_span_processor(BatchSpanProcessor(OTLPFileSpanExporter(settings.TRACING_FILE)))
+        trace.set_tracer_provider(provider)
+    app.add_middleware(TracingMiddleware)
+
+
+class OTLPFileSpanExporter(SpanExporter):
+    """Appends spans as OTLP JSON lines, the format read by the collector's otlpjsonfile receiver."""
+
+    def __init__(self, path: str):
+        self._path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        line = json_format.MessageToJson(encode_spans(spans), indent=None)
+        with self._lock, open(self._path, 'a') as file:
+            file.write(line + '\n')
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self):
+        pass
+
+
+class TracingMiddleware:
+    """Server span per request, named by the route template so path parameters don't make every name unique."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        route = get_route_name(Request(scope))
+        attributes = {'http.request.method': scope['method'], 'url.path': scope['path']}
+        if route:
+            attributes['http.route'] = route
+        headers = {name.decode('latin-1'): value.decode('latin-1') for name, value in scope['headers']}
+
+        with tracer.start_as_current_span(
+            f'{scope["method"]} {route}' if route else scope['method'],
+            context=propagate.extract(headers),
+            kind=SpanKind.SERVER,
+            attributes=attributes,
+        ) as span:
+            async def send_with_status(message: Message):
+                if message['type'] == 'http.response.start':
+                    span.set_attribute('http.response.status_code', message['status'])
+                    if message['status'] >= 500:
+                        span.set_status(Status(StatusCode.ERROR))
+                await send(message)
+
+            await self.app(scope, receive, send_with_status)
@@ -0,0 +1,29 @@
+"""
+Compares trip message codecs by size and throughput.
+
+Usage, from service_common: python -m tests.codecs_benchmark [number_of_messages]
+"""
+import random
+import sys
+import timeit
+
+from service_common.coordinates import CODECS, CoordinateMessage
+
+
+def run(number: int = 100_000):
+    message = CoordinateMessage(
+        car_number='AE2321AE',
+        latitude=random.uniform(-90, 90),
+        longitude=random.uniform(-180, 180),
+    )
+
+    sys.stdout.write(f'{"codec":<10}{"bytes/msg":>12}{"encode msg/s":>16}{"decode msg/s":>16}\n')
+    for name, codec in CODECS.items():
+        body = codec.encode(message)
+        encode_time = timeit.timeit(lambda: codec.encode(message), number=number)
+        decode_time = timeit.timeit(lambda: codec.decode(body), number=number)
+        sys.stdout.write(f'{name:<10}{len(body):>12}{number / encode_time:>16,.0f}{number / decode_time:>16,.0f}\n')
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
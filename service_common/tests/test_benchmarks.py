@@ -0,0 +1,24 @@
+import pytest
+
+
+def test_benchmark_within_budget(benchmark, assert_within_budget):
+    assert benchmark(sum, range(10)) == 45
+    assert_within_budget(1.0)
+
+
+@pytest.mark.parametrize(('options', 'outcomes'), [((), {'failed': 1}), (('--benchmark-disable',), {'passed': 1})])
+def test_benchmark_over_budget(pytester: pytest.Pytester, options: tuple, outcomes: dict):
+    pytester.makeconftest("pytest_plugins = ['service_common.benchmarks']")
+    pytester.makepyfile(
+        """
+        def test_sum(benchmark, assert_within_budget):
+            benchmark(sum, range(10))
+            assert_within_budget(0.0)
+        """,
+    )
+
+    result = pytester.runpytest('-p', 'no:cacheprovider', *options)
+
+    result.assert_outcomes(**outcomes)
+    if 'failed' in outcomes:
+        result.stdout.fnmatch_lines(['*test_sum mean of *s is over its budget of 0.0s*'])
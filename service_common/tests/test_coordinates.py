@@ -0,0 +1,36 @@
+import pytest
+
+from service_common.coordinates import CODECS, CoordinateMessage, decode_coordinate_message, StructCodec
+
+
+MESSAGE = CoordinateMessage(car_number='AE2321AE', latitude=50.4501, longitude=-30.5234)
+
+
+@pytest.mark.parametrize('codec_name', ['json', 'msgpack', 'struct'])
+def test_codec_round_trip(codec_name):
+    codec = CODECS[codec_name]
+
+    assert codec.decode(codec.encode(MESSAGE)) == MESSAGE
+
+
+def test_struct_codec_rejects_long_car_number():
+    message = CoordinateMessage(car_number='A' * 17, latitude=0, longitude=0)
+
+    with pytest.raises(ValueError):
+        StructCodec().encode(message)
+
+
+@pytest.mark.parametrize('codec_name', ['json', 'msgpack', 'struct'])
+def test_decode_by_content_type(codec_name):
+    codec = CODECS[codec_name]
+
+    assert decode_coordinate_message(codec.content_type, codec.encode(MESSAGE)) == MESSAGE
+
+
+def test_decode_without_content_type_as_json():
+    assert decode_coordinate_message(None, MESSAGE.model_dump_json().encode()) == MESSAGE
+
+
+def test_decode_unsupported_content_type():
+    with pytest.raises(ValueError):
+        decode_coordinate_message('text/plain', b'AE2321AE')
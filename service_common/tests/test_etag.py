@@ -0,0 +1,58 @@
+from fastapi import FastAPI, Request, Response
+from httpx import AsyncClient
+import pytest
+
+from service_common.etag import check_etag, etag_matches, ETagRoute
+
+
+@pytest.mark.parametrize(
+    'if_none_match, matches',
+    [(None, False), ('"a"', True), ('W/"a"', True), ('"b", "a"', True), ('*', True), ('"b"', False)],
+)
+def test_etag_matches(if_none_match: str | None, matches: bool):
+    assert etag_matches('"a"', if_none_match) is matches
+
+
+@pytest.fixture
+def client() -> AsyncClient:
+    app = FastAPI()
+    app.router.route_class = ETagRoute
+    versions = {'items': 1}
+
+    @app.get('/items')
+    async def items(request: Request, response: Response):
+        if unchanged := check_etag(request, response, versions['items']):
+            return unchanged
+        return [versions['items']]
+
+    @app.post('/items')
+    async def add_item():
+        versions['items'] += 1
+
+    @app.get('/hashed')
+    async def hashed():
+        return {'hashed': True}
+
+    return AsyncClient(app=app, base_url='http://test')
+
+
+async def test_versioned_response_not_modified(client: AsyncClient):
+    async with client:
+        etag = (await client.get('/items')).headers['etag']
+        not_modified = await client.get('/items', headers={'If-None-Match': etag})
+        await client.post('/items')
+        modified = await client.get('/items', headers={'If-None-Match': etag})
+
+    assert not_modified.status_code == 304
+    assert not_modified.headers['etag'] == etag
+    assert modified.status_code == 200
+    assert modified.headers['etag'] != etag
+
+
+async def test_body_is_hashed_without_version(client: AsyncClient):
+    async with client:
+        etag = (await client.get('/hashed')).headers['etag']
+        not_modified = await client.get('/hashed', headers={'If-None-Match': etag})
+
+    assert not_modified.status_code == 304
+    assert not_modified.content == b''
@@ -0,0 +1,106 @@
+from dataclasses import dataclass
+import json
+import time
+
+from fastapi import FastAPI
+from httpx import AsyncClient
+import pytest
+
+from service_common.profiling import (
+    init_profiling,
+    is_valid_profile_token,
+    PROFILE_ID_HEADER,
+    PROFILE_TOKEN_HEADER,
+    sign_profile_token,
+)
+
+
+SECRET = 'profiling-secret'
+
+
+@dataclass
+class Settings:
+    PROFILING_DIR: str
+    PROFILING_ENABLED: bool = True
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_SECRET: str = SECRET
+    PROFILING_KEEP_PER_ROUTE: int = 2
+    PROFILING_INTERVAL: float = 0.001
+
+
+@pytest.fixture
+def profiled_client(tmp_path) -> AsyncClient:
+    app = FastAPI()
+
+    @app.get('/busy/{item_id}')
+    async def busy(item_id: int):
+        # Busy without awaiting, so samples land in this frame rather than in the event loop
+        deadline = time.perf_counter() + 0.02
+        while time.perf_counter() < deadline:
+            pass
+        return {'item_id': item_id}
+
+    init_profiling(app, Settings(PROFILING_DIR=str(tmp_path)))
+    return AsyncClient(app=app, base_url='http://test')
+
+
+def token() -> dict:
+    return {PROFILE_TOKEN_HEADER: sign_profile_token(SECRET, int(time.time()) + 60)}
+
+
+def test_profile_token():
+    assert is_valid_profile_token(SECRET, sign_profile_token(SECRET, int(time.time()) + 60))
+    assert not is_valid_profile_token(SECRET, sign_profile_token(SECRET, int(time.time()) - 1))
+    assert not is_valid_profile_token(SECRET, sign_profile_token('other-secret', int(time.time()) + 60))
+    assert not is_valid_profile_token('', sign_profile_token('', int(time.time()) + 60))
+    assert not is_valid_profile_token(SECRET, 'not-a-token')
+
+
+async def test_request_with_token_is_profiled(profiled_client: AsyncClient):
+    async with profiled_client as client:
+        response = await client.get('/busy/1', headers=token())
+        profile_id = response.headers[PROFILE_ID_HEADER]
+
+        profiles = (await client.get('/profiles/', headers=token())).json()
+        speedscope = await client.get(f'/profiles/{profile_id}', headers=token())
+        collapsed = await client.get(f'/profiles/{profile_id}', params={'format': 'collapsed'}, headers=token())
+
+    assert response.json() == {'item_id': 1}
+    assert profiles[0]['id'] == profile_id
+    assert profiles[0]['route'] == '/busy/{item_id}'
+    assert profiles[0]['status_code'] == 200
+    assert json.loads(speedscope.content)['$schema'] == 'https://www.speedscope.app/file-format-schema.json'
+    assert 'busy' in collapsed.text
+    assert all(line.rsplit(' ', 1)[1].isdigit() for line in collapsed.text.splitlines())
+
+
+async def test_unsampled_request_is_not_profiled(profiled_client: AsyncClient):
+    async with profiled_client as client:
+        response = await client.get('/busy/1', headers={PROFILE_TOKEN_HEADER: sign_profile_token('other', 2 ** 40)})
+        profiles = (await client.get('/profiles/', headers=token())).json()
+
+    assert PROFILE_ID_HEADER not in response.headers
+    assert profiles == []
+
+
+async def test_profiles_are_pruned_per_route(profiled_client: AsyncClient):
+    async with profiled_client as client:
+        responses = [await client.get(f'/busy/{item}', headers=token()) for item in range(3)]
+        profile_ids = [response.headers[PROFILE_ID_HEADER] for response in responses]
+        profiles = (await client.get('/profiles/', params={'route': '/busy/{item_id}'}, headers=token())).json()
+        pruned = await client.get(f'/profiles/{profile_ids[0]}', headers=token())
+
+    assert [profile['id'] for profile in profiles] == profile_ids[:0:-1]
+    assert pruned.status_code == 404
+
+
+async def test_profiles_require_token(profiled_client: AsyncClient):
+    async with profiled_client as client:
+        response = await client.get('/profiles/')
+
+    assert response.status_code == 403
+
+
+def test_profiling_requires_secret(tmp_path):
+    with pytest.raises(RuntimeError):
+        init_profiling(FastAPI(), Settings(PROFILING_DIR=str(tmp_path), PROFILING_SECRET=''))
@@ -0,0 +1,29 @@
+from datetime import date
+import json
+
+from pydantic import BaseModel, Field
+
+from service_common.serialization import get_type_adapter, model_response
+
+
+class Item(BaseModel):
+    item_id: int = Field(alias='id')
+    day: date
+
+
+class Row:
+    def __init__(self, item_id: int):
+        self.id = item_id
+        self.day = date(2023, 9, 1)
+
+
+def test_model_response_validates_attributes_and_dumps_by_alias():
+    response = model_response(list[Item], [Row(1), Row(2)], status_code=201)
+
+    assert response.status_code == 201
+    assert response.media_type == 'application/json'
+    assert json.loads(response.body) == [{'id': 1, 'day': '2023-09-01'}, {'id': 2, 'day': '2023-09-01'}]
+
+
+def test_type_adapter_is_built_once():
+    assert get_type_adapter(list[Item]) is get_type_adapter(list[Item])
@@ -0,0 +1,51 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
+
+from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+from service_common.instrumentation import instrument_app
+from service_common.profiling import init_profiling
+from service_common.tracing import init_tracing
+
+from app.car_messages.consumer import handle_car_trip
+from app.car_messages.hub import PositionHub
+from app.car_messages.router import router as car_messages_router
+from app.config import get_settings
+from app.positions.router import router as positions_router
+from app.positions.store import PositionWriter
+from app.rebbit_connection import close_pools, create_channel_pool, create_connection_pool
+from app.redis_client import get_redis_client
+
+
+@asynccontextmanager
+async def lifespan(application: FastAPI):
+    settings = get_settings()
+    connection_pool = create_connection_pool()
+    channel_pool = create_channel_pool(connection_pool)
+    application.state.position_hub = PositionHub(settings.WS_SEND_QUEUE_SIZE, settings.WS_MAX_SUBSCRIPTIONS)
+
+    position_writer = PositionWriter(
+        get_redis_client(),
+        settings.POSITIONS_FLUSH_INTERVAL,
+        settings.POSITIONS_FLUSH_SIZE,
+    )
+    position_writer.start()
+
+    consumer = asyncio.create_task(handle_car_trip(channel_pool, application.state.position_hub, position_writer))
+    yield
+    consumer.cancel()
+    with suppress(asyncio.CancelledError):
+        await consumer
+    await position_writer.stop()
+    await close_pools(channel_pool, connection_pool)
+
+
+def create_app() -> FastAPI:
+    settings = get_settings()
+    app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
+    app.include_router(car_messages_router)
+    app.include_router(positions_router)
+    instrument_app(app)
+    init_tracing(app, 'websocket_service', settings)
+    init_profiling(app, settings)
+    return app
@@ -1,30 +1,200 @@
 import asyncio
+from contextlib import suppress
+from datetime import datetime, timezone
 import logging
+import time
+from typing import Callable
 
-from aio_pika.abc import AbstractIncomingMessage
+from aio_pika import DeliveryMode, Message
+from aio_pika.abc import AbstractChannel, AbstractIncomingMessage
+from aio_pika.pool import Pool
+from opentelemetry import propagate, trace
+from opentelemetry.trace import SpanKind
+from service_common.coordinates import CoordinateMessage, decode_coordinate_message
 
+from app.car_messages.hub import PositionHub
 from app.config import get_settings
-from app.rebbit_connection import get_connection_pool
+from app.custom_metrics import (
+    consumer_lag,
+    consumer_processing_time,
+    consumer_redeliveries,
+    dead_lettered_messages,
+)
+from app.positions.store import PositionWriter
 
 
 logger = logging.getLogger(__name__)
+tracer = trace.get_tracer(__name__)
 
 
-async def on_message(message: AbstractIncomingMessage):
-    await asyncio.sleep(1)
-    logger.info(f' [x] Received {message.body}')
-    await message.ack()
+class BatchAcker:
+    """
+    Acknowledges deliveries of one channel in batches. Workers finish out of order, so only the highest
+    contiguous delivery tag is acked with multiple=True and messages still in progress are never acked early.
+    """
 
+    def __init__(self, batch_size: int):
+        self._batch_size = batch_size
+        self._next_tag = 1
+        self._finished: dict[int, AbstractIncomingMessage] = {}
+        self._last: AbstractIncomingMessage | None = None
+        self._pending = 0
 
-async def handle_car_trip(rabbit_pool):
-    async with rabbit_pool.acquire() as connection:
-        channel = await connection.channel()
-        queue = await channel.declare_queue(get_settings().QUEUE_NAME, durable=True)
+    async def done(self, message: AbstractIncomingMessage):
+        if message.delivery_tag < self._next_tag:
+            # Delivery tags start over from 1 when a robust channel is reopened
+            self._reset()
 
-        # Start listening the queue with name 'task_queue'
-        await queue.consume(on_message)
-        await asyncio.Future()
+        self._finished[message.delivery_tag] = message
+        while self._next_tag in self._finished:
+            self._last = self._finished.pop(self._next_tag)
+            self._next_tag += 1
+            self._pending += 1
 
+        if self._pending >= self._batch_size:
+            await self.flush()
 
-if __name__ == '__main__':
-    asyncio.run(handle_car_trip(get_connection_pool()))
+    async def flush(self):
+        if self._last is None:
+            return
+
+        last, self._last, self._pending = self._last, None, 0
+        try:
+            await last.ack(multiple=True)
+        except Exception:
+            logger.exception('Failed to acknowledge trip messages up to %s', last.delivery_tag)
+
+    def _reset(self):
+        self._next_tag = 1
+        self._finished.clear()
+        self._last = None
+        self._pending = 0
+
+
+class ConsumerEngine:
+    """
+    Consumes trip messages with a prefetch window shared by a fixed number of workers.
+    Messages are decoded by their content type and passed to the handler,
+    malformed ones are moved to a dead letter queue.
+    """
+
+    def __init__(
+            self,
+            handler: Callable[[CoordinateMessage], None],
+            queue_name: str,
+            prefetch_count: int = 100,
+            workers: int = 4,
+            ack_batch_size: int = 50,
+            ack_flush_interval: float = 0.2,
+    ):
+        self._handler = handler
+        self._queue_name = queue_name
+        self._dead_letter_queue_name = f'{queue_name}.dead-letter'
+        self._prefetch_count = prefetch_count
+        self._workers = workers
+        # Broker stops delivering once the whole prefetch window is unacked, so a batch must fit in it
+        self._acker = BatchAcker(max(1, min(ack_batch_size, prefetch_count // 2)))
+        self._ack_flush_interval = ack_flush_interval
+        self._messages: asyncio.Queue[AbstractIncomingMessage] = asyncio.Queue()
+        self._channel: AbstractChannel | None = None
+
+    async def run(self, channel_pool: Pool):
+        async with channel_pool.acquire() as channel:
+            self._channel = channel
+            await channel.set_qos(prefetch_count=self._prefetch_count)
+            queue = await channel.declare_queue(self._queue_name, durable=True)
+            await channel.declare_queue(self._dead_letter_queue_name, durable=True)
+
+            tasks = [asyncio.create_task(self._work()) for _ in range(self._workers)]
+            tasks.append(asyncio.create_task(self._flush_acks()))
+            consumer_tag = await queue.consume(self._messages.put)
+            try:
+                await asyncio.Future()
+            finally:
+                await queue.cancel(consumer_tag)
+                for task in tasks:
+                    task.cancel()
+                with suppress(asyncio.CancelledError):
+                    await asyncio.gather(*tasks)
+                await self._acker.flush()
+
+    async def process(self, message: AbstractIncomingMessage):
+        started = time.perf_counter()
+        if message.redelivered:
+            consumer_redeliveries.inc()
+        if message.timestamp is not None:
+            consumer_lag.observe(max(0.0, time.time() - _as_utc(message.timestamp).timestamp()))
+
+        try:
+            with tracer.start_as_current_span(
+                f'{self._queue_name} process',
+                context=propagate.extract(_text_headers(message.headers or {})),
+                kind=SpanKind.CONSUMER,
+                attributes={'messaging.system': 'rabbitmq', 'messaging.destination.name': self._queue_name},
+            ):
+                try:
+                    self._handler(decode_coordinate_message(message.content_type, message.body))
+                except Exception as error:
+                    await self._dead_letter(message, error)
+        finally:
+            # Every delivery tag is marked done, even if dead lettering failed, one missing tag stalls all later acks
+            consumer_processing_time.observe(time.perf_counter() - started)
+            await self._acker.done(message)
+
+    async def _work(self):
+        while True:
+            message = await self._messages.get()
+            try:
+                await self.process(message)
+            except Exception:
+                logger.exception('Failed to process trip message %s', message.delivery_tag)
+
+    async def _flush_acks(self):
+        while True:
+            await asyncio.sleep(self._ack_flush_interval)
+            await self._acker.flush()
+
+    async def _dead_letter(self, message: AbstractIncomingMessage, error: Exception):
+        logger.warning('Dead lettering trip message %r: %s', message.body, error)
+        dead_lettered_messages.inc()
+        await self._channel.default_exchange.publish(
+            Message(
+                body=message.body,
+                headers={'x-error': str(error)[:1000]},
+                content_type=message.content_type,
+                delivery_mode=DeliveryMode.PERSISTENT,
+            ),
+            routing_key=self._dead_letter_queue_name,
+        )
+
+
+def _text_headers(headers: dict) -> dict[str, str]:
+    # Long string headers may be decoded as bytes
+    return {
+        name: value.decode() if isinstance(value, bytes) else value
+        for name, value in headers.items()
+        if isinstance(value, (str, bytes))
+    }
+
+
+def _as_utc(timestamp: datetime) -> datetime:
+    # AMQP timestamps are decoded as naive UTC datetimes
+    return timestamp if timestamp.tzinfo else timestamp.replace(tzinfo=timezone.utc)
+
+
+async def handle_car_trip(channel_pool: Pool, hub: PositionHub, position_writer: PositionWriter):
+    settings = get_settings()
+
+    def on_position(position: CoordinateMessage):
+        hub.publish(position)
+        position_writer.add(position)
+
+    engine = ConsumerEngine(
+        on_position,
+        settings.QUEUE_NAME,
+        prefetch_count=settings.RABBITMQ_PREFETCH_COUNT,
+        workers=settings.CONSUMER_WORKERS,
+        ack_batch_size=settings.CONSUMER_ACK_BATCH_SIZE,
+        ack_flush_interval=settings.CONSUMER_ACK_FLUSH_INTERVAL,
+    )
+    await engine.run(channel_pool)
@@ -0,0 +1,92 @@
+import asyncio
+from collections import OrderedDict
+from typing import Annotated
+
+from fastapi import Depends
+from service_common.coordinates import CoordinateMessage
+from starlette.requests import HTTPConnection
+
+from app.custom_metrics import dropped_positions, websocket_connections
+
+
+class Subscriber:
+    """
+    Send queue of one websocket connection. Only the latest not yet sent position of every car is kept,
+    so a slow client receives fresh positions instead of a growing backlog of stale ones.
+    """
+
+    def __init__(self, max_pending: int):
+        self.car_numbers: set[str] = set()
+        self._max_pending = max_pending
+        self._pending: OrderedDict[str, str] = OrderedDict()
+        self._ready = asyncio.Event()
+
+    def put(self, car_number: str, payload: str):
+        if car_number in self._pending:
+            dropped_positions.inc()
+        elif len(self._pending) >= self._max_pending:
+            self._pending.popitem(last=False)
+            dropped_positions.inc()
+
+        self._pending[car_number] = payload
+        self._ready.set()
+
+    async def get(self) -> str:
+        while not self._pending:
+            self._ready.clear()
+            await self._ready.wait()
+        _, payload = self._pending.popitem(last=False)
+        return payload
+
+
+class PositionHub:
+    """Fans out car positions to subscribers of the car, every position is serialized once for all of them."""
+
+    def __init__(self, max_pending: int, max_subscriptions: int):
+        self._max_pending = max_pending
+        self._max_subscriptions = max_subscriptions
+        self._topics: dict[str, set[Subscriber]] = {}
+
+    def connect(self) -> Subscriber:
+        websocket_connections.inc()
+        return Subscriber(self._max_pending)
+
+    def disconnect(self, subscriber: Subscriber):
+        self.unsubscribe(subscriber, list(subscriber.car_numbers))
+        websocket_connections.dec()
+
+    def subscribe(self, subscriber: Subscriber, car_numbers: list[str]) -> bool:
+        """Returns False when subscription limit of the connection would be exceeded."""
+        if len(subscriber.car_numbers | set(car_numbers)) > self._max_subscriptions:
+            return False
+
+        for car_number in car_numbers:
+            self._topics.setdefault(car_number, set()).add(subscriber)
+            subscriber.car_numbers.add(car_number)
+        return True
+
+    def unsubscribe(self, subscriber: Subscriber, car_numbers: list[str]):
+        for car_number in car_numbers:
+            subscriber.car_numbers.discard(car_number)
+            subscribers = self._topics.get(car_number)
+            if subscribers is None:
+                continue
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self._topics[car_number]
+
+    def publish(self, position: CoordinateMessage):
+        subscribers = self._topics.get(position.car_number)
+        if not subscribers:
+            return
+
+        payload = position.model_dump_json()
+        for subscriber in subscribers:
+            subscriber.put(position.car_number, payload)
+
+
+def get_position_hub(connection: HTTPConnection) -> PositionHub:
+    return connection.app.state.position_hub
+
+
+hub_dependency = Annotated[PositionHub, Depends(get_position_hub)]
@@ -0,0 +1,56 @@
+import asyncio
+from contextlib import suppress
+from typing import Annotated
+
+from fastapi import APIRouter, Query, status, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+
+from app.car_messages.hub import hub_dependency, Subscriber
+from app.car_messages.schemas import SubscriptionActionEnum, SubscriptionCommand
+
+
+router = APIRouter(tags=['Car positions'])
+
+
+@router.websocket('/ws/positions')
+async def car_positions(
+        websocket: WebSocket,
+        hub: hub_dependency,
+        car_numbers: Annotated[list[str] | None, Query()] = None,
+):
+    """
+    Streams positions of subscribed cars. Cars may be passed as query parameters
+    and changed later with messages like {"action": "subscribe", "car_numbers": ["AE2321AE"]}.
+    """
+    await websocket.accept()
+    subscriber = hub.connect()
+    sender = asyncio.create_task(_send_positions(websocket, subscriber))
+    try:
+        if car_numbers and not hub.subscribe(subscriber, car_numbers):
+            await websocket.close(status.WS_1008_POLICY_VIOLATION, 'Too many subscriptions')
+            return
+
+        while True:
+            try:
+                command = SubscriptionCommand.model_validate_json(await websocket.receive_text())
+            except ValidationError:
+                await websocket.close(status.WS_1003_UNSUPPORTED_DATA, 'Invalid subscription command')
+                return
+
+            if command.action == SubscriptionActionEnum.UNSUBSCRIBE:
+                hub.unsubscribe(subscriber, command.car_numbers)
+            elif not hub.subscribe(subscriber, command.car_numbers):
+                await websocket.close(status.WS_1008_POLICY_VIOLATION, 'Too many subscriptions')
+                return
+    except WebSocketDisconnect:
+        pass
+    finally:
+        hub.disconnect(subscriber)
+        sender.cancel()
+        with suppress(asyncio.CancelledError, WebSocketDisconnect, RuntimeError):
+            await sender
+
+
+async def _send_positions(websocket: WebSocket, subscriber: Subscriber):
+    while True:
+        await websocket.send_text(await subscriber.get())
@@ -0,0 +1,13 @@
+from enum import auto, StrEnum
+
+from pydantic import BaseModel, Field
+
+
+class SubscriptionActionEnum(StrEnum):
+    SUBSCRIBE = auto()
+    UNSUBSCRIBE = auto()
+
+
+class SubscriptionCommand(BaseModel):
+    action: SubscriptionActionEnum
+    car_numbers: list[str] = Field(min_length=1)
@@ -1,4 +1,5 @@
 from functools import lru_cache
+from typing import Literal
 
 from dotenv import load_dotenv
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -10,8 +11,35 @@ load_dotenv()
 class Settings(BaseSettings):
 
     RABBITMQ_URL: str
+    RABBITMQ_CONNECTION_POOL_SIZE: int = 2
+    RABBITMQ_CHANNEL_POOL_SIZE: int = 10
+    RABBITMQ_PREFETCH_COUNT: int = 100
     QUEUE_NAME: str
 
+    CONSUMER_WORKERS: int = 4
+    CONSUMER_ACK_BATCH_SIZE: int = 50
+    CONSUMER_ACK_FLUSH_INTERVAL: float = 0.2
+
+    REDIS_HOST: str
+    REDIS_PORT: int
+    REDIS_DB: int
+    POSITIONS_FLUSH_INTERVAL: float = 0.5
+    POSITIONS_FLUSH_SIZE: int = 500
+
+    WS_SEND_QUEUE_SIZE: int = 64
+    WS_MAX_SUBSCRIPTIONS: int = 100
+
+    TRACING_EXPORTER: Literal['none', 'file'] = 'none'
+    TRACING_FILE: str = 'traces.jsonl'
+    TRACING_SAMPLE_RATIO: float = 1.0
+
+    PROFILING_ENABLED: bool = False
+    PROFILING_SAMPLE_RATE: float = 0.01
+    PROFILING_SECRET: str = ''
+    PROFILING_DIR: str = 'profiles'
+    PROFILING_KEEP_PER_ROUTE: int = 20
+    PROFILING_INTERVAL: float = 0.001
+
     model_config = SettingsConfigDict(case_sensitive=True, frozen=False, env_file='.env')
 
 
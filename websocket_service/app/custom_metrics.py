@@ -0,0 +1,26 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+
+rabbit_open_connections = Gauge('rabbitmq_open_connections', 'Open connections to RabbitMQ')
+
+rabbit_reconnects = Counter('rabbitmq_reconnects', 'Successful reconnects to RabbitMQ')
+
+websocket_connections = Gauge('websocket_connections', 'Open websocket connections')
+
+dropped_positions = Counter('websocket_dropped_positions', 'Stale positions dropped for slow websocket clients')
+
+consumer_lag = Histogram(
+    'trip_messages_lag_seconds',
+    'Time between publishing a trip message and picking it up',
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+
+consumer_processing_time = Histogram(
+    'trip_messages_processing_seconds',
+    'Time spent processing a trip message',
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5),
+)
+
+consumer_redeliveries = Counter('trip_messages_redelivered', 'Trip messages delivered more than once')
+
+dead_lettered_messages = Counter('trip_messages_dead_lettered', 'Malformed trip messages dead lettered')
@@ -0,0 +1,26 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Query
+
+from app.positions.schemas import NearbyPositionOut, PositionOut
+from app.positions.store import get_nearby_positions, get_positions
+from app.redis_client import db_dependency
+
+
+router = APIRouter(prefix='/positions', tags=['Car positions'])
+
+
+@router.get('/', response_model=list[PositionOut])
+async def positions(car_numbers: Annotated[list[str], Query(min_length=1)], db: db_dependency):
+    return await get_positions(db, car_numbers)
+
+
+@router.get('/nearby', response_model=list[NearbyPositionOut])
+async def nearby_positions(
+        db: db_dependency,
+        lat: Annotated[float, Query(ge=-90, le=90)],
+        lon: Annotated[float, Query(ge=-180, le=180)],
+        radius: Annotated[float, Query(gt=0, description='Radius in kilometers')],
+        limit: Annotated[int, Query(ge=1, le=1000)] = 100,
+):
+    return await get_nearby_positions(db, lat, lon, radius, limit)
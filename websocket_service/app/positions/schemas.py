@@ -0,0 +1,14 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class PositionOut(BaseModel):
+    car_number: str
+    latitude: float
+    longitude: float
+    updated_at: datetime
+
+
+class NearbyPositionOut(PositionOut):
+    distance: float
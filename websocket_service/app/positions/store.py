@@ -0,0 +1,119 @@
+import asyncio
+from contextlib import suppress
+from datetime import datetime, timezone
+import logging
+
+from redis.asyncio import Redis
+from service_common.coordinates import CoordinateMessage
+
+from app.positions.schemas import NearbyPositionOut, PositionOut
+
+
+logger = logging.getLogger(__name__)
+
+POSITIONS_KEY = 'car_positions'
+POSITIONS_GEO_KEY = 'car_positions:geo'
+# Redis GEO can not index latitudes closer to the poles than this
+MAX_GEO_LATITUDE = 85.05112878
+
+
+class PositionWriter:
+    """
+    Keeps the latest position of every car in Redis. Positions are buffered per car
+    and written with one pipeline per flush, so a burst of messages costs a single round trip.
+    """
+
+    def __init__(self, db: Redis, flush_interval: float = 0.5, flush_size: int = 500):
+        self._db = db
+        self._flush_interval = flush_interval
+        self._flush_size = flush_size
+        self._pending: dict[str, PositionOut] = {}
+        self._full = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def add(self, position: CoordinateMessage):
+        self._pending[position.car_number] = PositionOut(
+            **position.model_dump(),
+            updated_at=datetime.now(timezone.utc),
+        )
+        if len(self._pending) >= self._flush_size:
+            self._full.set()
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        await self.flush()
+
+    async def flush(self):
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return
+
+        indexed, not_indexed = [], []
+        for position in pending.values():
+            if abs(position.latitude) <= MAX_GEO_LATITUDE:
+                indexed.append(position)
+            else:
+                not_indexed.append(position.car_number)
+
+        async with self._db.pipeline(transaction=False) as pipe:
+            pipe.hset(POSITIONS_KEY, mapping={number: item.model_dump_json() for number, item in pending.items()})
+            if indexed:
+                pipe.geoadd(
+                    POSITIONS_GEO_KEY,
+                    [value for item in indexed for value in (item.longitude, item.latitude, item.car_number)],
+                )
+            if not_indexed:
+                pipe.zrem(POSITIONS_GEO_KEY, *not_indexed)
+            await pipe.execute()
+
+    async def _run(self):
+        while True:
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._full.wait(), self._flush_interval)
+            self._full.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception('Failed to store car positions')
+
+
+async def get_positions(db: Redis, car_numbers: list[str]) -> list[PositionOut]:
+    positions = await db.hmget(POSITIONS_KEY, car_numbers)
+    return [PositionOut.model_validate_json(position) for position in positions if position is not None]
+
+
+async def get_nearby_positions(
+        db: Redis,
+        latitude: float,
+        longitude: float,
+        radius: float,
+        limit: int,
+) -> list[NearbyPositionOut]:
+    """Radius is in kilometers, the closest cars come first."""
+    found = await db.geosearch(
+        POSITIONS_GEO_KEY,
+        longitude=longitude,
+        latitude=latitude,
+        radius=radius,
+        unit='km',
+        sort='ASC',
+        count=limit,
+        withdist=True,
+    )
+    if not found:
+        return []
+
+    car_numbers = [car_number for car_number, _ in found]
+    positions = await db.hmget(POSITIONS_KEY, car_numbers)
+    return [
+        NearbyPositionOut(**PositionOut.model_validate_json(position).model_dump(), distance=distance)
+        for (_, distance), position in zip(found, positions)
+        if position is not None
+    ]
@@ -1,19 +1,60 @@
 import asyncio
-from functools import lru_cache
+import logging
 
 from aio_pika import connect_robust
-from aio_pika.abc import AbstractRobustConnection
+from aio_pika.abc import AbstractChannel, AbstractRobustConnection
 from aio_pika.pool import Pool
 
 from app.config import get_settings
+from app.custom_metrics import rabbit_open_connections, rabbit_reconnects
+
+
+logger = logging.getLogger(__name__)
 
 
 async def _get_connection() -> AbstractRobustConnection:
-    return await connect_robust(get_settings().RABBITMQ_URL)
+    connection = await connect_robust(get_settings().RABBITMQ_URL)
+    connection.close_callbacks.add(_on_connection_close)
+    connection.reconnect_callbacks.add(_on_reconnect)
+    rabbit_open_connections.inc()
+    return connection
+
+
+def _on_connection_close(connection: AbstractRobustConnection, exc: BaseException | None = None):
+    rabbit_open_connections.dec()
+    logger.info('RabbitMQ connection closed: %r', exc)
+
+
+def _on_reconnect(connection: AbstractRobustConnection):
+    rabbit_open_connections.inc()
+    rabbit_reconnects.inc()
+    logger.info('RabbitMQ connection restored')
+
+
+async def _get_channel(connection_pool: Pool) -> AbstractChannel:
+    async with connection_pool.acquire() as connection:
+        return await connection.channel()
+
+
+def create_connection_pool() -> Pool:
+    """Must be called from the running loop, a pool bound to another loop never delivers its connections."""
+    return Pool(
+        _get_connection,
+        max_size=get_settings().RABBITMQ_CONNECTION_POOL_SIZE,
+        loop=asyncio.get_running_loop(),
+    )
+
+
+def create_channel_pool(connection_pool: Pool) -> Pool:
+    return Pool(
+        _get_channel,
+        connection_pool,
+        max_size=get_settings().RABBITMQ_CHANNEL_POOL_SIZE,
+        loop=asyncio.get_running_loop(),
+    )
 
 
-@lru_cache
-def get_connection_pool() -> Pool:
-    loop = asyncio.new_event_loop()
-    connection_pool = Pool(_get_connection, max_size=5, loop=loop)
-    return connection_pool
+async def close_pools(channel_pool: Pool, connection_pool: Pool):
+    """Channels are closed before connections, so unacknowledged deliveries are returned to the queue first."""
+    await channel_pool.close()
+    await connection_pool.close()
@@ -0,0 +1,17 @@
+from functools import lru_cache
+from typing import Annotated
+
+from fastapi import Depends
+import redis.asyncio as redis
+from service_common.instrumentation.redis import InstrumentedRedis
+
+from app.config import get_settings
+
+
+@lru_cache
+def get_redis_client():
+    settings = get_settings()
+    return InstrumentedRedis(host=settings.REDIS_HOST, port=settings.REDIS_PORT, db=settings.REDIS_DB)
+
+
+db_dependency = Annotated[redis.Redis, Depends(get_redis_client)]
@@ -0,0 +1,116 @@
+import asyncio
+from unittest.mock import MagicMock
+
+from prometheus_client import REGISTRY
+import pytest
+from service_common.coordinates import CoordinateMessage
+from tests.conftest import create_message, FakeChannel, wait_until
+
+from app.car_messages.consumer import BatchAcker, ConsumerEngine
+
+
+POSITION = CoordinateMessage(car_number='AA1111AA', latitude=50.45, longitude=30.52)
+
+
+def dead_lettered_count() -> float:
+    return REGISTRY.get_sample_value('trip_messages_dead_lettered_total') or 0
+
+
+async def test_acker_acks_highest_contiguous_tag():
+    acker = BatchAcker(batch_size=2)
+    first, second, third = (create_message(tag, POSITION) for tag in (1, 2, 3))
+
+    # The second delivery is still in progress, so the third one can not be acked yet
+    await acker.done(first)
+    await acker.done(third)
+    first.ack.assert_not_awaited()
+    third.ack.assert_not_awaited()
+
+    await acker.done(second)
+
+    third.ack.assert_awaited_once_with(multiple=True)
+    first.ack.assert_not_awaited()
+    second.ack.assert_not_awaited()
+
+
+async def test_acker_flushes_partial_batch():
+    acker = BatchAcker(batch_size=10)
+    message = create_message(1, POSITION)
+
+    await acker.done(message)
+    await acker.flush()
+    await acker.flush()
+
+    message.ack.assert_awaited_once_with(multiple=True)
+
+
+async def test_acker_starts_over_on_reopened_channel():
+    acker = BatchAcker(batch_size=1)
+    await acker.done(create_message(1, POSITION))
+    await acker.done(create_message(2, POSITION))
+    reopened = create_message(1, POSITION)
+
+    await acker.done(reopened)
+
+    reopened.ack.assert_awaited_once_with(multiple=True)
+
+
+async def test_acker_keeps_going_when_ack_fails():
+    acker = BatchAcker(batch_size=1)
+    failed, next_message = create_message(1, POSITION), create_message(2, POSITION)
+    failed.ack.side_effect = ConnectionError
+
+    await acker.done(failed)
+    await acker.done(next_message)
+
+    next_message.ack.assert_awaited_once_with(multiple=True)
+
+
+async def test_consumer_handles_and_acks_messages(channel_pool: MagicMock, channel: FakeChannel):
+    positions = []
+    engine = ConsumerEngine(positions.append, 'car_trips_test', prefetch_count=10, workers=2, ack_batch_size=2)
+    messages = [create_message(tag, POSITION) for tag in (1, 2, 3)]
+    consumer = asyncio.create_task(engine.run(channel_pool))
+    await wait_until(lambda: channel.set_qos.await_count)
+
+    for message in messages:
+        await channel.deliver(message)
+    await wait_until(lambda: len(positions) == 3)
+    consumer.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await consumer
+
+    assert positions == [POSITION] * 3
+    channel.set_qos.assert_awaited_once_with(prefetch_count=10)
+    # The batch of the first two and the rest on shutdown
+    messages[1].ack.assert_awaited_once_with(multiple=True)
+    messages[2].ack.assert_awaited_once_with(multiple=True)
+
+
+async def test_consumer_dead_letters_malformed_message(channel: FakeChannel):
+    engine = ConsumerEngine(MagicMock(), 'car_trips_test', ack_batch_size=1)
+    engine._channel = channel
+    message = create_message(1, body=b'not a position')
+    dead_lettered = dead_lettered_count()
+
+    await engine.process(message)
+
+    [published], kwargs = channel.default_exchange.publish.await_args
+    assert published.body == b'not a position'
+    assert kwargs == {'routing_key': 'car_trips_test.dead-letter'}
+    assert dead_lettered_count() == dead_lettered + 1
+    message.ack.assert_awaited_once_with(multiple=True)
+
+
+async def test_consumer_acks_message_when_dead_lettering_fails(channel: FakeChannel):
+    engine = ConsumerEngine(MagicMock(), 'car_trips_test', ack_batch_size=2)
+    engine._channel = channel
+    channel.default_exchange.publish.side_effect = ConnectionError
+    malformed, valid = create_message(1, body=b'not a position'), create_message(2, POSITION)
+
+    with pytest.raises(ConnectionError):
+        await engine.process(malformed)
+    await engine.process(valid)
+
+    # A delivery missing from the chain would hold back acks of every later one
+    valid.ack.assert_awaited_once_with(multiple=True)
@@ -0,0 +1,97 @@
+import asyncio
+import json
+
+from prometheus_client import REGISTRY
+from service_common.coordinates import CoordinateMessage
+
+from app.car_messages.hub import PositionHub
+
+
+def position(car_number: str, latitude: float = 50.45) -> CoordinateMessage:
+    return CoordinateMessage(car_number=car_number, latitude=latitude, longitude=30.52)
+
+
+def dropped_positions_count() -> float:
+    return REGISTRY.get_sample_value('websocket_dropped_positions_total') or 0
+
+
+async def test_hub_sends_positions_of_subscribed_cars():
+    hub = PositionHub(max_pending=10, max_subscriptions=10)
+    subscriber = hub.connect()
+    hub.subscribe(subscriber, ['AA1111AA'])
+
+    hub.publish(position('BB2222BB'))
+    hub.publish(position('AA1111AA'))
+
+    assert json.loads(await subscriber.get())['car_number'] == 'AA1111AA'
+    hub.disconnect(subscriber)
+
+
+async def test_slow_subscriber_keeps_latest_position_of_car():
+    hub = PositionHub(max_pending=10, max_subscriptions=10)
+    subscriber = hub.connect()
+    hub.subscribe(subscriber, ['AA1111AA'])
+    dropped = dropped_positions_count()
+
+    for latitude in (1, 2, 3):
+        hub.publish(position('AA1111AA', latitude))
+
+    assert json.loads(await subscriber.get())['latitude'] == 3
+    assert dropped_positions_count() == dropped + 2
+    hub.disconnect(subscriber)
+
+
+async def test_slow_subscriber_drops_oldest_cars_past_its_queue():
+    hub = PositionHub(max_pending=2, max_subscriptions=10)
+    slow, fast = hub.connect(), hub.connect()
+    car_numbers = ['AA1111AA', 'BB2222BB', 'CC3333CC']
+    hub.subscribe(slow, car_numbers)
+    hub.subscribe(fast, car_numbers[-1:])
+    dropped = dropped_positions_count()
+
+    for car_number in car_numbers:
+        hub.publish(position(car_number))
+
+    # The slow subscriber is not waited for, others get their positions right away
+    assert json.loads(await fast.get())['car_number'] == 'CC3333CC'
+    received = [json.loads(await slow.get())['car_number'] for _ in range(2)]
+    assert received == ['BB2222BB', 'CC3333CC']
+    assert dropped_positions_count() == dropped + 1
+    hub.disconnect(slow)
+    hub.disconnect(fast)
+
+
+async def test_subscriber_waits_for_position():
+    hub = PositionHub(max_pending=10, max_subscriptions=10)
+    subscriber = hub.connect()
+    hub.subscribe(subscriber, ['AA1111AA'])
+    received = asyncio.create_task(subscriber.get())
+    await asyncio.sleep(0)
+
+    hub.publish(position('AA1111AA'))
+
+    assert json.loads(await asyncio.wait_for(received, 1))['car_number'] == 'AA1111AA'
+    hub.disconnect(subscriber)
+
+
+def test_hub_limits_subscriptions():
+    hub = PositionHub(max_pending=10, max_subscriptions=2)
+    subscriber = hub.connect()
+
+    assert hub.subscribe(subscriber, ['AA1111AA', 'BB2222BB'])
+    assert not hub.subscribe(subscriber, ['CC3333CC'])
+    hub.unsubscribe(subscriber, ['AA1111AA'])
+    assert hub.subscribe(subscriber, ['CC3333CC'])
+    hub.disconnect(subscriber)
+
+
+def test_disconnected_subscriber_gets_no_positions():
+    hub = PositionHub(max_pending=10, max_subscriptions=10)
+    subscriber = hub.connect()
+    hub.subscribe(subscriber, ['AA1111AA'])
+
+    hub.disconnect(subscriber)
+    hub.publish(position('AA1111AA'))
+
+    assert subscriber.car_numbers == set()
+    assert hub._topics == {}
@@ -0,0 +1,59 @@
+from fakeredis.aioredis import FakeRedis
+from httpx import AsyncClient
+from service_common.coordinates import CoordinateMessage
+
+from app.positions.store import PositionWriter
+
+
+async def store_positions(redis_client: FakeRedis, *positions: CoordinateMessage):
+    writer = PositionWriter(redis_client)
+    for position in positions:
+        writer.add(position)
+    await writer.flush()
+
+
+async def test_positions(client: AsyncClient, redis_client: FakeRedis):
+    await store_positions(
+        redis_client,
+        CoordinateMessage(car_number='AA1111AA', latitude=1, longitude=1),
+        CoordinateMessage(car_number='AA1111AA', latitude=50.45, longitude=30.52),
+        CoordinateMessage(car_number='BB2222BB', latitude=50.46, longitude=30.53),
+    )
+
+    response = await client.get('/positions/', params={'car_numbers': ['AA1111AA', 'CC3333CC']})
+
+    assert response.status_code == 200
+    [position] = response.json()
+    assert {key: position[key] for key in ('car_number', 'latitude', 'longitude')} == {
+        'car_number': 'AA1111AA',
+        'latitude': 50.45,
+        'longitude': 30.52,
+    }
+    assert position['updated_at']
+
+
+async def test_nearby_positions(client: AsyncClient, redis_client: FakeRedis):
+    await store_positions(
+        redis_client,
+        CoordinateMessage(car_number='FAR', latitude=49.84, longitude=24.03),
+        CoordinateMessage(car_number='NEAR', latitude=50.46, longitude=30.52),
+        CoordinateMessage(car_number='HERE', latitude=50.45, longitude=30.52),
+    )
+
+    response = await client.get('/positions/nearby', params={'lat': 50.45, 'lon': 30.52, 'radius': 5})
+
+    assert response.status_code == 200
+    assert [position['car_number'] for position in response.json()] == ['HERE', 'NEAR']
+    assert response.json()[0]['distance'] < response.json()[1]['distance'] < 5
+
+
+async def test_positions_near_pole_are_stored_but_not_indexed(client: AsyncClient, redis_client: FakeRedis):
+    await store_positions(redis_client, CoordinateMessage(car_number='AA1111AA', latitude=50.45, longitude=30.52))
+    # The car moved out of the range of Redis GEO, its old indexed position must not be found
+    await store_positions(redis_client, CoordinateMessage(car_number='AA1111AA', latitude=89, longitude=30.52))
+
+    positions = await client.get('/positions/', params={'car_numbers': ['AA1111AA']})
+    nearby = await client.get('/positions/nearby', params={'lat': 50.45, 'lon': 30.52, 'radius': 5})
+
+    assert positions.json()[0]['latitude'] == 89
+    assert nearby.json() == []